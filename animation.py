@@ -0,0 +1,90 @@
+import numpy as np
+import dsp
+
+# --------- ENVELOPE ---------
+FRAME_TIME = dsp.FRAME / dsp.RATE  # one animation step per 20 ms audio frame
+
+# RMS per frame of a whole chunk, scaled so ordinary speech peaks sit around 1
+def envelope(samples):
+    levels = dsp.rms(dsp.frames(samples)) if len(samples) >= dsp.FRAME else np.zeros(0, dtype=np.float32)
+    if not len(levels):
+        return levels
+    peak = max(float(np.percentile(levels, 95)), 1e-4)
+    return np.clip(levels / peak, 0.0, 1.0)
+
+# Light smoothing so the lids don't chatter on every syllable
+def smooth(values, width=3):
+    if len(values) < width:
+        return values
+    kernel = np.hanning(width + 2)[1:-1]
+    padded = np.pad(values, (width // 2, width - 1 - width // 2), mode="edge")
+    return np.convolve(padded, kernel / kernel.sum(), mode="valid")
+
+# Frames where a pause of at least min_pause frames begins after speech
+def phrase_boundaries(env, threshold=0.15, min_pause=8):
+    quiet = np.concatenate(([False], env < threshold, [False]))
+    edges = np.flatnonzero(np.diff(quiet.astype(np.int8)))
+    starts, ends = edges[0::2], edges[1::2]
+    keep = (ends - starts >= min_pause) & (starts > 0)
+    return starts[keep]
+
+# --------- SPEECH ANIMATOR ---------
+# Turns the PCM about to be played into per-frame servo angles:
+#   lids  open wider on loud frames and droop by `lid_depth` in quiet ones
+#   blink at the start of each pause between phrases
+#   gaze  drifts to a new spot near center at every other phrase boundary
+# lids: {channel: (open angle, closed angle)}
+# gaze: {channel: (center angle, max offset)}
+# The track is handed to the servo scheduler, which plays it on the audio clock.
+# The eye pose itself belongs to the runtime: lids that are closed when speech
+# starts (e.g. the goodbye said with the eyes shut) are left alone, and stop()
+# puts every animated channel back where it was before speech.
+class SpeechAnimator:
+    BLINK = (0.6, 1.0, 1.0, 0.6)  # lid closure per frame
+
+    def __init__(self, servos, lids, gaze, lid_depth=0.15, seed=None):
+        self.servos = servos
+        self.lids = lids
+        self.gaze = gaze
+        self.lid_depth = lid_depth
+        self.rng = np.random.default_rng(seed)
+        self.before = {}  # channel -> angle before the current speech, None if unknown
+
+    def track(self, samples):
+        env = smooth(envelope(samples))
+        n = len(env)
+        closure = self.lid_depth * (1.0 - env)
+        boundaries = phrase_boundaries(env)
+        blink = np.array(self.BLINK)
+        for start in boundaries:
+            span = closure[start:start + len(blink)]
+            np.maximum(span, blink[:len(span)], out=span)
+        tracks = {}
+        for channel, (open_angle, closed_angle) in self.lids.items():
+            tracks[channel] = open_angle + (closed_angle - open_angle) * closure
+        # Piecewise-constant gaze targets, eased between segments by the smoothing
+        segments = np.searchsorted(boundaries[1::2], np.arange(n), side="right")
+        for channel, (center, offset) in self.gaze.items():
+            targets = center + self.rng.uniform(-offset, offset, len(boundaries) // 2 + 1)
+            targets[0] = center
+            tracks[channel] = smooth(targets[segments], width=9) if n else targets[:0]
+        return tracks
+
+    # start_time: when the first sample reaches the speaker, on the servo clock
+    def start(self, samples, start_time=None):
+        tracks = self.track(samples)
+        for channel, (open_angle, closed_angle) in self.lids.items():
+            angle = self.servos.angle(channel)
+            if angle is not None and abs(angle - closed_angle) < abs(angle - open_angle):
+                del tracks[channel]
+        self.before = {channel: self.servos.angle(channel) for channel in tracks}
+        start = self.servos.clock.monotonic() if start_time is None else start_time
+        self.servos.play_track(start, FRAME_TIME, tracks)
+        return tracks
+
+    # Ends the track and returns the animated channels to their pose from
+    # before speech
+    def stop(self):
+        before, self.before = self.before, {}
+        self.servos.stop_track(list(before))
+        return self.servos.move_many({channel: angle for channel, angle in before.items() if angle is not None}, 0.1)
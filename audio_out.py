@@ -0,0 +1,292 @@
+import threading
+from collections import deque
+import numpy as np
+from clock import SYSTEM_CLOCK
+
+RATE = 24000  # gTTS MP3s are 24 kHz mono, so speech plays without resampling
+BLOCK = 240  # samples mixed at a time, 10 ms
+
+def to_pcm(samples):
+    return (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+
+# --------- SINKS ---------
+# Where mixed blocks go. write() blocks like a device would once it holds
+# `buffer` seconds of audio, delay() is how long a sample written now waits
+# before it is heard, and `underruns` counts the times the device ran dry.
+
+# The sound card, opened once for the whole run
+class PyAudioSink:
+    def __init__(self, rate=RATE, block=BLOCK, device_index=None):
+        import pyaudio
+        self.pyaudio = pyaudio
+        self.rate = rate
+        self.pa = pyaudio.PyAudio()
+        self.stream = self.pa.open(format=pyaudio.paInt16, channels=1, rate=rate, output=True,
+                                   output_device_index=device_index, frames_per_buffer=block)
+        self.capacity = self.stream.get_write_available()
+        self.underruns = 0
+
+    def delay(self):
+        queued = self.capacity - self.stream.get_write_available()
+        return queued / self.rate + self.stream.get_output_latency()
+
+    def write(self, block):
+        try:
+            self.stream.write(to_pcm(block), exception_on_underflow=True)
+        except IOError as e:
+            # PortAudio still took the block, it is telling us it went silent before it arrived
+            if getattr(e, "errno", None) != self.pyaudio.paOutputUnderflowed:
+                raise
+            self.underruns += 1
+
+    def close(self):
+        self.stream.stop_stream()
+        self.stream.close()
+        self.pa.terminate()
+
+# Plays into nothing at the rate a device would, for benches and machines
+# without a sound card. keep=True holds on to everything written.
+class NullSink:
+    def __init__(self, rate=RATE, buffer=0.03, keep=False, clock=SYSTEM_CLOCK):
+        self.rate = rate
+        self.buffer = buffer
+        self.clock = clock
+        self.drained_at = None  # clock time the queued audio runs out
+        self.underruns = 0
+        self.written = 0
+        self.blocks = [] if keep else None
+
+    def delay(self):
+        if self.drained_at is None:
+            return 0.0
+        return max(0.0, self.drained_at - self.clock.monotonic())
+
+    def write(self, block):
+        now = self.clock.monotonic()
+        if self.drained_at is None:
+            self.drained_at = now
+        elif now > self.drained_at:
+            self.underruns += 1
+            self.drained_at = now
+        self.drained_at += len(block) / self.rate
+        self.written += len(block)
+        if self.blocks is not None:
+            self.blocks.append(block.copy())
+        self.clock.sleep(self.drained_at - now - self.buffer)
+
+    def close(self):
+        pass
+
+# --------- VOICES ---------
+# One sound playing on the engine. Gain changes are linear ramps applied per
+# sample as the voice is mixed; stop() ramps to silence starting at an exact
+# sample and ends the voice there.
+#   started     set once the first block is mixed; start_time is when its
+#               first sample reaches the speaker, on the engine's clock
+#   done        set once the last sample is mixed; finished_at is when it is heard
+class Voice:
+    def __init__(self, engine, samples, gain, tag, duck):
+        self.engine = engine
+        self.samples = samples
+        self.gain = gain
+        self.tag = tag
+        self.duck = duck  # other voices drop to engine.duck_level while this one plays
+        self.cursor = 0  # next sample to mix
+        self.end = len(samples)
+        self.ramp = None  # (first sample, length, from gain, to gain)
+        self.stopped = False
+        self.stop_requested = None
+        self.start_time = None
+        self.finished_at = None
+        self.started = threading.Event()
+        self.done = threading.Event()
+
+    @property
+    def duration(self):
+        return len(self.samples) / self.engine.rate
+
+    # Seconds of this voice heard so far
+    @property
+    def position(self):
+        if self.start_time is None:
+            return 0.0
+        heard = self.engine.clock.monotonic() - self.start_time
+        return min(max(0.0, heard), self.cursor / self.engine.rate)
+
+    def fade_to(self, gain, seconds=0.05, at=None):
+        self.engine.fade(self, gain, seconds, at)
+
+    # at: seconds into the voice to stop at, default the next sample mixed
+    def stop(self, fade=0.005, at=None):
+        self.engine.stop_voice(self, fade, at)
+
+    # Until the last sample has been heard, not just handed to the device
+    def wait(self, timeout=None):
+        if not self.done.wait(self.engine.clock.real(timeout)):
+            return False
+        self.engine.clock.sleep(self.finished_at - self.engine.clock.monotonic())
+        return True
+
+    def _gain_at(self, index):
+        if self.ramp is None:
+            return self.gain
+        first, length, g0, g1 = self.ramp
+        return float(np.interp(index, [first, first + length], [g0, g1]))
+
+    def _gains(self, count):
+        if self.ramp is None:
+            return self.gain
+        first, length, g0, g1 = self.ramp
+        index = np.arange(self.cursor, self.cursor + count)
+        gains = np.interp(index, [first, first + length], [g0, g1]).astype(np.float32)
+        if self.cursor + count >= first + length:
+            self.gain, self.ramp = g1, None
+        return gains
+
+# --------- ENGINE ---------
+# Keeps one output stream open for the whole run and mixes every voice into
+# it BLOCK samples at a time on its own thread, writing silence when nothing
+# plays so the device never has to be reopened. Speech is played with
+# duck=True, so earcons and anything else under it are turned down while it
+# talks. Stop latency is measured from stop() to when the last (faded)
+# sample of the voice is heard, for stops that were not scheduled with `at`.
+class AudioEngine:
+    def __init__(self, sink, rate=RATE, block=BLOCK, duck_level=0.3, duck_time=0.08, clock=SYSTEM_CLOCK):
+        self.sink = sink
+        self.rate = rate
+        self.block = block
+        self.duck_level = duck_level
+        self.duck_step = block / (duck_time * rate)  # gain change per block
+        self.clock = clock
+        self.voices = []
+        self.volume = 1.0
+        self.mixed_volume = 1.0
+        self.ducked = 1.0
+        self.silence = np.zeros(block, dtype=np.float32)
+        self.stats = {"played": 0, "stopped": 0, "blocks": 0}
+        self.stop_latency = deque(maxlen=100)
+        self.lock = threading.Lock()
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(1.0)
+        self.sink.close()
+
+    # samples: float32 mono at self.rate
+    def play(self, samples, gain=1.0, tag="speech", duck=False):
+        voice = Voice(self, np.asarray(samples, dtype=np.float32), gain, tag, duck)
+        with self.lock:
+            self.voices.append(voice)
+            self.stats["played"] += 1
+        return voice
+
+    def fade(self, voice, gain, seconds=0.05, at=None):
+        with self.lock:
+            first = voice.cursor if at is None else max(voice.cursor, int(at * self.rate))
+            voice.ramp = (first, max(1, int(seconds * self.rate)), voice._gain_at(first), gain)
+
+    def stop_voice(self, voice, fade=0.005, at=None):
+        with self.lock:
+            if voice.done.is_set() or voice.stopped:
+                return
+            first = voice.cursor if at is None else max(voice.cursor, int(at * self.rate))
+            length = max(1, int(fade * self.rate))
+            voice.ramp = (first, length, voice._gain_at(first), 0.0)
+            voice.end = min(voice.end, first + length)
+            voice.stopped = True
+            voice.stop_requested = self.clock.monotonic() if at is None else None
+
+    # Every voice with this tag, or all of them
+    def stop_all(self, tag=None, fade=0.005):
+        with self.lock:
+            voices = [v for v in self.voices if tag is None or v.tag == tag]
+        for voice in voices:
+            self.stop_voice(voice, fade)
+
+    def busy(self, tag=None):
+        with self.lock:
+            return any(tag is None or v.tag == tag for v in self.voices)
+
+    def summary(self):
+        latency = sorted(self.stop_latency)
+        stats = dict(self.stats, underruns=self.sink.underruns)
+        if latency:
+            stats["stop_latency_p50"] = latency[len(latency) // 2]
+            stats["stop_latency_max"] = latency[-1]
+        return stats
+
+    # A sink that fails (device unplugged, stream closed under us) is swapped
+    # for a NullSink so voices still run to the end and nobody waits forever
+    def _loop(self):
+        while self.running:
+            try:
+                self.sink.write(self._mix())  # _mix asks the sink for its delay too
+            except Exception as e:
+                if isinstance(self.sink, NullSink):
+                    raise
+                print("Audio output error:", e)
+                try:
+                    self.sink.close()
+                except Exception:
+                    pass
+                self.sink = NullSink(self.rate, clock=self.clock)
+
+    def _mix(self):
+        n = self.block
+        with self.lock:
+            self.stats["blocks"] += 1
+            if not self.voices and self.mixed_volume == self.volume:
+                return self.silence
+            heard_at = self.clock.monotonic() + self.sink.delay()
+            out = np.zeros(n, dtype=np.float32)
+            target = self.duck_level if any(v.duck for v in self.voices) else 1.0
+            step = max(-self.duck_step, min(self.duck_step, target - self.ducked))
+            duck = np.linspace(self.ducked, self.ducked + step, n, dtype=np.float32)
+            self.ducked += step
+            for voice in list(self.voices):
+                count = max(0, min(n, voice.end - voice.cursor))
+                if count:
+                    chunk = voice.samples[voice.cursor:voice.cursor + count] * voice._gains(count)
+                    out[:count] += chunk if voice.duck else chunk * duck[:count]
+                if voice.cursor == 0:
+                    voice.start_time = heard_at
+                    voice.started.set()
+                voice.cursor += count
+                if voice.cursor >= voice.end:
+                    self.voices.remove(voice)
+                    voice.finished_at = heard_at + count / self.rate
+                    if voice.stopped:
+                        self.stats["stopped"] += 1
+                    if voice.stop_requested is not None:
+                        self.stop_latency.append(voice.finished_at - voice.stop_requested)
+                    voice.started.set()
+                    voice.done.set()
+            out *= np.linspace(self.mixed_volume, self.volume, n, dtype=np.float32)
+            self.mixed_volume = self.volume
+        return out
+
+# --------- EARCONS ---------
+# Short tones that can play over speech: (frequency, seconds) notes with a
+# few ms of fade on each so they don't click
+EARCONS = {
+    "wake": [(660, 0.07), (880, 0.09)],
+    "error": [(440, 0.09), (330, 0.12)],
+}
+
+def earcon(name, rate=RATE, level=0.25):
+    notes = []
+    for freq, seconds in EARCONS[name]:
+        t = np.arange(int(seconds * rate)) / rate
+        envelope = np.minimum(1.0, np.minimum(t, seconds - t) / 0.005)
+        notes.append(level * envelope * np.sin(2 * np.pi * freq * t))
+    return np.concatenate(notes).astype(np.float32)
@@ -0,0 +1,159 @@
+import threading
+import numpy as np
+import dsp
+
+# --------- BARGE-IN MONITOR ---------
+# One long-lived thread watches the mic while the bot is talking. The bot's
+# own playback is known, so its echo is predicted and subtracted per
+# frequency band before deciding whether someone is speaking over it.
+#
+#   delay          lag (up to max_delay) that best lines up mic and playback
+#                  energy over the first `warmup` seconds of playback
+#   echo estimate  coupling gain * reference spectrum at that delay (+-1 frame)
+#   residual       mic spectrum - over_subtract * echo estimate, less
+#                  echo_margin of the echo energy for what is still left of it
+#
+# The coupling gain per band is learned quickly for another `warmup` seconds,
+# then only slowly, always from steady playback frames. The slow updates also
+# skip frames judged to be speech, so the user's voice is not learned as
+# echo. Delay and gain are kept for later replies.
+#
+# `confirm` consecutive frames with residual energy above the noise threshold
+# fire on_barge_in. Two frames (40 ms) plus the output's fade and buffer keep
+# the stop within 100 ms; the long warmup is what keeps two frames from
+# firing on the echo, a coupling learned on less of the first reply is too
+# far off on the next one.
+class BargeInMonitor:
+    def __init__(self, mic, noise_floor, on_barge_in, max_delay=0.25, confirm=2, warmup=0.8,
+                 over_subtract=3.0, echo_margin=0.3):
+        self.mic = mic
+        self.noise_floor = noise_floor
+        self.on_barge_in = on_barge_in
+        self.max_lag = int(max_delay * dsp.RATE / dsp.FRAME)
+        self.confirm = confirm
+        self.warmup_frames = int(warmup * dsp.RATE / dsp.FRAME)
+        self.over_subtract = over_subtract
+        self.echo_margin = echo_margin
+        self.delay = None
+        self.envelope = []  # (reference frame, mic power) while measuring the delay
+        self.gain = np.ones(dsp.N_FFT // 2 + 1, dtype=np.float32)
+        self.trained = 0
+        self.reference = None  # power spectra of the playback, one row per frame
+        self.reference_start = 0
+        self.armed = False
+        self.loud_frames = 0
+        self.triggered_at = None
+        self.lock = threading.Lock()
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, args=(self.mic.reader(),), daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+
+    def arm(self):
+        with self.lock:
+            self.armed = True
+            self.loud_frames = 0
+            self.triggered_at = None
+
+    def disarm(self):
+        with self.lock:
+            self.armed = False
+            self.reference = None
+
+    # Call as playback of `samples` (float32 mono at dsp.RATE) starts
+    def play_reference(self, samples, start_frame=None):
+        spectra = dsp.power_spectrum(dsp.frames(samples)) if len(samples) >= dsp.FRAME else None
+        with self.lock:
+            self.reference = spectra
+            self.reference_start = self.mic.ring.written if start_frame is None else start_frame
+
+    def stop_reference(self):
+        with self.lock:
+            self.reference = None
+
+    # Needs max_lag frames on top of the warmup so every lag is scored on
+    # the same amount of overlap, a short overlap correlates by chance
+    def _learn_delay(self, k, power):
+        self.envelope.append((k, power))
+        if len(self.envelope) < self.warmup_frames + self.max_lag:
+            return
+        ks = np.array([e[0] for e in self.envelope])
+        mic = np.array([e[1] for e in self.envelope])
+        ref = self.reference.sum(axis=1)
+        best, best_score = 0, -np.inf
+        for lag in range(self.max_lag + 1):
+            idx = ks - lag
+            valid = (idx >= 0) & (idx < len(ref))
+            if valid.sum() < self.warmup_frames or np.std(mic[valid]) == 0 or np.std(ref[idx[valid]]) == 0:
+                continue
+            score = np.corrcoef(mic[valid], ref[idx[valid]])[0, 1]
+            if score > best_score:
+                best, best_score = lag, score
+        self.delay = best
+        self.envelope = []
+
+    def _residual(self, k, samples, energy):
+        mic_power = dsp.power_spectrum(samples)
+        if self.delay is None:
+            self._learn_delay(k, mic_power.sum())
+            return 0.0
+        j = k - self.delay
+        if j + 1 < 0 or j - 1 >= len(self.reference):
+            return energy
+        echo = self.reference[max(0, j - 1):j + 2].max(axis=0)
+        # Coupling is only learned while the playback is steady, when the mic
+        # frame holds the same sound as reference frame j and not the edge of
+        # a syllable. It starts out broadband and is refined per band.
+        steady = 0 <= j < len(self.reference) and self.reference[j].sum() > 0.5 * echo.sum() > 0
+        if steady:
+            aligned = self.reference[j]
+            strong = aligned > 1e-3 * aligned.max()
+            ratio = mic_power / (aligned + 1e-12)
+        if self.trained < self.warmup_frames:
+            if steady:
+                if self.trained == 0:
+                    self.gain[:] = mic_power.sum() / aligned.sum()
+                self.trained += 1
+                self.gain[strong] += 0.5 * (ratio[strong] - self.gain[strong])
+            return 0.0
+        predicted = self.gain * echo
+        residual = np.maximum(0.0, mic_power - self.over_subtract * predicted)
+        residual_energy = energy * np.sqrt(residual.sum() / (mic_power.sum() + 1e-12))
+        echo_energy = energy * np.sqrt(min(1.0, predicted.sum() / (mic_power.sum() + 1e-12)))
+        residual_energy = max(0.0, residual_energy - self.echo_margin * echo_energy)
+        if steady and not self.noise_floor.is_speech(residual_energy):
+            self.gain[strong] += 0.05 * (ratio[strong] - self.gain[strong])
+        return residual_energy
+
+    # Returns True on the frame where barge-in is confirmed
+    def process(self, n, frame):
+        samples = dsp.to_float(frame)
+        energy = float(dsp.rms(samples)) * 32768
+        with self.lock:
+            if not self.armed:
+                return False
+            if self.reference is not None and n >= self.reference_start:
+                energy = self._residual(n - self.reference_start, samples, energy)
+            if not self.noise_floor.is_speech(energy):
+                self.loud_frames = 0
+                return False
+            self.loud_frames += 1
+            if self.loud_frames < self.confirm:
+                return False
+            self.armed = False
+            self.triggered_at = n - self.confirm + 1
+        return True
+
+    def _loop(self, reader):
+        while self.running:
+            frame = reader.read(timeout=1)
+            if frame is not None and self.process(reader.cursor - 1, frame):
+                self.on_barge_in()
@@ -0,0 +1,110 @@
+import sys
+import time
+import argparse
+import numpy as np
+from pca9685 import PCA9685
+from servo_sim import SoftPCA9685
+from motion import ServoScheduler
+from calibration import load_profiles
+from animation import SpeechAnimator, FRAME_TIME
+from bench_session import synth_utterance
+
+# Audio-to-servo sync of the speech animation. SpeechAnimator tracks of
+# synthetic speech are played through the real ServoScheduler and PCA9685
+# driver into servo_sim.SoftPCA9685, whose timeline records when every pulse
+# changed. Each change is matched to the nearest frame, up to two frames
+# away, that changes to the pulse it carries, so a late write is measured as
+# late rather than taken for the next frame, and a change no frame asks for
+# is wrong. Its time is compared with that frame's audio timestamp.
+# Sync is judged on the 99th percentile offset (--limit): on a kernel
+# without real-time scheduling the OS now and then wakes the scheduler
+# thread late, which no code here can prevent, so the max is held to the
+# looser --max-limit instead. Fails on any wrong frame or either bound
+# exceeded. Also checks that speech said with the lids closed leaves them
+# closed.
+#
+#   python bench_animation.py --utterances 10
+
+def expected_pulses(pwm, chip, channel, angles):
+    profile = pwm.servoProfile(channel)
+    period = 1000000.0 / chip.freq
+    return [profile.pulse(profile.clamp(a)) * period / 4096 for a in angles]
+
+# changes: [(time, pulse)] on one channel. -> offsets in seconds, wrong changes
+def match(changes, pulses, start, reach=2):
+    offsets, wrong = [], 0
+    for t, pulse in changes:
+        nearest = int(round((t - start) / FRAME_TIME))
+        if not -reach <= nearest < len(pulses) + reach:
+            continue
+        frames = [f for f in range(nearest - reach, nearest + reach + 1)
+                  if 0 <= f < len(pulses) and abs(pulses[f] - pulse) <= 1.0
+                  and (f == 0 or pulses[f] != pulses[f - 1])]
+        if not frames:
+            wrong += 1
+            continue
+        frame = min(frames, key=lambda f: abs(t - (start + f * FRAME_TIME)))
+        offsets.append(t - (start + frame * FRAME_TIME))
+    return offsets, wrong
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--utterances", type=int, default=10)
+    parser.add_argument("--lead", type=float, default=0.05, help="seconds between track handoff and first sample")
+    parser.add_argument("--limit", type=float, default=0.005, help="allowed p99 offset, seconds")
+    parser.add_argument("--max-limit", type=float, default=0.015, help="allowed max offset, seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    profiles = load_profiles()
+    chip = SoftPCA9685()
+    pwm = PCA9685(bus=chip, profiles=profiles)
+    servos = ServoScheduler(pwm)
+    servos.start()
+    pan, tilt = profiles[0], profiles[1]
+    animator = SpeechAnimator(servos, lids={2: (170, 100), 15: (0, 80)},
+                              gaze={0: (pan.center, 8), 1: (tilt.center, 2)}, seed=args.seed)
+    offsets, wrong, frames = [], 0, 0
+    try:
+        for i in range(args.utterances):
+            words = " ".join(["hello there"] * int(rng.integers(2, 8)))
+            samples = synth_utterance(words, rng).astype(np.float32) / 32768
+            start = servos.clock.monotonic() + args.lead
+            mark = len(chip.timeline)
+            tracks = animator.start(samples, start)
+            time.sleep(args.lead + len(next(iter(tracks.values()))) * FRAME_TIME + 0.1)
+            for channel, angles in tracks.items():
+                pulses = expected_pulses(pwm, chip, channel, angles)
+                frames += len(angles)
+                found, missed = match([(t, pulse) for t, c, pulse in chip.timeline[mark:] if c == channel],
+                                      pulses, start)
+                offsets += found
+                wrong += missed
+            servos.wait(animator.stop())
+        # Speech said with the lids shut (the goodbye) must not touch them
+        servos.wait(servos.move_many({channel: closed for channel, (_, closed) in animator.lids.items()}, 0.05))
+        mark = len(chip.timeline)
+        tracks = animator.start(samples, servos.clock.monotonic() + args.lead)
+        time.sleep(args.lead + len(next(iter(tracks.values()))) * FRAME_TIME + 0.1)
+        servos.wait(animator.stop())
+        lid_writes = sum(c in animator.lids for _, c, _ in chip.timeline[mark:])
+    finally:
+        servos.stop()
+
+    offsets = np.abs(np.array(offsets)) * 1000
+    print(f"{args.utterances} utterances, {frames} frames, {len(offsets)} servo writes matched: "
+          f"offset p50 {np.percentile(offsets, 50):.2f} ms  p99 {np.percentile(offsets, 99):.2f} ms  "
+          f"max {offsets.max():.2f} ms  wrong frame {wrong}")
+    print(f"closed lids: {lid_writes} lid writes while speaking and after stop")
+    if wrong or np.percentile(offsets, 99) > 1000 * args.limit or offsets.max() > 1000 * args.max_limit:
+        print(f"FAIL: servo writes should carry their own frame within {1000 * args.limit:.0f} ms of the audio "
+              f"(p99), {1000 * args.max_limit:.0f} ms at most")
+        return 1
+    if lid_writes:
+        print("FAIL: the animator should leave closed lids to the runtime")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+import sys
+import time
+import random
+import argparse
+import threading
+import numpy as np
+from audio_out import AudioEngine, NullSink, earcon, RATE
+
+# Stop latency and underruns of audio_out.AudioEngine, played into a
+# NullSink so no sound card is needed. Each trial plays a sentence, lays an
+# earcon over it part way through, and stops the speech at a random point the
+# way a barge-in does; latency runs from the stop() call to the moment the
+# last sample is heard. --load adds busy threads doing numpy work like the
+# wake word and barge-in monitors do, to see if the mixer keeps up.
+# "poll (simulated)" is what finalWorking did before, for comparison only and
+# not measured: a stop noticed on the next 100 ms get_busy() check, drawn at
+# random, plus the same device buffer.
+#
+#   python bench_audio.py --trials 50 --load 2
+
+POLL = 0.1
+
+def sentence(seconds, rate=RATE):
+    t = np.arange(int(seconds * rate)) / rate
+    return (0.3 * np.sin(2 * np.pi * 140 * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * t))).astype(np.float32)
+
+def busy_work(stop):
+    x = np.random.default_rng(0).normal(size=(50, 512)).astype(np.float32)
+    while not stop.is_set():
+        np.abs(np.fft.rfft(x)) ** 2
+        time.sleep(0.001)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trials", type=int, default=30)
+    parser.add_argument("--load", type=int, default=0, help="busy threads running alongside the mixer")
+    parser.add_argument("--block", type=int, default=240, help="samples mixed per block")
+    parser.add_argument("--buffer", type=float, default=0.03, help="seconds the null device buffers")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    sink = NullSink(RATE, buffer=args.buffer)
+    engine = AudioEngine(sink, block=args.block)
+    stop = threading.Event()
+    workers = [threading.Thread(target=busy_work, args=(stop,), daemon=True) for _ in range(args.load)]
+    for worker in workers:
+        worker.start()
+    engine.start()
+    chime = earcon("wake")
+    polled, mistimed = [], 0
+    try:
+        for _ in range(args.trials):
+            voice = engine.play(sentence(rng.uniform(1.0, 2.0)), tag="speech", duck=True)
+            voice.started.wait(1.0)
+            cut = rng.uniform(0.2, 0.8) * voice.duration
+            time.sleep(cut / 2)
+            engine.play(chime, tag="earcon")
+            time.sleep(cut / 2)
+            voice.stop()
+            voice.wait()
+            # It must have stopped where stop() was called, not a block later
+            mistimed += abs(voice.end - int(cut * RATE)) > args.block + int(0.005 * RATE) + int(args.buffer * RATE)
+            polled.append(rng.uniform(0, POLL) + args.buffer)
+    finally:
+        engine.stop()
+        stop.set()
+
+    stats = engine.summary()
+    latency = np.array(engine.stop_latency) * 1000
+    polled = np.array(polled) * 1000
+    print(f"engine            stop latency p50 {np.percentile(latency, 50):6.1f} ms  p95 {np.percentile(latency, 95):6.1f} ms  "
+          f"max {latency.max():6.1f} ms")
+    print(f"poll (simulated)  stop latency p50 {np.percentile(polled, 50):6.1f} ms  p95 {np.percentile(polled, 95):6.1f} ms  "
+          f"max {polled.max():6.1f} ms")
+    print(f"underruns {stats['underruns']} in {stats['blocks']} blocks  stopped {stats['stopped']}/{args.trials}  "
+          f"off by more than a block {mistimed}")
+    return 1 if stats["underruns"] or mistimed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+import sys
+import argparse
+import numpy as np
+import dsp
+from noise_floor import NoiseFloor
+from barge_in import BargeInMonitor
+
+# Stop latency of barge_in.BargeInMonitor on synthetic rooms: the mic hears
+# the bot's own playback (delayed, scaled, with one reflection) over room
+# noise, and in half the trials the user starts talking part way through,
+# 2-4x louder than the echo since they are nearer the mic than the speaker.
+# Frames go straight to process(), so the latency is exact frame time from
+# the user's first voiced frame to on_barge_in. The output side adds
+# audio_out's stop fade and device buffer on top (see bench_audio.py), both
+# counted here as --output seconds. Fails if a talk-over is missed, p95 stop
+# latency is over --limit, or the echo alone stops more than --false-stops of
+# the replies.
+#
+#   python bench_barge_in.py --trials 200
+
+FRAME_TIME = dsp.FRAME / dsp.RATE
+
+# Voiced syllables of random length, loudness and pitch (intonation moves
+# around +-20%) with short gaps, so the envelope is not periodic and the echo
+# delay has one right answer
+def voice(rng, seconds, pitch, level):
+    n = int(seconds * dsp.RATE)
+    out = np.zeros(n)
+    i = 0
+    while i < n:
+        m = min(int(rng.uniform(0.1, 0.3) * dsp.RATE), n - i)
+        t = np.arange(m) / dsp.RATE
+        f0 = pitch * rng.uniform(0.8, 1.25) * (1 + rng.uniform(-0.1, 0.1) * t / 0.3)
+        phase = 2 * np.pi * np.cumsum(f0) / dsp.RATE
+        harmonics = sum(np.sin(k * phase) / k for k in range(1, 11)) / 2.9
+        out[i:i + m] = rng.uniform(0.4, 1.0) * harmonics * np.sin(np.pi * np.arange(m) / m) ** 0.5
+        i += m + int(rng.uniform(0.03, 0.12) * dsp.RATE)
+    return (level * out).astype(np.float32)
+
+# One room per trial: echo path (delay, gain, one reflection) and noise.
+# -> function(talk) giving mic samples, playback reference and the frame the
+# user starts talking on (None if they don't)
+def room(rng):
+    delay = int(rng.uniform(0.02, 0.15) * dsp.RATE)
+    bounce = delay + int(0.03 * dsp.RATE)
+    gain, reflection = rng.uniform(0.1, 0.5), rng.uniform(0.05, 0.15)
+    noise = rng.choice([0.001, 0.003])
+
+    def record(talk, seconds=3.0, level=0.3):
+        reference = voice(rng, seconds, rng.uniform(110, 150), level)
+        mic = np.zeros_like(reference)
+        mic[delay:] += gain * reference[:-delay]
+        mic[bounce:] += reflection * reference[:-bounce]
+        mic += rng.normal(0, noise, len(mic)).astype(np.float32)
+        onset = None
+        if talk:
+            onset = int(rng.uniform(1.0, 2.0) / FRAME_TIME)
+            user = voice(rng, seconds, rng.uniform(170, 240), level * gain * rng.uniform(2.0, 4.0))
+            mic[onset * dsp.FRAME:] += user[:len(mic) - onset * dsp.FRAME]
+        return (np.clip(mic, -1, 1) * 32767).astype(np.int16), reference, onset
+    return record
+
+def run(monitor, mic, reference):
+    monitor.arm()
+    monitor.play_reference(reference, start_frame=0)
+    for n, frame in enumerate(dsp.frames(mic)):
+        if monitor.process(n, frame):
+            return n
+    return None
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trials", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=float, default=0.035, help="seconds from stop() to silence")
+    parser.add_argument("--limit", type=float, default=0.1, help="p95 stop latency allowed, seconds")
+    parser.add_argument("--false-stops", type=float, default=0.05, help="share of replies the echo may stop")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    latency, false_stops, missed = [], 0, 0
+    for i in range(args.trials):
+        record = room(rng)
+        noise_floor = NoiseFloor()
+        for frame in dsp.frames(record(False, 2.0, level=0.0)[0]):
+            noise_floor.update(frame)
+        monitor = BargeInMonitor(None, noise_floor, lambda: None)
+        # A first reply to learn the room on, as the bot would have said "Yes?"
+        run(monitor, *record(False)[:2])
+        monitor.disarm()
+        mic, reference, onset = record(talk=i % 2 == 0)
+        stopped = run(monitor, mic, reference)
+        if onset is None:
+            false_stops += stopped is not None
+        elif stopped is None or stopped < onset:
+            missed += stopped is None
+            false_stops += stopped is not None
+        else:
+            latency.append((stopped + 1 - onset) * FRAME_TIME + args.output)
+
+    latency = np.array(latency) * 1000
+    print(f"talk-over stop latency p50 {np.percentile(latency, 50):5.0f} ms  p95 {np.percentile(latency, 95):5.0f} ms  "
+          f"max {latency.max():5.0f} ms  (incl. {1000 * args.output:.0f} ms output)")
+    print(f"missed {missed}/{(args.trials + 1) // 2}  stopped on echo alone {false_stops}/{args.trials}")
+    if missed or false_stops > args.false_stops * args.trials or np.percentile(latency, 95) > 1000 * args.limit:
+        print(f"FAIL: talk-over should stop playback within {1000 * args.limit:.0f} ms (p95), "
+              f"echo alone at most {100 * args.false_stops:.0f}% of replies")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+import os
+import sys
+import shutil
+import tempfile
+import argparse
+import numpy as np
+from phrase_cache import PhraseCache
+from response_cache import ResponseCache
+
+# Checks the reply caches against the two ways they can go wrong:
+#   bound     every stored reply pins its sentences in the PhraseCache. Stores
+#             far more replies than the cache holds and checks decoded audio
+#             stays within max_items, while a hit on any live reply still
+#             needs no TTS call
+#   near      question pairs that are close in embedding space but want
+#             different answers (a number or a name changed) must not share a
+#             cached reply; pairs that only add filler or detail still should
+#   warm      warming with the TTS unreachable for one phrase logs it and
+#             carries on with the rest, and no file is written while the
+#             cache lock is held
+#
+#   python bench_cache.py --replies 200 --max-items 16
+
+SAME = [
+    ("who are you", "who are you exactly"),
+    ("tell me a joke", "um tell me a joke please"),
+    ("how tall is mount everest", "how tall is mount everest exactly"),
+]
+DIFFERENT = [
+    ("set a timer for 5 minutes", "set a timer for 15 minutes"),
+    ("set a timer for 5 minutes", "set a timer for 50 minutes"),
+    ("set a timer for 5 minutes", "set a timer for 5 minutes and 30 seconds"),
+    ("what is 2 plus 2", "what is 2 plus 3"),
+    ("how far is it from paris to berlin", "how far is it from paris to dublin"),
+    ("what is the population of austin texas", "what is the population of houston texas"),
+]
+
+def check_bound(replies, max_items):
+    fetches = []
+    directory = tempfile.mkdtemp(prefix="bench_cache_")
+    try:
+        audio = PhraseCache(lambda text, lang: fetches.append(text) or text.encode(),
+                            lambda data: np.zeros(16000, dtype=np.float32), directory=directory,
+                            max_items=max_items)
+        responses = ResponseCache(audio=audio, max_items=replies)
+        peak = 0
+        for i in range(replies):
+            reply = f"Answer number {i} starts here. It goes on for a second sentence {i}."
+            for sentence in (f"Answer number {i} starts here.", f"It goes on for a second sentence {i}."):
+                audio.get(sentence)
+            responses.store(f"question {i} about topic {i * 7}", reply)
+            peak = max(peak, len(audio.memory))
+        before = len(fetches)
+        for i in range(replies):
+            audio.get(f"Answer number {i} starts here.")
+            peak = max(peak, len(audio.memory))
+        refetched = len(fetches) - before
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    print(f"bound: {replies} pinned replies, max_items {max_items}: decoded peak {peak}, "
+          f"held encoded {len(audio.held)}, TTS calls on replay {refetched}")
+    return peak <= max_items and refetched == 0
+
+def check_near():
+    ok = True
+    for pairs, should_hit in ((SAME, True), (DIFFERENT, False)):
+        for stored, asked in pairs:
+            cache = ResponseCache()
+            cache.store(stored, f"Reply to {stored}.")
+            hit = cache.lookup(asked) is not None
+            good = hit == should_hit
+            ok &= good
+            print(f"{'ok  ' if good else 'FAIL'} near: {'hit ' if hit else 'miss'} {asked!r} after {stored!r}")
+    return ok
+
+def check_warm():
+    directory = tempfile.mkdtemp(prefix="bench_cache_")
+    locked = []
+
+    def fetch(text, lang):
+        if text == "Offline.":
+            raise ConnectionError("no network")
+        return text.encode()
+
+    try:
+        cache = PhraseCache(fetch, lambda data: np.zeros(16000, dtype=np.float32), directory=directory)
+        save = cache._save
+        cache._save = lambda key, data: locked.append(cache.lock.locked()) or save(key, data)
+        try:
+            cache.warm(["Goodbye.", "Offline.", "Okay, I'm listening again."])
+            raised = None
+        except Exception as e:
+            raised = e
+        for _ in range(cache.persist_after):
+            cache.get("Said twice.")
+        saved = sorted(n for n in os.listdir(directory) if n.endswith(".mp3"))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    ok = raised is None and len(saved) == 3 and len(locked) == 3 and not any(locked)
+    print(f"{'ok  ' if ok else 'FAIL'} warm: raised {raised!r}, {len(saved)} of 3 phrases on disk, "
+          f"{sum(locked)} of {len(locked)} saves under the lock")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--replies", type=int, default=200)
+    parser.add_argument("--max-items", type=int, default=16)
+    args = parser.parse_args()
+
+    bound = check_bound(args.replies, args.max_items)
+    near = check_near()
+    warm = check_warm()
+    if not (bound and near and warm):
+        print("FAIL: " + ", ".join(name for name, ok in (("bound", bound), ("near", near), ("warm", warm)) if not ok))
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+import sys
+import argparse
+from pca9685 import PCA9685
+from servo_sim import SoftPCA9685
+from motion import easing_table
+from calibration import load_profiles
+
+# I2C traffic of one multi-channel eye move on servo_sim.SoftPCA9685, whose
+# log holds every bus transaction. The same ticks of pulses (pan and tilt
+# sweep, the lids open over the first few ticks and then hold, then --hold
+# ticks of nothing changing) are written three ways:
+#   baseline  what the driver did before: four single-byte writes per
+#             channel per tick
+#   batched   PCA9685.setPWMChannels with the shadow forgotten every tick,
+#             so only the auto-increment block writes count
+#   shadow    setPWMChannels as ServoScheduler calls it, unchanged bytes skipped
+# Fails unless batched takes at least --ratio times fewer transactions than
+# baseline, shadow sends fewer bytes than batched and none at all on a tick
+# where no pulse changed, the driver's transactions / writes_sent /
+# writes_skipped counters agree with the chip's log, and all three leave
+# the chip in the same state.
+#
+#   python bench_i2c.py --ticks 25 --hold 10
+
+def sweep(profiles, ticks, hold):
+    pan, tilt = profiles[0], profiles[1]
+    moves = {  # channel: (from, to, ticks to get there)
+        0: (pan.center, pan.center + 30, ticks),
+        1: (tilt.center, tilt.center - 10, ticks),
+        2: (100, 170, max(1, ticks // 5)),
+        15: (80, 0, max(1, ticks // 5)),
+    }
+    out = []
+    for t in range(ticks + 1 + hold):  # tick 0 is where the move starts, `ticks` where it lands
+        pulses = {}
+        for channel, (start, end, steps) in moves.items():
+            angle = start + (end - start) * easing_table("cosine", steps)[min(t, steps)]
+            pulses[channel] = (0, profiles[channel].pulse(angle))
+        out.append(pulses)
+    return out
+
+def run(mode, profiles, ticks):
+    chip = SoftPCA9685()
+    pwm = PCA9685(bus=chip, profiles=profiles)
+    pwm.setPWMFreq(50)
+    mark, counted = len(chip.log), (pwm.transactions, pwm.writes_sent, pwm.writes_skipped)
+    per_tick = []
+    for pulses in ticks:
+        before = len(chip.log)
+        if mode == "baseline":
+            for channel, (on, off) in sorted(pulses.items()):
+                for i, value in enumerate([on & 0xFF, on >> 8, off & 0xFF, off >> 8]):
+                    chip.write_byte_data(pwm.address, chip.LED0_ON_L + 4 * channel + i, value)
+        else:
+            if mode == "batched":
+                pwm.invalidateShadow()
+            pwm.setPWMChannels(pulses)
+        per_tick.append(sum(len(values) for _, _, values in chip.log[before:]))
+    log = chip.log[mark:]
+    offered = 4 * sum(len(pulses) for pulses in ticks)
+    sent = sum(len(values) for _, _, values in log)
+    counters = (pwm.transactions - counted[0], pwm.writes_sent - counted[1], pwm.writes_skipped - counted[2])
+    return {"transactions": len(log), "bytes": sent, "per_tick": per_tick, "counters": counters,
+            "expected": (len(log), sent, offered - sent), "regs": chip.regs[chip.LED0_ON_L:chip.LED0_ON_L + 64]}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ticks", type=int, default=25, help="20 ms ticks the move takes")
+    parser.add_argument("--hold", type=int, default=10, help="ticks after the move with nothing changing")
+    parser.add_argument("--ratio", type=float, default=4.0, help="required baseline/batched transaction ratio")
+    args = parser.parse_args()
+
+    profiles = load_profiles()
+    ticks = sweep(profiles, args.ticks, args.hold)
+    results = {mode: run(mode, profiles, ticks) for mode in ("baseline", "batched", "shadow")}
+    base, batched, shadow = results["baseline"], results["batched"], results["shadow"]
+    for mode, r in results.items():
+        print(f"{mode:9} {r['transactions']:5} transactions  {r['bytes']:5} bytes")
+
+    failures = []
+
+    def check(name, ok, detail):
+        print(f"{'ok  ' if ok else 'FAIL'} {name:16} {detail}")
+        if not ok:
+            failures.append(name)
+
+    ratio = base["transactions"] / max(1, batched["transactions"])
+    check("batching", ratio >= args.ratio, f"{ratio:.1f}x fewer transactions than baseline (need {args.ratio:.0f}x)")
+    held = shadow["per_tick"][args.ticks + 1:]
+    check("shadow", shadow["bytes"] < batched["bytes"] and not any(held),
+          f"{batched['bytes'] - shadow['bytes']} bytes skipped, {sum(held)} sent over {len(held)} unchanged ticks")
+    for mode in ("batched", "shadow"):
+        r = results[mode]
+        check(f"{mode} counters", r["counters"] == r["expected"],
+              f"transactions/sent/skipped {r['counters']}, chip log says {r['expected']}")
+    check("same state", base["regs"] == batched["regs"] == shadow["regs"], "LED registers after the move")
+
+    if failures:
+        print("FAIL:", ", ".join(failures))
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
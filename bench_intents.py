@@ -0,0 +1,133 @@
+import sys
+import time
+import datetime
+import argparse
+import threading
+from pca9685 import PCA9685
+from motion import ServoScheduler
+from calibration import load_profiles
+from intents import IntentRouter, build_intents
+
+# Times the local fast path from final transcript to effect: routing, the
+# handler, and for eye commands the first I2C write the servo scheduler makes.
+# The bus only records writes, so this runs without the servo board attached.
+# Before timing, ROUTES checks which intent each utterance lands on, final
+# and partial, so a command word inside a question can't end the program.
+
+UTTERANCES = [
+    "what time is it",
+    "hey what's the date",
+    "turn the volume to seventy five",
+    "speak up",
+    "look left",
+    "look to the right please",
+    "close your eyes",
+    "open your eyes",
+    "goodbye",
+    "tell me a story about a dragon",  # goes to the LLM, routing cost only
+]
+
+# (transcript, partial, expected intent or None for the LLM)
+ROUTES = [
+    ("kill", False, "exit"),
+    ("terminate", False, "exit"),
+    ("kill", True, None),
+    ("how do i kill a process", False, None),
+    ("how do i kill a process", True, None),
+    ("what does terminate mean", False, None),
+    ("shut down the computer after the update", False, None),
+    ("stop", True, "stop"),
+    ("goodbye", True, "goodbye"),
+]
+
+class RecordingBus:
+    def __init__(self):
+        self.event = threading.Event()
+        self.writes = 0
+
+    def write_byte_data(self, address, reg, value):
+        self.writes += 1
+        self.event.set()
+
+    def write_i2c_block_data(self, address, reg, values):
+        self.writes += 1
+        self.event.set()
+
+class BenchControls:
+    def __init__(self, servos, pan, tilt):
+        self.servos = servos
+        self.level = 1.0
+        self.poses = {
+            "open": {2: 170, 15: 0}, "close": {2: 100, 15: 80}, "center": {0: pan.center, 1: tilt.center},
+            "left": {0: pan.max_angle}, "right": {0: pan.min_angle},
+            "up": {1: tilt.min_angle}, "down": {1: tilt.max_angle},
+        }
+
+    def eyes(self, action):
+        return self.servos.move_many(self.poses[action], 0.05)
+
+    def look(self, direction):
+        return self.eyes(direction)
+
+    def volume(self):
+        return self.level
+
+    def set_volume(self, level):
+        self.level = level
+
+    def now(self):
+        return datetime.datetime.now()
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    bus = RecordingBus()
+    profiles = load_profiles()
+    pwm = PCA9685(bus=bus, profiles=profiles)
+    servos = ServoScheduler(pwm)
+    servos.start()
+    pan, tilt = profiles[0], profiles[1]
+    router = IntentRouter(build_intents(BenchControls(servos, pan, tilt)))
+    neutral = {0: (pan.center + pan.max_angle) / 2 + 1, 1: (tilt.center + tilt.min_angle) / 2, 2: 135, 15: 40}
+
+    failed = False
+    for text, partial, expected in ROUTES:
+        match = router.route(text, partial=partial)
+        name = match.intent.name if match else None
+        ok = name == expected
+        failed |= not ok
+        print(f"{text!r:40} {'partial' if partial else 'final':7} -> {name or 'llm':10} {'ok' if ok else 'WRONG'}")
+    for text in UTTERANCES:
+        route_ms, total_ms = [], []
+        name = None
+        for i in range(args.runs):
+            # Park every servo between poses so each eye command really moves one
+            servos.wait(servos.move_many(neutral, 0.0))
+            bus.event.clear()
+            start = time.perf_counter()
+            match = router.route(text)
+            route_ms.append((time.perf_counter() - start) * 1000)
+            if match:
+                name = match.intent.name
+                match.run()
+                if name in ("look", "close_eyes", "open_eyes"):
+                    bus.event.wait(1.0)
+            total_ms.append((time.perf_counter() - start) * 1000)
+        p95 = percentile(total_ms, 0.95)
+        ok = p95 < args.budget_ms
+        failed |= not ok
+        print(f"{text!r:40} {name or 'llm':10} route p50 {1000 * percentile(route_ms, 0.5):6.1f} us  "
+              f"total p50 {percentile(total_ms, 0.5):5.2f} ms  p95 {p95:5.2f} ms  {'ok' if ok else 'SLOW'}")
+    servos.stop()
+    print(f"I2C transactions: {pwm.transactions}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
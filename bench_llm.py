@@ -0,0 +1,83 @@
+import sys
+import time
+import argparse
+from stub_llm import StubLLM
+from llm import LLMGateway, OpenAIBackend, CannedBackend
+
+# Hedging, retry and fallback in llm.LLMGateway against stub_llm.StubLLM
+# servers, one scenario per line. Each stub answers its requests in the order
+# they arrive with a scripted time to first token ("fail" = HTTP 500), so the
+# gateway meets exactly the network the scenario describes:
+#   hedge     first request stalls, the hedge sent after --hedge answers
+#   retry     first request fails, the retry answers
+#   fallback  primary fails every request, the backup answers
+#   timeout   primary never answers within its deadline, the backup does
+#   canned    both servers fail, the canned reply still comes back
+# Fails if a reply comes from the wrong place, the counters disagree, or it
+# takes longer than the scenario allows (plus --slack).
+#
+#   python bench_llm.py --hedge 0.3
+
+class ScriptedStub(StubLLM):
+    def __init__(self, name, steps):
+        self.name = name
+        self.steps = iter(list(steps) + [steps[-1]] * 100)
+        super().__init__(reply=f"Answer from {name}.", token_delay=0.0, latency=self._latency)
+
+    def _latency(self):
+        step = next(self.steps)
+        self.fail_rate = 1.0 if step == "fail" else 0.0
+        return 0.0 if step == "fail" else step
+
+def scenario(primary, backup, hedge, deadline, canned=False):
+    stubs = [ScriptedStub("primary", primary).start(), ScriptedStub("backup", backup).start()]
+    backends = [OpenAIBackend(stub.name, "stub", api_key="bench", base_url=stub.base_url, deadline=deadline)
+                for stub in stubs]
+    if canned:
+        backends.append(CannedBackend(("Canned answer.",)))
+    gateway = LLMGateway(backends, hedge_after=hedge)
+    try:
+        gateway.warm()
+        reply = gateway.stream([{"role": "user", "content": "hi"}])
+        start = time.monotonic()
+        text = "".join(reply)
+        elapsed = time.monotonic() - start
+    finally:
+        for stub in stubs:
+            stub.stop()
+    return text, reply.source, elapsed, gateway.stats(), [stub.requests for stub in stubs]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hedge", type=float, default=0.3, help="gateway hedge_after, seconds")
+    parser.add_argument("--deadline", type=float, default=1.0, help="per-backend deadline, seconds")
+    parser.add_argument("--fast", type=float, default=0.1, help="first-token time of a healthy request")
+    parser.add_argument("--slack", type=float, default=0.25, help="allowed overhead per scenario, seconds")
+    args = parser.parse_args()
+
+    fast, stall, deadline = args.fast, 10 * args.deadline, args.deadline
+    # name: (primary steps, backup steps, canned, expected source, counters that must be set, time allowed)
+    scenarios = {
+        "hedge": ([stall, fast], [fast], False, "primary", {"hedges": 1, "fallbacks": 0}, args.hedge + fast),
+        "retry": (["fail", fast], [fast], False, "primary", {"retries": 1, "fallbacks": 0}, fast),
+        "fallback": (["fail"], [fast], False, "backup", {"fallbacks": 1, "errors": 1}, fast),
+        "timeout": ([stall], [fast], False, "backup", {"timeouts": 1, "fallbacks": 1}, deadline + fast),
+        "canned": (["fail"], ["fail"], True, "canned", {"fallbacks": 2, "errors": 2}, 0.0),
+    }
+    failures = []
+    for name, (primary, backup, canned, source, expected, allowed) in scenarios.items():
+        text, got, elapsed, stats, requests = scenario(primary, backup, args.hedge, deadline, canned)
+        wrong = {key: stats[key] for key, value in expected.items() if stats[key] != value}
+        ok = got == source and text and not wrong and elapsed <= allowed + args.slack
+        print(f"{'ok  ' if ok else 'FAIL'} {name:9} from {got or '-':8} in {1000 * elapsed:5.0f} ms "
+              f"(allowed {1000 * (allowed + args.slack):5.0f})  requests {requests}  {text!r}"
+              + (f"  counters off: {wrong}" if wrong else ""))
+        if not ok:
+            failures.append(name)
+    if failures:
+        print("FAIL:", ", ".join(failures))
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+import sys
+import time
+import random
+import argparse
+import numpy as np
+from memory import ConversationMemory, estimate_tokens
+
+# Runs ConversationMemory through a long conversation of random-length turns
+# and checks, after every turn, that the prompt messages() builds fits the
+# token budget when counted from scratch, and that the running count agrees.
+# Also times add() + messages() per turn: the last stretch of the conversation
+# must not cost more than the first, since memory does a bounded amount of
+# work per turn however long the conversation has gone on.
+#
+#   python bench_memory.py --turns 1000 --budget 1500
+
+WORDS = ("the a timer light music weather tomorrow kitchen remind me about set play turn off on what is "
+         "how long until dinner please thanks could you tell story about dragons and trains").split()
+
+def sentence(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + rng.choice(".?!")
+
+def utterance(rng, role):
+    count = rng.randint(1, 2) if role == "user" else rng.randint(1, 6)
+    return " ".join(sentence(rng, rng.randint(3, 18)) for _ in range(count))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=1000, help="user + assistant pairs")
+    parser.add_argument("--budget", type=int, default=1500)
+    parser.add_argument("--window", type=int, default=100, help="turns timed at each end")
+    parser.add_argument("--growth", type=float, default=2.0, help="allowed late/early per-turn cost ratio")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    memory = ConversationMemory("You are a helpful assistant. Keep responses concise.", budget=args.budget)
+    over, drift, costs, sent = [], [], [], []
+    for turn in range(args.turns):
+        start = time.perf_counter()
+        for role in ("user", "assistant"):
+            memory.add(role, utterance(rng, role))
+        messages = memory.messages()
+        costs.append(time.perf_counter() - start)
+        counted = sum(estimate_tokens(m["content"]) for m in messages)
+        sent.append(counted)
+        if counted > args.budget:
+            over.append((turn, counted))
+        if counted != memory.tokens:
+            drift.append((turn, counted, memory.tokens))
+
+    costs = np.array(costs) * 1e6
+    early, late = np.median(costs[:args.window]), np.median(costs[-args.window:])
+    print(f"{args.turns} turns, budget {args.budget}: prompt tokens max {max(sent)}  last {sent[-1]}  "
+          f"turns kept {len(memory.turns)}  summary lines {len(memory.summary)}")
+    print(f"over budget {len(over)} turns  running count off {len(drift)} turns")
+    for turn, counted, *tracked in (over + drift)[:5]:
+        print(f"  turn {turn}: counted {counted}" + (f", tracked {tracked[0]}" if tracked else ""))
+    print(f"per-turn cost first {args.window} {early:.1f} us  last {args.window} {late:.1f} us  ({late / early:.2f}x)")
+    if over or drift or late > args.growth * early:
+        print("FAIL: the prompt should stay within budget at a constant cost per turn")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
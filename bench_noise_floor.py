@@ -0,0 +1,99 @@
+import os
+import sys
+import glob
+import argparse
+import numpy as np
+import dsp
+from noise_floor import NoiseFloor
+from bench_vad import read_labels, synth_fixture
+
+# Latency from speech onset to capture start, with the continuously updated
+# noise floor against what every listen used to do: adjust_for_ambient_noise
+# for 0.5 s, then wait for a frame over the threshold it settled on. The
+# listen call comes `--reaction` seconds before the user starts talking, as
+# after the wake reply. Fixtures are bench_vad's .wav + .lab pairs, the first
+# label's start is the onset; without a directory they are synthesized. The
+# noise before the onset is looped for --prime seconds first, standing in for
+# the time the bot spent idle in the same room.
+#
+#   python bench_noise_floor.py
+#   python bench_noise_floor.py fixtures/vad --reaction 0.1
+
+FRAME_TIME = dsp.FRAME / dsp.RATE
+MAX_LATENCY = 0.06  # p95 onset -> capture start the noise floor has to beat
+CALIBRATION = 0.5
+
+def energy(frame):
+    return float(dsp.rms(frame)) * 32768
+
+# speech_recognition's Recognizer.adjust_for_ambient_noise followed by
+# listen() waiting for speech, with its default threshold, ratio and damping
+def calibrate_then_listen(frames, call, duration=CALIBRATION, threshold=300.0, ratio=1.5, damping=0.15):
+    damping = damping ** FRAME_TIME
+    for i in range(call, len(frames)):
+        e = energy(frames[i])
+        if i >= call + int(duration / FRAME_TIME) and e > threshold:
+            return i
+        threshold = threshold * damping + e * ratio * (1 - damping)
+    return None
+
+def noise_floor_listen(frames, call, prime):
+    noise_floor = NoiseFloor()
+    for frame in prime:
+        noise_floor.update(frame)
+    for i, frame in enumerate(frames):
+        if noise_floor.update(frame) and i >= call:
+            return i
+    return None
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("fixtures", nargs="?")
+    parser.add_argument("--count", type=int, default=40, help="fixtures to synthesize without a directory")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--reaction", type=float, default=0.2, help="seconds from the listen call to speech onset")
+    parser.add_argument("--prime", type=float, default=3.0, help="seconds of room noise heard before the fixture")
+    args = parser.parse_args()
+
+    if args.fixtures:
+        paths = sorted(glob.glob(os.path.join(args.fixtures, "*.wav")))
+        fixtures = [(dsp.read_wav(p), read_labels(os.path.splitext(p)[0] + ".lab")) for p in paths]
+    else:
+        rng = np.random.default_rng(args.seed)
+        fixtures = [synth_fixture(rng) for _ in range(args.count)]
+    if not fixtures:
+        print("No fixtures in", args.fixtures)
+        return 1
+
+    results = {"calibrate": [], "noise_floor": []}
+    missed = {name: 0 for name in results}
+    false_starts = 0
+    for samples, labels in fixtures:
+        frames = dsp.frames(samples)
+        onset = int(labels[0][0] / FRAME_TIME)
+        call = max(0, onset - int(args.reaction / FRAME_TIME))
+        lead = frames[:max(1, onset - 2)]
+        prime = np.concatenate([lead] * int(np.ceil(args.prime / FRAME_TIME / len(lead))))
+        for name, start in (("calibrate", calibrate_then_listen(frames, call)),
+                            ("noise_floor", noise_floor_listen(frames, call, prime))):
+            if start is None:
+                missed[name] += 1
+                continue
+            if start < onset:
+                false_starts += name == "noise_floor"
+                start = onset
+            results[name].append((start - onset) * FRAME_TIME)
+
+    for name, latency in results.items():
+        latency = np.array(latency) * 1000
+        print(f"{name:12} onset -> capture start mean {latency.mean():6.0f} ms  p95 {np.percentile(latency, 95):6.0f} ms  "
+              f"never started {missed[name]}/{len(fixtures)}")
+    p95 = np.percentile(results["noise_floor"], 95) if results["noise_floor"] else None
+    print(f"noise floor false starts {false_starts}/{len(fixtures)}")
+    if p95 is None or p95 > MAX_LATENCY or false_starts or missed["noise_floor"]:
+        print(f"FAIL: noise floor capture should start within {1000 * MAX_LATENCY:.0f} ms of onset with no false starts")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
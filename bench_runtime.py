@@ -0,0 +1,153 @@
+import sys
+import time
+import asyncio
+import threading
+import argparse
+from clock import WarpClock
+from runtime import Assistant, Drivers, State
+
+# Drives runtime.Assistant through scripted conversations with fake drivers on
+# a WarpClock, so the 15 s conversation timeout and wake-word retries take
+# milliseconds. Each script is a list of wake words, each followed by what the
+# user says after it (None = silence until the timeout). When the script runs
+# out the fake mic closes, so the wake-word stage returns None and the
+# assistant has to back off and stop on its own. Checks the state sequence,
+# what was spoken, interrupted replies, and that a closed mic neither
+# busy-loops nor hangs, and that cancelling run() while the wake-word stage
+# is blocked (what Ctrl-C does) returns at once. The Assistant is built outside the loop and every
+# script runs under its own asyncio.run().
+#
+#   python bench_runtime.py --speed 1000
+
+I, A, L, T, S = State.IDLE, State.AWAKE, State.LISTENING, State.THINKING, State.SPEAKING
+
+class FakeDrivers(Drivers):
+    def __init__(self, script, clock, interrupt=()):
+        self.script = list(script)
+        self.clock = clock
+        self.interrupt = set(interrupt)  # replies the user talks over
+        self.turn = None
+        self.wake_calls = 0
+        self.spoken = []
+        self.after = []
+        self.eye_actions = []
+
+    def wait_for_wakeword(self):
+        self.wake_calls += 1
+        if not self.script:
+            return None
+        self.turn = list(self.script.pop(0))
+        return "reader"
+
+    def listen(self, context):
+        self.clock.sleep(1.0)
+        return self.turn.pop(0) if self.turn else None
+
+    def think(self, transcript):
+        self.clock.sleep(0.5)
+        yield f"You said {transcript}. "
+        yield "That is all."
+
+    def speak(self, deltas):
+        text = "".join(deltas)
+        self.spoken.append(text)
+        self.clock.sleep(0.1 * len(text))
+        return text in self.interrupt
+
+    def after_reply(self, context, interrupted):
+        self.after.append(interrupted)
+
+    def eyes(self, action):
+        self.eye_actions.append(action)
+        return []
+
+# A mic that never hears the wake word; only cancel() gets it to return
+class DeafDrivers(FakeDrivers):
+    def __init__(self, clock):
+        super().__init__([], clock)
+        self.cancelled = threading.Event()
+        self.returned = threading.Event()
+
+    def wait_for_wakeword(self):
+        self.cancelled.wait()
+        self.returned.set()
+        return None
+
+    def cancel(self):
+        self.cancelled.set()
+
+def states(assistant):
+    out = []
+    for _, state in assistant.history:
+        if not out or out[-1] is not state:
+            out.append(state)
+    return out
+
+def run(script, clock, interrupt=(), **kwargs):
+    drivers = FakeDrivers(script, clock, interrupt)
+    assistant = Assistant(drivers, clock=clock, blink_chance=0.0, **kwargs)
+    start = time.monotonic()
+    asyncio.run(asyncio.wait_for(assistant.run(), 10))
+    return drivers, assistant, time.monotonic() - start
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--speed", type=float, default=1000.0, help="WarpClock speed")
+    args = parser.parse_args()
+
+    clock = WarpClock(args.speed)
+    failures = []
+
+    def check(name, ok, detail=""):
+        print(f"{'ok  ' if ok else 'FAIL'} {name} {detail}")
+        if not ok:
+            failures.append(name)
+
+    # One question, then silence until the conversation times out
+    drivers, assistant, _ = run([["what time is it", None]], clock)
+    check("turn", states(assistant) == [I, A, L, T, S, L, I], [s.value for s in states(assistant)])
+    check("turn reply", drivers.spoken == ["You said what time is it. That is all."], drivers.spoken)
+    check("turn after_reply", drivers.after == [False], drivers.after)
+    check("eyes", drivers.eye_actions[:4] == ["center", "close", "open", "double_blink"], drivers.eye_actions[:4])
+
+    # Stop word: goodbye phrases, straight back to idle
+    drivers, assistant, _ = run([["okay goodbye"]], clock, stop_words=("goodbye",))
+    check("goodbye", states(assistant) == [I, A, L, S, I], [s.value for s in states(assistant)])
+    check("goodbye phrases", drivers.spoken == list(assistant.goodbye_phrases), drivers.spoken)
+
+    # Talked over: after_reply hears about it and the bot listens again
+    reply = "You said tell me a story. That is all."
+    drivers, assistant, _ = run([["tell me a story", "stop"]], clock, interrupt=[reply])
+    check("interrupted", drivers.after[:1] == [True], drivers.after)
+    check("interrupted listens", states(assistant)[:7] == [I, A, L, T, S, L, T], [s.value for s in states(assistant)])
+
+    # Two conversations: the second wake word starts over from idle
+    drivers, assistant, _ = run([["one"], ["two"]], clock)
+    check("two sessions", states(assistant).count(A) == 2 and len(drivers.spoken) == 2, drivers.spoken)
+
+    # Closed mic from the start: a handful of retries with backoff, then stop
+    drivers, assistant, elapsed = run([], clock, wake_retry=1.0, max_wake_failures=4)
+    backoff = (1 + 2 + 4) / args.speed
+    check("closed mic stops", drivers.wake_calls == 4, f"{drivers.wake_calls} wake calls")
+    check("closed mic backs off", elapsed >= backoff, f"{1000 * elapsed:.1f} ms >= {1000 * backoff:.1f} ms")
+
+    # Cancelled while idle: the blocked wake-word stage has to let the
+    # executor shut down
+    drivers = DeafDrivers(clock)
+    assistant = Assistant(drivers, clock=clock, blink_chance=0.0)
+    start = time.monotonic()
+    try:
+        asyncio.run(asyncio.wait_for(assistant.run(), 0.1))
+    except asyncio.TimeoutError:
+        pass
+    elapsed = time.monotonic() - start
+    check("cancelled idle", drivers.returned.is_set() and elapsed < 1.0,
+          f"wake stage returned {drivers.returned.is_set()}, run() gone after {1000 * elapsed:.0f} ms")
+
+    if failures:
+        print("FAIL:", ", ".join(failures))
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,686 @@
+import io
+import os
+import sys
+import glob
+import json
+import math
+import time
+import wave
+import random
+import shutil
+import datetime
+import asyncio
+import argparse
+import platform
+import resource
+import tempfile
+import threading
+import subprocess
+from collections import deque
+import numpy as np
+import dsp
+from clock import SYSTEM_CLOCK
+from mic_stream import RingBuffer, MicReader
+from noise_floor import NoiseFloor
+from stt import Hypothesis, STTBackend, STTSession, listen
+from tts import SpeechPipeline
+from phrase_cache import PhraseCache
+from memory import ConversationMemory
+from llm import LLMGateway, OpenAIBackend, CannedBackend
+from response_cache import ResponseCache
+from speculation import Speculator, POLICIES
+from intents import IntentRouter, build_intents
+from runtime import Assistant, Drivers, State
+from pca9685 import PCA9685
+from servo_sim import SoftPCA9685
+from motion import ServoScheduler
+from calibration import load_profiles
+from clips import ClipLibrary, ClipPlayer
+from animation import SpeechAnimator
+from audio_out import AudioEngine, NullSink
+from wakeword import WakeWordDetector, load_wakeword
+from stub_llm import StubLLM
+from tracing import tracer
+
+# Replays a recorded session through the same pipeline finalWorking runs
+# (mic ring -> wake word -> stt.listen -> intents / memory + LLM gateway +
+# response cache -> sentence pipeline + phrase cache -> speech animation and
+# servo scheduler), with the cloud replaced by stubs and the servo board by
+# servo_sim.SoftPCA9685:
+#   LLM  stub_llm.StubLLM over HTTP, so the gateway's pooled client is in the path
+#   STT  scripted backend that returns each utterance's transcript
+#   TTS  fetch function that returns a tone as long as the sentence would take
+#   out  audio_out.AudioEngine playing into a NullSink
+# Every stub waits for a delay drawn from its own seeded distribution, so two
+# runs of the same session see the same network. Results go to a JSON file
+# that `compare` diffs against another run, e.g. the parent commit's.
+#
+#   python bench_session.py synth sessions/basic "hey hey" "what time is it" "tell me a joke"
+#   python bench_session.py run sessions/basic --llm lognormal:0.8,0.4
+#   python bench_session.py compare bench_results/old.json bench_results/new.json
+#
+# A session is a directory of utterances in the bench_stt fixture layout:
+# 01.wav + 01.txt, 02.wav + 02.txt, ... (16 kHz mono). The first one should be
+# the wake word. Each utterance is cued when the bot starts listening, so a
+# slower build still hears every turn.
+
+# --------- CONFIG ---------
+WAKE_WORD = "hey hey"
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_results")
+STUB_REPLY = "Sure, here is what I found. This reply comes from the stub model."
+SPEECH_RATE = 15.0  # characters per second of stub TTS audio
+STAGES = ("capture", "endpointing", "stt", "speculation", "llm_first_token", "llm", "tts", "decode", "first_audio")
+
+# --------- LATENCY DISTRIBUTIONS ---------
+# "0.3" or "const:0.3", "uniform:0.2,0.6", "normal:mean,sd",
+# "lognormal:median,sigma" -> function returning seconds
+def latency(spec, rng):
+    kind, _, args = spec.partition(":")
+    if not args:
+        kind, args = "const", kind
+    values = [float(v) for v in args.split(",")]
+    if kind == "const":
+        return lambda: values[0]
+    if kind == "uniform":
+        return lambda: rng.uniform(values[0], values[1])
+    if kind == "normal":
+        return lambda: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == "lognormal":
+        return lambda: rng.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"Unknown latency distribution {spec!r}")
+
+# --------- SESSIONS ---------
+def load_session(directory):
+    utterances = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.wav"))):
+        with open(os.path.splitext(path)[0] + ".txt") as f:
+            utterances.append((dsp.read_wav(path), f.read().strip().lower()))
+    if not utterances:
+        raise RuntimeError(f"No utterances in {directory}")
+    return utterances
+
+# Background to play between utterances: the quietest tenth of the recorded
+# frames, so the noise floor settles where it would in that room
+def room_tone(utterances):
+    frames = [f for samples, _ in utterances for f in pcm_frames(samples)]
+    energy = np.array([float(dsp.rms(f)) for f in frames])
+    quiet = np.argsort(energy)[:max(1, len(frames) // 10)]
+    return [frames[i] for i in sorted(quiet)]
+
+# int16 samples -> list of 20 ms frames as bytes, the last one zero-padded
+def pcm_frames(samples):
+    samples = np.pad(samples, (0, -len(samples) % dsp.FRAME))
+    return [samples[i:i + dsp.FRAME].tobytes() for i in range(0, len(samples), dsp.FRAME)]
+
+# Speech-like stand-in for recordings: one voiced burst per word over faint
+# noise. Enough for endpointing and animation, since the STT is scripted.
+def synth_utterance(text, rng, level=0.2):
+    parts = [np.zeros(int(0.3 * dsp.RATE))]
+    for word in text.split():
+        n = int((0.15 + 0.05 * len(word)) * dsp.RATE)
+        t = np.arange(n) / dsp.RATE
+        pitch = rng.uniform(110, 160)
+        voiced = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in (1, 2, 3))
+        parts.append(level * voiced * np.hanning(n) / 1.8)
+        parts.append(np.zeros(int(0.08 * dsp.RATE)))
+    parts.append(np.zeros(int(0.3 * dsp.RATE)))
+    samples = np.concatenate(parts)
+    samples += rng.normal(0, 0.001, len(samples))
+    return (np.clip(samples, -1, 1) * 32767).astype(np.int16)
+
+def synth_session(directory, texts, seed=0):
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    for i, text in enumerate(texts, 1):
+        base = os.path.join(directory, f"{i:02d}")
+        dsp.write_wav(base + ".wav", synth_utterance(text, rng))
+        with open(base + ".txt", "w") as f:
+            f.write(text + "\n")
+
+# --------- REPLAYED MIC ---------
+# Stands in for mic_stream.MicStream: writes 20 ms frames into the same ring
+# at the real frame rate, room tone until cue() releases the next utterance.
+class ReplayMic:
+    def __init__(self, utterances, room, gap=0.5, seconds=10, clock=SYSTEM_CLOCK):
+        self.ring = RingBuffer(seconds)
+        self.utterances = deque(samples for samples, _ in utterances)
+        self.room = room
+        self.gap = [room[i % len(room)] for i in range(int(gap * dsp.RATE / dsp.FRAME))]
+        self.clock = clock
+        self.pending = deque()
+        self.lock = threading.Lock()
+        self.readers = []
+        self.running = False
+        self.thread = None
+        self.overflows = 0
+
+    @property
+    def done(self):
+        with self.lock:
+            return not self.utterances and not self.pending
+
+    def cue(self):
+        with self.lock:
+            if self.pending or not self.utterances:
+                return False
+            self.pending.extend(self.gap)
+            self.pending.extend(pcm_frames(self.utterances.popleft()))
+            return True
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._play, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join()
+        for reader in self.readers:
+            reader.close()
+
+    def reader(self, preroll=0.0):
+        reader = MicReader(self.ring, preroll)
+        self.readers.append(reader)
+        if not self.running:
+            reader.close()
+        return reader
+
+    def _play(self):
+        frame_time = dsp.FRAME / dsp.RATE
+        due = self.clock.monotonic()
+        n = 0
+        while self.running:
+            with self.lock:
+                frame = self.pending.popleft() if self.pending else None
+            if frame is None:
+                frame = self.room[n % len(self.room)]
+                n += 1
+            self.ring.write(frame)
+            due += frame_time
+            self.clock.sleep(due - self.clock.monotonic())
+
+# --------- STUB BACKENDS ---------
+# Final transcripts in session order; the wake word confirmation takes one too.
+# A session takes its utterance's transcript the first time it is fed or
+# finished, so an utterance the intent router acts on from a partial, and
+# never finish()es, still uses up its own. Streams partials like vosk does:
+# the transcript a word at a time, `words_per_second` once the session
+# starts (0 for none, like google).
+class ScriptedSession(STTSession):
+    def __init__(self, backend):
+        self.backend = backend
+        self.text = None
+        self.frames = 0
+        self.shown = 0
+
+    def claim(self):
+        if self.text is None:
+            with self.backend.lock:
+                self.text = self.backend.transcripts.popleft() if self.backend.transcripts else ""
+        return self.text
+
+    def feed(self, frame):
+        words = self.claim().split()
+        if not self.backend.words_per_second:
+            return None
+        self.frames += 1
+        shown = min(len(words), int(self.frames * dsp.FRAME / dsp.RATE * self.backend.words_per_second))
+        if shown == self.shown:
+            return None
+        self.shown = shown
+        return Hypothesis(" ".join(words[:shown]))
+
+    def finish(self):
+        time.sleep(self.backend.latency())
+        return self.claim()
+
+class ScriptedSTT(STTBackend):
+    name = "scripted"
+
+    def __init__(self, transcripts, latency, words_per_second=3.0):
+        self.transcripts = deque(transcripts)
+        self.latency = latency
+        self.words_per_second = words_per_second
+        self.lock = threading.Lock()
+
+    def session(self):
+        return ScriptedSession(self)
+
+# WAV bytes of a soft syllable-rate tone, as long as the sentence takes to say
+def stub_speech(text):
+    n = int(max(0.3, len(text) / SPEECH_RATE) * dsp.RATE)
+    t = np.arange(n) / dsp.RATE
+    samples = 0.3 * np.sin(2 * np.pi * 140 * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * t))
+    data = io.BytesIO()
+    with wave.open(data, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(dsp.RATE)
+        wf.writeframes((samples * 32767).astype(np.int16).tobytes())
+    return data.getvalue()
+
+def decode_wav(data):
+    with wave.open(io.BytesIO(data), "rb") as wf:
+        samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+    samples = dsp.to_mono(samples, dsp.RATE)
+    return samples, samples  # the engine runs at dsp.RATE here
+
+# Energy-only wake stage for sessions not recorded by the enrolled speaker:
+# fires once a voiced stretch is followed by a short pause. The scripted STT
+# then confirms it, as wakeword_heard does.
+class EnergyWake(WakeWordDetector):
+    def __init__(self, noise_floor, min_voiced=10, pause=15):
+        self.noise_floor = noise_floor
+        self.min_voiced = min_voiced
+        self.pause = pause
+        self.reset()
+
+    def reset(self):
+        self.voiced = 0
+        self.silence = 0
+
+    def process(self, frame):
+        if self.noise_floor.is_speech(float(dsp.rms(frame)) * 32768):
+            self.voiced += 1
+            self.silence = 0
+            return False
+        self.silence += 1
+        if self.voiced >= self.min_voiced and self.silence >= self.pause:
+            self.reset()
+            return True
+        return False
+
+# --------- BENCH RIG ---------
+class BenchControls:
+    def __init__(self, rig):
+        self.rig = rig
+
+    def eyes(self, action):
+        return self.rig.move_eyes(action)
+
+    def look(self, direction):
+        return self.rig.move_eyes(direction)
+
+    def volume(self):
+        return self.rig.audio.volume
+
+    def set_volume(self, level):
+        self.rig.audio.volume = level
+
+    def now(self):
+        return datetime.datetime(2024, 1, 1, 12, 0)  # fixed, so replies don't vary between runs
+
+class BenchRig(Drivers):
+    def __init__(self, utterances, args):
+        rng = random.Random(args.seed)
+        random.seed(args.seed)
+        self.args = args
+        self.turns = {}
+        # Servos on the simulated board
+        self.profiles = load_profiles()
+        self.chip = SoftPCA9685()
+        self.pwm = PCA9685(bus=self.chip, profiles=self.profiles)
+        self.pwm.setPWMFreq(50)
+        self.servos = ServoScheduler(self.pwm)
+        self.clips = ClipLibrary(self.profiles)
+        self.clip_player = ClipPlayer(self.servos)
+        pan, tilt = self.profiles[0], self.profiles[1]
+        self.pan, self.tilt = pan, tilt
+        self.poses = {
+            "open": ({2: 170, 15: 0}, 0.05),
+            "close": ({2: 100, 15: 80}, 0.05),
+            "center": ({0: pan.center, 1: tilt.center}, 0.4),
+            "left": ({0: pan.max_angle, 1: tilt.center}, 0.3),
+            "right": ({0: pan.min_angle, 1: tilt.center}, 0.3),
+            "up": ({0: pan.center, 1: tilt.min_angle}, 0.3),
+            "down": ({0: pan.center, 1: tilt.max_angle}, 0.3),
+        }
+        self.animator = SpeechAnimator(self.servos, lids={2: (170, 100), 15: (0, 80)},
+                                       gaze={0: (pan.center, 8), 1: (tilt.center, 2)}, seed=args.seed)
+        # Audio in
+        self.mic = ReplayMic(utterances, room_tone(utterances), gap=args.gap)
+        self.noise_floor = NoiseFloor()
+        self.stt = ScriptedSTT([text for _, text in utterances], latency(args.stt, random.Random(rng.random())),
+                               args.partials)
+        self.wakeword = load_wakeword() if args.templates else EnergyWake(self.noise_floor)
+        # Chat
+        self.stub = StubLLM(STUB_REPLY, token_delay=args.token_delay,
+                            latency=latency(args.llm, random.Random(rng.random())))
+        self.llm = LLMGateway([OpenAIBackend("stub", "stub", api_key="bench", base_url=self.stub.base_url),
+                               CannedBackend(("Sorry, I couldn't process that.",))])
+        self.memory = ConversationMemory("You are a helpful assistant.")
+        self.speculator = Speculator(self.speculate, args.speculation)
+        # Audio out
+        self.audio = AudioEngine(NullSink(dsp.RATE), rate=dsp.RATE, block=dsp.RATE // 100)
+        self.cache_dir = tempfile.mkdtemp(prefix="bench_phrases_")
+        tts_latency = latency(args.tts, random.Random(rng.random()))
+
+        def fetch(text, lang):
+            time.sleep(tts_latency())
+            return stub_speech(text)
+
+        self.phrase_cache = PhraseCache(fetch, decode_wav, voice="stub", directory=self.cache_dir)
+        self.response_cache = ResponseCache(audio=self.phrase_cache)
+        self.speech = SpeechPipeline(self.phrase_cache.get, self.play)
+        self.router = IntentRouter(build_intents(BenchControls(self)))
+
+    def start(self):
+        self.servos.start()
+        self.audio.start()
+        self.stub.start()
+        self.mic.start()
+        self.noise_floor.start(self.mic)
+        for name in self.clips.names():
+            self.clips[name]
+        self.phrase_cache.warm(["Goodbye.", "Okay, I'm listening again."])
+        self.llm.warm()
+
+    def stop(self):
+        self.mic.stop()
+        self.noise_floor.stop()
+        self.servos.stop()
+        self.audio.stop()
+        self.stub.stop()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def move_eyes(self, action):
+        if action in self.clips:
+            return [self.clip_player.play(self.clips[action])]
+        if action == "saccade":
+            return self.servos.move_many({
+                0: random.randint(self.pan.min_angle, self.pan.max_angle),
+                1: random.randint(self.tilt.min_angle, self.tilt.max_angle),
+            }, 0.5)
+        angles, move_time = self.poses[action]
+        return self.servos.move_many(angles, move_time)
+
+    def play(self, sentence):
+        samples, reference = sentence
+        voice = self.audio.play(samples, tag="speech", duck=True)
+        voice.started.wait(0.5)
+        self.animator.start(reference, voice.start_time)
+        tracer.since_origin("first_audio")
+        try:
+            voice.wait()
+            return not voice.stopped
+        finally:
+            self.animator.stop()
+
+    # --------- DRIVERS ---------
+    def wait_for_wakeword(self):
+        reader = self.mic.reader()
+        self.wakeword.reset()
+        self.mic.cue()
+        while True:
+            frame = reader.read()
+            if frame is None:
+                return None
+            if self.wakeword.process(frame):
+                with tracer.span("wake_confirm"):
+                    heard = self.stt.transcribe([reader.last(2 * dsp.RATE // dsp.FRAME)])
+                if WAKE_WORD in heard:
+                    return reader
+
+    def speculate(self, text):
+        if self.router.route(text) or self.response_cache.peek(text):
+            return None
+        return self.llm.prefetch(self.memory.messages() + [{"role": "user", "content": text}])
+
+    def listen(self, reader):
+        self.mic.cue()
+        transcript = listen(reader, self.stt, self.noise_floor, timeout=self.args.listen_timeout,
+                            router=self.router, on_partial=self.speculator.partial)
+        if not transcript or self.router.route(transcript):
+            self.speculator.cancel()
+        if transcript:
+            self.turns[tracer.turn] = {"transcript": transcript, "route": "intent"}
+        return transcript
+
+    def think(self, transcript):
+        turn = self.turns[tracer.turn]
+        self.memory.add("user", transcript)
+        cached = self.response_cache.lookup(transcript)
+        if cached:
+            self.speculator.cancel()
+            turn["route"] = "cache"
+            self.memory.add("assistant", cached)
+            yield cached
+            return
+        start = time.monotonic()
+        reply = self.speculator.claim(transcript)
+        turn["speculated"] = reply is not None
+        reply = reply or self.llm.stream(self.memory.messages())
+        response = ""
+        for delta in reply:
+            response += delta
+            yield delta
+        turn["route"] = reply.source
+        if response.strip() and reply.source != "canned":
+            self.memory.add("assistant", response.strip())
+            self.response_cache.store(transcript, response.strip(), time.monotonic() - start)
+
+    def speak(self, deltas):
+        self.speech.speak(deltas)
+        return False
+
+    def after_reply(self, reader, interrupted):
+        reader.skip_to_now()
+
+    def eyes(self, action):
+        return self.move_eyes(action)
+
+# --------- MEASUREMENTS ---------
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        return None
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10  # bytes vs KiB
+
+def git_commit():
+    here = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True, cwd=here).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               capture_output=True, text=True, cwd=here).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def turn_report(rig):
+    stages = {}
+    for name, turn, start, end, thread in list(tracer.spans):
+        if turn in rig.turns and name in STAGES:
+            stages.setdefault(turn, {}).setdefault(name, 0.0)
+            stages[turn][name] += 1000 * (end - start)
+    turns = []
+    for turn, info in sorted(rig.turns.items()):
+        timings = {name: round(ms, 2) for name, ms in stages.get(turn, {}).items()}
+        turns.append({"turn": turn, **info, "response_ms": timings.get("first_audio"), "stages": timings})
+    return turns
+
+def percentiles(values):
+    values = [v for v in values if v is not None]
+    if not values:
+        return None
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"count": len(values), "p50": round(float(p50), 2), "p95": round(float(p95), 2),
+            "p99": round(float(p99), 2), "max": round(max(values), 2)}
+
+async def run_session(rig, idle_seconds):
+    assistant = Assistant(rig, conversation_timeout=rig.args.conversation_timeout, stop_words=(),
+                          router=rig.router)
+    task = asyncio.ensure_future(assistant.run())
+    wall0, cpu0 = time.monotonic(), time.process_time()
+    while not (rig.mic.done and assistant.state is State.IDLE and not rig.stt.transcripts):
+        if time.monotonic() - wall0 > rig.args.deadline:
+            assistant.stop()
+            rig.mic.stop()
+            await task
+            raise TimeoutError(f"session still running after {rig.args.deadline:.0f} s, "
+                               f"{len(rig.stt.transcripts)} transcripts left, state {assistant.state.value}")
+        await asyncio.sleep(0.1)
+    # Session over and the bot is back to waiting for the wake word
+    session = {"wall_s": time.monotonic() - wall0, "cpu_s": time.process_time() - cpu0,
+               "i2c_transactions": rig.pwm.transactions}
+    wall1, cpu1, i2c1 = time.monotonic(), time.process_time(), rig.pwm.transactions
+    await asyncio.sleep(idle_seconds)
+    idle_wall = time.monotonic() - wall1
+    idle = {"seconds": round(idle_wall, 2), "cpu_percent": round(100 * (time.process_time() - cpu1) / idle_wall, 2),
+            "i2c_per_second": round((rig.pwm.transactions - i2c1) / idle_wall, 2)}
+    assistant.stop()
+    rig.mic.stop()
+    await task
+    return session, idle
+
+def run(args):
+    utterances = load_session(args.session)
+    rig = BenchRig(utterances, args)
+    rig.start()
+    try:
+        session, idle = asyncio.run(run_session(rig, args.idle))
+    except TimeoutError as e:
+        print("FAIL:", e)
+        return 1
+    finally:
+        rig.stop()
+    turns = turn_report(rig)
+    rss = rss_mb()
+    results = {
+        "commit": git_commit(),
+        "session": os.path.basename(os.path.normpath(args.session)),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "config": {"seed": args.seed, "stt": args.stt, "llm": args.llm, "tts": args.tts,
+                   "token_delay": args.token_delay, "partials": args.partials, "speculation": args.speculation,
+                   "wakeword": "templates" if args.templates else "energy"},
+        "turns": turns,
+        "response_ms": percentiles([t["response_ms"] for t in turns]),
+        "stages_ms": {name: percentiles([t["stages"].get(name) for t in turns]) for name in STAGES},
+        "cpu": {"session_percent": round(100 * session["cpu_s"] / session["wall_s"], 2),
+                "idle_percent": idle["cpu_percent"]},
+        "memory_mb": {"rss": round(rss, 1) if rss else None, "peak_rss": round(max(peak_rss_mb(), rss or 0), 1)},
+        "i2c": {
+            "transactions": rig.pwm.transactions,
+            "session_transactions": session["i2c_transactions"],
+            "per_turn": round(session["i2c_transactions"] / max(1, len(turns)), 1),
+            "idle_per_second": idle["i2c_per_second"],
+            "bytes_sent": rig.pwm.writes_sent,
+            "bytes_skipped": rig.pwm.writes_skipped,
+            "ignored_by_chip": rig.chip.ignored,
+        },
+        "llm": {k: v for k, v in rig.llm.stats().items() if not isinstance(v, dict)},
+        "response_cache": rig.response_cache.stats,
+        "speculation": {"policy": args.speculation, **rig.speculator.summary()},
+        "mic": {"dropped_frames": sum(r.dropped for r in rig.mic.readers)},
+        "audio": rig.audio.summary(),
+        "duration_s": round(session["wall_s"], 2),
+    }
+    out = args.out or os.path.join(RESULTS_DIR, f"{results['session']}-{results['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(results, f, indent=2)
+    print_results(results)
+    print("Results written to", out)
+    return 0
+
+def print_results(results):
+    print(f"{results['session']} @ {results['commit']}: {len(results['turns'])} turns in {results['duration_s']} s")
+    for turn in results["turns"]:
+        response = f"{turn['response_ms']:8.1f} ms" if turn["response_ms"] is not None else "    silent"
+        print(f"  {turn['transcript']!r:36} {turn['route'] or '-':7} response {response}")
+    if results["response_ms"]:
+        r = results["response_ms"]
+        print(f"response p50 {r['p50']:.1f} ms  p95 {r['p95']:.1f} ms")
+    spec = results["speculation"]
+    print(f"speculation {spec['policy']}: kept {spec['kept']}/{spec['started']}  wasted {spec['wasted_tokens']} tokens  "
+          f"saved {spec['saved_tokens']} tokens  mean gain {1000 * spec['mean_gain']:.0f} ms")
+    print(f"idle CPU {results['cpu']['idle_percent']:.1f}%  RSS {results['memory_mb']['rss']} MB  "
+          f"I2C {results['i2c']['transactions']} transactions ({results['i2c']['idle_per_second']}/s idle)  "
+          f"audio underruns {results['audio']['underruns']}")
+
+# --------- COMPARE ---------
+# Lower is better for every metric compared; anything more than `tolerance`
+# worse (and by more than the noise floor of the measurement) is a regression
+def metrics(results):
+    values = {}
+    if results["response_ms"]:
+        values["response p50 ms"] = results["response_ms"]["p50"]
+        values["response p95 ms"] = results["response_ms"]["p95"]
+    for name, stage in results["stages_ms"].items():
+        if stage:
+            values[f"{name} p50 ms"] = stage["p50"]
+    if "speculation" in results:
+        values["wasted tokens"] = results["speculation"]["wasted_tokens"]
+    values["idle cpu %"] = results["cpu"]["idle_percent"]
+    values["peak rss MB"] = results["memory_mb"]["peak_rss"]
+    values["i2c per turn"] = results["i2c"]["per_turn"]
+    values["i2c idle /s"] = results["i2c"]["idle_per_second"]
+    if "audio" in results:
+        values["audio underruns"] = results["audio"]["underruns"]
+    return values
+
+NOISE = {"ms": 5.0, "%": 0.5, "MB": 2.0}
+
+def compare(old_path, new_path, tolerance):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{old['commit']} -> {new['commit']} ({new['session']})")
+    old_values, new_values = metrics(old), metrics(new)
+    regressions = 0
+    for name in [n for n in new_values if n in old_values]:
+        a, b = old_values[name], new_values[name]
+        noise = next((n for unit, n in NOISE.items() if name.endswith(unit)), 0.5)
+        worse = b - a > max(noise, tolerance * abs(a))
+        regressions += worse
+        change = f"{100 * (b - a) / a:+6.1f}%" if a else "    n/a"
+        print(f"  {name:24} {a:10.2f} -> {b:10.2f}  {change}{'  REGRESSION' if worse else ''}")
+    return 1 if regressions else 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded sessions against stub backends")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="replay a session and write results as JSON")
+    run_parser.add_argument("session")
+    run_parser.add_argument("--out", help="default: bench_results/<session>-<commit>.json")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--stt", default="lognormal:0.45,0.3", help="stub STT latency distribution")
+    run_parser.add_argument("--llm", default="lognormal:0.6,0.4", help="stub LLM time to first token")
+    run_parser.add_argument("--tts", default="lognormal:0.35,0.3", help="stub TTS latency per sentence")
+    run_parser.add_argument("--token-delay", type=float, default=0.02, help="seconds between LLM tokens")
+    run_parser.add_argument("--gap", type=float, default=0.5, help="room tone before each utterance, seconds")
+    run_parser.add_argument("--deadline", type=float, default=300.0,
+                            help="wall-clock seconds the session may take before the run fails")
+    run_parser.add_argument("--idle", type=float, default=5.0, help="seconds of idle to measure at the end")
+    run_parser.add_argument("--listen-timeout", type=float, default=3.0)
+    run_parser.add_argument("--conversation-timeout", type=float, default=4.0)
+    run_parser.add_argument("--partials", type=float, default=3.0, help="stub STT partial words per second, 0 for none")
+    run_parser.add_argument("--speculation", default="balanced", choices=list(POLICIES))
+    run_parser.add_argument("--templates", action="store_true", help="use the enrolled wake word templates")
+    synth_parser = commands.add_parser("synth", help="write a synthetic session")
+    synth_parser.add_argument("session")
+    synth_parser.add_argument("texts", nargs="+")
+    synth_parser.add_argument("--seed", type=int, default=0)
+    compare_parser = commands.add_parser("compare", help="diff two result files")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--tolerance", type=float, default=0.1, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    if args.command == "synth":
+        synth_session(args.session, args.texts, args.seed)
+        return 0
+    if args.command == "compare":
+        return compare(args.old, args.new, args.tolerance)
+    return run(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
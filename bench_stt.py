@@ -0,0 +1,50 @@
+import os
+import sys
+import glob
+import time
+import argparse
+import dsp
+from stt import make_stt, BACKENDS
+
+# Runs every backend over WAV fixtures with matching .txt transcripts and
+# reports word error rate and real-time factor (processing time / audio time).
+
+def word_errors(reference, hypothesis):
+    ref, hyp = reference.split(), hypothesis.split()
+    row = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        prev, row[0] = row[0], i
+        for j, h in enumerate(hyp, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (r != h))
+    return row[-1], len(ref)
+
+def normalize(text):
+    return " ".join("".join(c for c in text.lower() if c.isalnum() or c.isspace()).split())
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("fixtures")
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.fixtures, "*.wav")))
+    for name in args.backends.split(","):
+        backend = make_stt(name)
+        errors = words = 0
+        audio_seconds = cpu_seconds = 0.0
+        for path in paths:
+            with open(os.path.splitext(path)[0] + ".txt") as f:
+                reference = normalize(f.read())
+            samples = dsp.read_wav(path)
+            frames = [samples[i:i + dsp.FRAME].tobytes() for i in range(0, len(samples), dsp.FRAME)]
+            start = time.perf_counter()
+            text = normalize(backend.transcribe(frames))
+            cpu_seconds += time.perf_counter() - start
+            audio_seconds += len(samples) / dsp.RATE
+            e, n = word_errors(reference, text)
+            errors += e
+            words += n
+        print(f"{name}: WER {100 * errors / max(1, words):.1f}%  RTF {cpu_seconds / max(audio_seconds, 1e-9):.2f}")
+
+if __name__ == "__main__":
+    sys.exit(main())
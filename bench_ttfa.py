@@ -0,0 +1,109 @@
+import sys
+import time
+import argparse
+import numpy as np
+from stub_llm import StubLLM
+from llm import LLMGateway, OpenAIBackend
+from tts import SpeechPipeline
+
+# Time to first audio against reply length. The LLM is stub_llm.StubLLM
+# behind the gateway, TTS a stand-in that takes a fixed time per request
+# plus a little per character, playback a sleep as long as the sentence.
+#   stream  the real path: deltas -> split_sentences -> SpeechPipeline
+#   whole   what speak() used to do: wait for the full reply, synthesize it
+#           in one go, then play
+# Fails unless streaming TTFA stays within --spread of itself from the
+# shortest reply to the longest, and a reply interrupted on its first
+# sentence has its deltas closed by the time speak() returns, with nothing
+# read from the LLM after that.
+#
+#   python bench_ttfa.py --sentences 1,4,16
+
+SENTENCE = "This is sentence number {} of the reply."
+
+def fake_tts(per_request, per_char):
+    def synthesize(text):
+        time.sleep(per_request + per_char * len(text))
+        return text
+    return synthesize
+
+def stream(gateway, synthesize, play_time):
+    start = time.monotonic()
+    first = []
+
+    def play(text):
+        if not first:
+            first.append(time.monotonic())
+        time.sleep(play_time)
+        return True
+
+    SpeechPipeline(synthesize, play).speak(gateway.stream([{"role": "user", "content": "hi"}]))
+    return first[0] - start
+
+def interrupted(gateway, synthesize, settle):
+    pulled, closed = [], []
+
+    def deltas():
+        try:
+            for delta in gateway.stream([{"role": "user", "content": "hi"}]):
+                pulled.append(delta)
+                yield delta
+        finally:
+            closed.append(len(pulled))
+
+    SpeechPipeline(synthesize, lambda text: False).speak(deltas())
+    at_return = (bool(closed), len(pulled))
+    time.sleep(settle)  # the rest of the reply would have streamed in by now
+    return at_return, len(pulled)
+
+def whole(gateway, synthesize):
+    start = time.monotonic()
+    synthesize(gateway.complete([{"role": "user", "content": "hi"}]))
+    return time.monotonic() - start
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sentences", default="1,4,16", help="reply lengths to try")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--delay", type=float, default=0.3, help="LLM seconds to first token")
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    parser.add_argument("--tts", type=float, default=0.15, help="TTS seconds per request")
+    parser.add_argument("--tts-char", type=float, default=0.003, help="TTS seconds per character")
+    parser.add_argument("--spread", type=float, default=0.05, help="allowed TTFA difference, seconds")
+    args = parser.parse_args()
+
+    synthesize = fake_tts(args.tts, args.tts_char)
+    results = {}
+    lengths = [int(v) for v in args.sentences.split(",")]
+    cut = None
+    for n in lengths:
+        stub = StubLLM(" ".join(SENTENCE.format(i + 1) for i in range(n)), delay=args.delay,
+                       token_delay=args.token_delay).start()
+        gateway = LLMGateway([OpenAIBackend("stub", "stub", api_key="bench", base_url=stub.base_url)])
+        try:
+            gateway.warm()
+            streamed = [stream(gateway, synthesize, 0.05) for _ in range(args.runs)]
+            waited = [whole(gateway, synthesize) for _ in range(args.runs)]
+            if n == max(lengths):
+                cut = interrupted(gateway, synthesize, args.delay + n * len(SENTENCE.split()) * args.token_delay + 0.5)
+        finally:
+            stub.stop()
+        results[n] = float(np.median(streamed))
+        print(f"{n:3} sentences  stream TTFA {1000 * results[n]:6.0f} ms  whole TTFA {1000 * np.median(waited):6.0f} ms")
+
+    spread = max(results.values()) - min(results.values())
+    print(f"stream TTFA spread {1000 * spread:.0f} ms")
+    (closed, at_return), later = cut
+    print(f"interrupted   deltas {'closed' if closed else 'still open'} when speak returned, "
+          f"{at_return} read by then, {later - at_return} after")
+    failed = False
+    if spread > args.spread:
+        print(f"FAIL: time to first audio grows with reply length (more than {1000 * args.spread:.0f} ms)")
+        failed = True
+    if not closed or later > at_return:
+        print("FAIL: an interrupted reply kept streaming after speak() returned")
+        failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
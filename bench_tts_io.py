@@ -0,0 +1,79 @@
+import io
+import sys
+import wave
+import shutil
+import tempfile
+import argparse
+import numpy as np
+import dsp
+from tts import SpeechPipeline
+from phrase_cache import PhraseCache
+
+# Filesystem calls per utterance on the speech path: a local fake TTS that
+# returns WAV bytes -> PhraseCache -> decode from memory -> SpeechPipeline.
+# An audit hook counts every open/remove/rename/mkstemp while replies made of
+# one-off sentences are spoken; there should be none, since synthesis stays
+# in memory and the cache only writes phrases that come back. A repeated
+# phrase is spoken last to show the hook does see the one write that is
+# expected.
+#
+#   python bench_tts_io.py --replies 20
+
+FILE_EVENTS = {"open", "os.remove", "os.unlink", "os.rename", "os.replace", "tempfile.mkstemp", "tempfile.mkdtemp"}
+
+def fake_tts(text, lang):
+    n = int(max(0.2, len(text) / 15.0) * dsp.RATE)
+    t = np.arange(n) / dsp.RATE
+    data = io.BytesIO()
+    with wave.open(data, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(dsp.RATE)
+        wf.writeframes((0.3 * np.sin(2 * np.pi * 140 * t) * 32767).astype(np.int16).tobytes())
+    return data.getvalue()
+
+def decode(data):
+    with wave.open(io.BytesIO(data), "rb") as wf:
+        return dsp.to_mono(np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16), wf.getframerate())
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--replies", type=int, default=20)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="bench_tts_io_")
+    cache = PhraseCache(fake_tts, decode, voice="fake", directory=directory)
+    played = []
+    pipeline = SpeechPipeline(cache.get, lambda audio: played.append(len(audio)) or True)
+    pipeline.speak(["Warming up. Imports happen here."])
+    warm = len(played)
+    events = []
+    counting = [True]
+
+    def audit(event, details):
+        if counting[0] and event in FILE_EVENTS:
+            events.append((event, details[0] if details else None))
+
+    sys.addaudithook(audit)
+    try:
+        for i in range(args.replies):
+            pipeline.speak([f"Reply {i} starts here. ", f"It has a second sentence {i}. ", f"And a third {i}."])
+        one_off = list(events)
+        sentences = len(played) - warm
+        for _ in range(2):
+            pipeline.speak(["This phrase comes back."])
+        counting[0] = False
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    print(f"{args.replies} replies, {sentences} sentences played: {len(one_off)} file operations")
+    for event, target in one_off[:10]:
+        print("  ", event, target)
+    print(f"repeated phrase: {len(events) - len(one_off)} file operations (cache write expected)")
+    if one_off or len(events) == len(one_off):
+        print("FAIL: one-off speech touched the filesystem, or the audit hook saw nothing at all")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+import os
+import sys
+import glob
+import argparse
+import numpy as np
+import dsp
+from noise_floor import NoiseFloor
+from vad import Endpointer
+
+# Measures how long each endpointer keeps capturing after the speaker stops
+# and how often it cuts them off, over WAV fixtures with speech labels:
+#   name.wav + name.lab, one "start end [label]" line (seconds) per stretch of
+#   speech, the format Audacity exports labels in
+# "pause" is the old rule (energy over the noise floor, fixed 0.8 s of
+# silence), "vad" is vad.Endpointer. Fails if the endpointer ever captures
+# for longer than its max_hangover after speech has ended.
+#
+#   python bench_vad.py synth fixtures/vad     write synthetic labelled fixtures
+#   python bench_vad.py fixtures/vad
+
+FRAME_TIME = dsp.FRAME / dsp.RATE
+PAUSE = 0.8
+
+def read_labels(path):
+    with open(path) as f:
+        return [tuple(float(v) for v in line.split()[:2]) for line in f if line.strip()]
+
+# Old rule from stt.listen, kept here as the baseline
+class PauseEndpointer:
+    def __init__(self, noise_floor, pause=PAUSE):
+        self.noise_floor = noise_floor
+        self.pause = pause
+        self.started = self.ended = False
+        self.silence = 0.0
+
+    def process(self, frame):
+        speech = self.noise_floor.is_speech(float(dsp.rms(frame)) * 32768)
+        if speech:
+            self.started = True
+            self.silence = 0.0
+        elif self.started:
+            self.silence += FRAME_TIME
+            self.ended = self.silence >= self.pause
+        return speech
+
+ENDPOINTERS = {"pause": PauseEndpointer, "vad": Endpointer}
+
+# Time capture ends, or None if it never did. The noise floor runs alongside
+# as it does on the bot, primed on the silence before the first word.
+def capture_end(samples, labels, make):
+    noise_floor = NoiseFloor()
+    frames = dsp.frames(samples)
+    lead = max(1, int(labels[0][0] / FRAME_TIME) - 2)
+    for frame in frames[:lead]:
+        noise_floor.update(frame)
+    endpointer = make(noise_floor)
+    for i, frame in enumerate(frames[lead:], lead):
+        noise_floor.update(frame)
+        endpointer.process(frame)
+        if endpointer.ended:
+            return (i + 1) * FRAME_TIME
+    return None
+
+# --------- SYNTHETIC FIXTURES ---------
+# Voiced words (harmonics with a syllable envelope), some ending in a hiss
+# like a trailing "s", spoken fast or slow with the odd long thinking pause,
+# over hiss or fan hum at several levels
+def synth_fixture(rng):
+    rate = rng.uniform(0.7, 1.6)  # > 1 speaks faster
+    gaps = (0.04, 0.25)
+    parts = [np.zeros(int(rng.uniform(0.6, 1.0) * dsp.RATE))]
+    t = len(parts[0]) / dsp.RATE
+    start = t
+    words = rng.integers(2, 9)
+    for w in range(words):
+        n = int(rng.uniform(0.15, 0.45) / rate * dsp.RATE)
+        x = np.arange(n) / dsp.RATE
+        pitch = rng.uniform(90, 220)
+        voiced = sum(np.sin(2 * np.pi * pitch * k * x) / k for k in range(1, 6))
+        word = rng.uniform(0.05, 0.25) * voiced / 2.3 * np.sin(np.pi * np.arange(n) / n) ** 0.5
+        if rng.random() < 0.3:  # fricative tail: quieter, high-band noise
+            m = int(0.08 * dsp.RATE)
+            hiss = np.diff(rng.normal(0, 1, m + 1)) * rng.uniform(0.005, 0.02)
+            word = np.concatenate([word, hiss * np.linspace(1, 0.3, m)])
+        parts.append(word)
+        t += len(word) / dsp.RATE
+        end = t
+        if w < words - 1:
+            gap = rng.uniform(*gaps) / rate
+            if rng.random() < 0.05:
+                gap = rng.uniform(0.3, 0.5)  # thinking pause
+            parts.append(np.zeros(int(gap * dsp.RATE)))
+            t += gap
+    parts.append(np.zeros(int(1.5 * dsp.RATE)))
+    samples = np.concatenate(parts)
+    level = rng.choice([0.0005, 0.002, 0.006])
+    if rng.random() < 0.5:
+        noise = rng.normal(0, level, len(samples))
+    else:
+        x = np.arange(len(samples)) / dsp.RATE
+        noise = level * (np.sin(2 * np.pi * 50 * x) + 0.5 * np.sin(2 * np.pi * 100 * x) + rng.normal(0, 0.5, len(samples)))
+    samples = np.clip(samples + noise, -1, 1)
+    return (samples * 32767).astype(np.int16), [(start, end)]
+
+def synth(directory, count=40, seed=0):
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    for i in range(count):
+        samples, labels = synth_fixture(rng)
+        base = os.path.join(directory, f"synth_{i:03d}")
+        dsp.write_wav(base + ".wav", samples)
+        with open(base + ".lab", "w") as f:
+            for start, end in labels:
+                f.write(f"{start:.3f}\t{end:.3f}\tspeech\n")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("fixtures")
+    parser.add_argument("--count", type=int, default=40, help="fixtures to write with synth")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for synth")
+    parser.add_argument("--tolerance", type=float, default=0.02, help="seconds of slack before a cut counts")
+    args = parser.parse_args(sys.argv[2:] if sys.argv[1:2] == ["synth"] else sys.argv[1:])
+    if sys.argv[1:2] == ["synth"]:
+        synth(args.fixtures, args.count, args.seed)
+        return 0
+
+    paths = sorted(glob.glob(os.path.join(args.fixtures, "*.wav")))
+    if not paths:
+        print("No fixtures in", args.fixtures)
+        return 1
+    fixtures = [(dsp.read_wav(p), read_labels(os.path.splitext(p)[0] + ".lab")) for p in paths]
+    failed = False
+    for name, make in ENDPOINTERS.items():
+        delays, truncated, missed = [], 0, 0
+        for samples, labels in fixtures:
+            end = capture_end(samples, labels, make)
+            if end is None:
+                missed += 1
+                continue
+            delay = end - labels[-1][1]
+            if delay < -args.tolerance:
+                truncated += 1
+            else:
+                delays.append(delay)
+        delays = np.array(delays) * 1000
+        mean = f"{delays.mean():6.0f}" if len(delays) else "     -"
+        p95 = f"{np.percentile(delays, 95):6.0f}" if len(delays) else "     -"
+        top = f"{delays.max():6.0f}" if len(delays) else "     -"
+        print(f"{name:6} end-of-speech -> end-of-capture mean {mean} ms  p95 {p95} ms  max {top} ms  "
+              f"truncated {100 * truncated / len(fixtures):5.1f}%  never ended {missed}/{len(fixtures)}")
+        # The endpointer has to stop within its longest hangover of the end of speech
+        ceiling = make(NoiseFloor()).max_hangover if name == "vad" else None
+        if ceiling and len(delays) and delays.max() > 1000 * (ceiling + args.tolerance):
+            print(f"FAIL: {name} kept capturing longer than {1000 * ceiling:.0f} ms after speech ended")
+            failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
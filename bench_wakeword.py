@@ -0,0 +1,66 @@
+import os
+import sys
+import time
+import glob
+import argparse
+import numpy as np
+import dsp
+from wakeword import load_wakeword, SPEECH_RMS
+
+# Replays WAV fixtures through the local wake-word stage frame by frame.
+#   positives/*.wav  one wake word each, latency is measured from the last voiced frame
+#   negatives/*.wav  background speech/noise, every fire is a false accept
+
+def run(detector, samples):
+    frames = dsp.frames(samples)
+    fires = []
+    cpu = time.process_time()
+    for i, frame in enumerate(frames):
+        if detector.process(frame):
+            fires.append(i)
+    cpu = time.process_time() - cpu
+    detector.reset()
+    return frames, fires, cpu
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--positives", required=True)
+    parser.add_argument("--negatives", required=True)
+    parser.add_argument("--templates", default=None)
+    parser.add_argument("--threshold", type=float, default=None)
+    args = parser.parse_args()
+
+    detector = load_wakeword(args.templates, args.threshold) if args.templates else load_wakeword(threshold=args.threshold)
+    frame_ms = 1000.0 * dsp.FRAME / dsp.RATE
+    latencies, missed, false_accepts = [], 0, 0
+    audio_seconds = cpu_seconds = 0.0
+
+    for path in sorted(glob.glob(os.path.join(args.positives, "*.wav"))):
+        frames, fires, cpu = run(detector, dsp.read_wav(path))
+        audio_seconds += len(frames) * frame_ms / 1000
+        cpu_seconds += cpu
+        voiced = np.nonzero(dsp.rms(frames) > SPEECH_RMS)[0]
+        if not fires or not len(voiced):
+            missed += 1
+            continue
+        latencies.append((fires[0] - voiced[-1]) * frame_ms)
+
+    negative_seconds = 0.0
+    for path in sorted(glob.glob(os.path.join(args.negatives, "*.wav"))):
+        frames, fires, cpu = run(detector, dsp.read_wav(path))
+        negative_seconds += len(frames) * frame_ms / 1000
+        cpu_seconds += cpu
+        false_accepts += len(fires)
+    audio_seconds += negative_seconds
+
+    detected = len(latencies)
+    print(f"Detected: {detected}/{detected + missed}")
+    if latencies:
+        print(f"Latency after speech end: mean {np.mean(latencies):.0f} ms, p95 {np.percentile(latencies, 95):.0f} ms")
+    if negative_seconds:
+        print(f"False accepts: {false_accepts} ({false_accepts / (negative_seconds / 3600):.2f} per hour)")
+    if audio_seconds:
+        print(f"CPU: {100 * cpu_seconds / audio_seconds:.1f}% of one core")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+import sys
+import time
+import asyncio
+import argparse
+from clock import WarpClock
+from pca9685 import PCA9685
+from servo_sim import SoftPCA9685
+from motion import ServoScheduler
+from calibration import load_profiles
+from runtime import Assistant, State
+from bench_runtime import FakeDrivers
+
+# A full session of conversation and motion timing on a WarpClock: the
+# runtime, the servo scheduler, the PCA9685 driver and servo_sim.SoftPCA9685
+# all share one clock, the drivers are bench_runtime's fakes with eye poses
+# going to the real scheduler. Two wake-ups each end on the real 15 s
+# conversation timeout. Checks that the session takes --budget real seconds
+# at most, that the timeouts and eye moves last their full length in clock
+# time, and that the board ends with the lids closed.
+#
+#   python bench_warp.py --speed 200
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--speed", type=float, default=200.0, help="WarpClock speed")
+    parser.add_argument("--timeout", type=float, default=15.0, help="conversation timeout, clock seconds")
+    parser.add_argument("--budget", type=float, default=2.0, help="real seconds the session may take")
+    parser.add_argument("--slack", type=float, default=0.005, help="real seconds a move may land late")
+    args = parser.parse_args()
+
+    clock = WarpClock(args.speed)
+    profiles = load_profiles()
+    chip = SoftPCA9685(clock=clock)
+    pwm = PCA9685(bus=chip, profiles=profiles, clock=clock)
+    pwm.setPWMFreq(50)
+    servos = ServoScheduler(pwm, clock=clock)
+    pan, tilt = profiles[0], profiles[1]
+    poses = {
+        "open": ({2: 170, 15: 0}, 0.05),
+        "close": ({2: 100, 15: 80}, 0.05),
+        "center": ({0: pan.center, 1: tilt.center}, 0.4),
+        "saccade": ({0: pan.center + 10, 1: tilt.center - 5}, 0.5),
+        "double_blink": ({2: 100, 15: 80}, 0.1),
+    }
+
+    moves = []  # (action, asked, clock seconds from submit to the last channel landing)
+
+    class WarpDrivers(FakeDrivers):
+        def eyes(self, action):
+            self.eye_actions.append(action)
+            angles, move_time = poses[action]
+            futures = servos.move_many(angles, move_time)
+            submitted, landed = clock.monotonic(), []
+
+            def done(future):
+                landed.append(None if future.cancelled() else clock.monotonic())
+                if len(landed) == len(futures) and None not in landed:  # not cut short by the next pose
+                    moves.append((action, move_time, max(landed) - submitted))
+            for future in futures:
+                future.add_done_callback(done)
+            return futures
+
+    drivers = WarpDrivers([["what time is it", None], ["tell me a joke"]], clock)
+    assistant = Assistant(drivers, conversation_timeout=args.timeout, clock=clock, blink_chance=0.0,
+                          wake_retry=0.1, max_wake_failures=1)
+    servos.start()
+    start, clock_start = time.monotonic(), clock.monotonic()
+    try:
+        asyncio.run(asyncio.wait_for(assistant.run(), 10 * args.budget))
+    finally:
+        servos.stop()
+    elapsed, clock_elapsed = time.monotonic() - start, clock.monotonic() - clock_start
+
+    failures = []
+
+    def check(name, ok, detail):
+        print(f"{'ok  ' if ok else 'FAIL'} {name:16} {detail}")
+        if not ok:
+            failures.append(name)
+
+    check("real time", elapsed <= args.budget,
+          f"{clock_elapsed:.1f} clock s in {1000 * elapsed:.0f} ms (budget {1000 * args.budget:.0f} ms)")
+    # Each conversation goes idle only once the timeout has passed since the last reply
+    idle = [t for t, state in assistant.history if state is State.IDLE][1:]
+    spoken = [t for (t, state), (_, after) in zip(assistant.history, assistant.history[1:])
+              if state is State.SPEAKING and after is State.LISTENING]
+    waits = [t - max(s for s in spoken if s < t) for t in idle]
+    check("timeouts", len(waits) == 2 and all(w >= args.timeout for w in waits),
+          "idle after " + ", ".join(f"{w:.1f}" for w in waits) + " clock s")
+    # Moves that ran to the end, each against the time it was asked to take.
+    # The first step goes out on the next tick, so a move can land one tick
+    # early; a late wake-up of the scheduler thread is stretched by the warp.
+    period = 1000000.0 / chip.freq
+    off = [(action, asked, round(took, 3)) for action, asked, took in moves
+           if not asked - servos.tick <= took <= asked + args.slack * args.speed]
+    check("eye moves", moves and not off, f"{len(moves)} moves, {len(off)} off their length: {off[:3]}")
+    closed = {2: profiles[2].pulse(100) * period / 4096, 15: profiles[15].pulse(80) * period / 4096}
+    ends = {c: chip.pulse(c) for c in closed}
+    check("lids closed", all(abs(ends[c] - closed[c]) < 1.0 for c in closed),
+          ", ".join(f"ch{c} {ends[c]:.0f} us" for c in closed))
+
+    if failures:
+        print("FAIL:", ", ".join(failures))
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,120 +1,65 @@
+import os
 import time
-import math
-import smbus
 import random
 import speech_recognition as sr
 import sys
 import openai
 from gtts import gTTS
 import pygame
-import tempfile
-import os
+from io import BytesIO
 import threading
 from datetime import datetime
-
-# ---------- PCA9685 Servo Control ----------
-class PCA9685:
-    __MODE1 = 0x00
-    __PRESCALE = 0xFE
-    __LED0_ON_L = 0x06
-    __LED0_ON_H = 0x07
-    __LED0_OFF_L = 0x08
-    __LED0_OFF_H = 0x09
-
-    def __init__(self, address=0x40):
-        self.bus = smbus.SMBus(1)
-        self.address = address
-        self.write(self.__MODE1, 0x00)
-
-    def write(self, reg, value):
-        self.bus.write_byte_data(self.address, reg, value)
-
-    def setPWMFreq(self, freq):
-        prescaleval = 25000000.0 / 4096.0 / float(freq) - 1
-        prescale = math.floor(prescaleval + 0.5)
-        oldmode = self.bus.read_byte_data(self.address, self.__MODE1)
-        self.write(self.__MODE1, oldmode & 0x7F | 0x10)
-        self.write(self.__PRESCALE, int(prescale))
-        self.write(self.__MODE1, oldmode)
-        time.sleep(0.005)
-        self.write(self.__MODE1, oldmode | 0x80)
-
-    def setServoAngle(self, channel, target_angle, move_time=0.5, step_size=1):
-        target_angle = max(0, min(180, target_angle))
-        current_angle = getattr(self, f'last_angle_{channel}', target_angle)
-
-        step = step_size if target_angle > current_angle else -step_size
-        steps = abs(target_angle - current_angle) // step_size
-
-        if steps == 0:
-            return
-
-        for i in range(steps + 1):
-            progress = i / steps
-            speed_factor = 0.5 - 0.5 * math.cos(progress * math.pi)
-            angle = current_angle + (target_angle - current_angle) * progress
-            pulse = 500 + (angle / 180.0) * 2000
-            pulse_length = int(pulse * 4096 / 20000)
-            self.setPWM(channel, 0, pulse_length)
-            time.sleep((move_time / steps) * speed_factor)
-
-        setattr(self, f'last_angle_{channel}', target_angle)
-
-    def setServoInstant(self, channel, angle):
-        angle = max(0, min(180, angle))
-        pulse = 500 + (angle / 180.0) * 2000
-        pulse_length = int(pulse * 4096 / 20000)
-        self.setPWM(channel, 0, pulse_length)
-        setattr(self, f'last_angle_{channel}', angle)
-
-    def setPWM(self, channel, on, off):
-        self.write(self.__LED0_ON_L + 4 * channel, on & 0xFF)
-        self.write(self.__LED0_ON_H + 4 * channel, on >> 8)
-        self.write(self.__LED0_OFF_L + 4 * channel, off & 0xFF)
-        self.write(self.__LED0_OFF_H + 4 * channel, off >> 8)
+from pca9685 import PCA9685
+from motion import ServoScheduler
+from calibration import load_profiles
+from audio_out import AudioEngine, PyAudioSink, NullSink, RATE as OUTPUT_RATE
 
 # ---------- Initialize Servos ----------
-pwm = PCA9685()
+profiles = load_profiles()
+pwm = PCA9685(profiles=profiles)
 pwm.setPWMFreq(50)
+servos = ServoScheduler(pwm)
+servos.start()
+
+# ---------- Initialize Audio ----------
+# pygame only decodes the MP3s, playback goes through one output stream that
+# stays open for the whole run
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+pygame.mixer.init(frequency=OUTPUT_RATE, size=-16, channels=1)
+try:
+    sink = PyAudioSink(OUTPUT_RATE)
+except Exception as e:
+    print("Audio output error:", e)
+    sink = NullSink(OUTPUT_RATE)
+audio = AudioEngine(sink)
+audio.start()
 
 # ---------- Eye Config ----------
-center_horizontal = 90
-center_vertical = 85
-servo0_min, servo0_max = 30, 140
-servo1_min, servo1_max = 80, 90
+pan, tilt = profiles[0], profiles[1]
+center_horizontal = pan.center
+center_vertical = tilt.center
 blink_chance = 0.1
 eye_thread_running = False
 wakeword_detected = False
+wakeword_event = threading.Event()  # lets main() sleep until the listener fires
 last_interaction_time = None
 
 def close_eye():
-    t1 = threading.Thread(target=pwm.setServoAngle, args=(2, 100, 0.3))
-    t2 = threading.Thread(target=pwm.setServoAngle, args=(15, 80, 0.3))
-    t1.start()
-    t2.start()
-    t1.join()
-    t2.join()
+    servos.wait(servos.move_many({2: 100, 15: 80}, move_time=0.3))
 
 def open_eye():
-    t1 = threading.Thread(target=pwm.setServoAngle, args=(2, 170, 0.3))
-    t2 = threading.Thread(target=pwm.setServoAngle, args=(15, 0, 0.3))
-    t1.start()
-    t2.start()
-    t1.join()
-    t2.join()
+    servos.wait(servos.move_many({2: 170, 15: 0}, move_time=0.3))
 
 def center_eye():
-    pwm.setServoAngle(0, center_horizontal, move_time=0.4)
-    pwm.setServoAngle(1, center_vertical, move_time=0.4)
+    servos.wait(servos.move_many({0: center_horizontal, 1: center_vertical}, move_time=0.4))
 
 def eye_idle_loop():
     global eye_thread_running
     eye_thread_running = True
     while eye_thread_running:
-        angle0 = random.randint(servo0_min, servo0_max)
-        angle1 = random.randint(servo1_min, servo1_max)
-        pwm.setServoAngle(0, angle0, move_time=0.5)
-        pwm.setServoAngle(1, angle1, move_time=0.5)
+        angle0 = random.randint(pan.min_angle, pan.max_angle)
+        angle1 = random.randint(tilt.min_angle, tilt.max_angle)
+        servos.wait(servos.move_many({0: angle0, 1: angle1}, move_time=0.5))
 
         if random.random() < blink_chance:
             close_eye()
@@ -139,25 +84,19 @@ client = openai.OpenAI(api_key="sk-proj-...")  # Replace with your OpenAI key
 conversation_history = []
 
 def speak(text):
-    global wakeword_detected, last_interaction_time
-    tts = gTTS(text=text, lang='en')
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as fp:
-        filename = fp.name
-        tts.save(filename)
-
-    pygame.mixer.init()
-    pygame.mixer.music.load(filename)
-    pygame.mixer.music.play()
-
-    while pygame.mixer.music.get_busy():
-        if wakeword_detected:
-            print("Wakeword detected during speech. Interrupting...")
-            pygame.mixer.music.stop()
-            os.remove(filename)
-            return
-        continue
+    global last_interaction_time
+    mp3 = BytesIO()
+    gTTS(text=text, lang='en').write_to_fp(mp3)
+    mp3.seek(0)
+    samples = pygame.sndarray.array(pygame.mixer.Sound(file=mp3)).astype("float32") / 32768.0
+
+    # The wakeword listener stops the voice, so this just waits for it to end
+    voice = audio.play(samples.reshape(-1), tag="speech")
+    voice.wait()
+    if voice.stopped:
+        print("Wakeword detected during speech. Interrupting...")
+        return
 
-    os.remove(filename)
     last_interaction_time = datetime.now()
 
 def generate_text(prompt):
@@ -181,12 +120,14 @@ def wakeword_listener(wakeword="hey ai"):
     with mic as source:
         recognizer.adjust_for_ambient_noise(source)
         while True:
-            audio = recognizer.listen(source)
+            heard = recognizer.listen(source)
             try:
-                text = recognizer.recognize_google(audio).lower()
+                text = recognizer.recognize_google(heard).lower()
                 print(f"Heard: {text}")
                 if wakeword in text:
                     wakeword_detected = True
+                    wakeword_event.set()
+                    audio.stop_all("speech")
             except sr.UnknownValueError:
                 pass
             except sr.RequestError:
@@ -204,12 +145,12 @@ def listen_and_respond():
     with mic as source:
         print("Listening for user input...")
         recognizer.adjust_for_ambient_noise(source)
-        audio = recognizer.listen(source)
+        heard = recognizer.listen(source)
 
     start_eye_thread()  # Resume eye movement
 
     try:
-        text = recognizer.recognize_google(audio)
+        text = recognizer.recognize_google(heard)
         print(f"You said: {text}")
         return text
     except sr.UnknownValueError:
@@ -234,6 +175,8 @@ def main():
     pwm.setServoInstant(15, 80)
 
     while True:
+        wakeword_event.wait()
+        wakeword_event.clear()
         if wakeword_detected:
             wakeword_detected = False
             open_eye()
@@ -0,0 +1,54 @@
+import os
+import json
+from functools import lru_cache
+
+# --------- CONFIG ---------
+SERVO_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "servos.json")
+RESOLUTION = 10  # table entries per degree
+
+# Angle -> 12-bit count table. Limits and trim are baked in, so profiles with
+# the same numbers share one table.
+@lru_cache(maxsize=None)
+def compile_table(min_pulse, max_pulse, min_angle, max_angle, trim, freq):
+    period = 1000000.0 / freq
+    table = []
+    for i in range(180 * RESOLUTION + 1):
+        angle = max(min_angle, min(max_angle, i / RESOLUTION)) + trim
+        angle = max(0, min(180, angle))
+        pulse = min_pulse + (angle / 180.0) * (max_pulse - min_pulse)
+        table.append(int(pulse * 4096 / period))
+    return tuple(table)
+
+# --------- SERVO PROFILE ---------
+class ServoProfile:
+    def __init__(self, channel, name=None, min_pulse=500, max_pulse=2500,
+                 min_angle=0, max_angle=180, trim=0, center=90, freq=50):
+        self.channel = channel
+        self.name = name or f"servo{channel}"
+        self.min_pulse = min_pulse
+        self.max_pulse = max_pulse
+        self.min_angle = min_angle
+        self.max_angle = max_angle
+        self.trim = trim
+        self.center = center
+        self.freq = freq
+        self.table = compile_table(min_pulse, max_pulse, min_angle, max_angle, trim, freq)
+
+    def clamp(self, angle):
+        return max(self.min_angle, min(self.max_angle, angle))
+
+    def pulse(self, angle):
+        index = int(angle * RESOLUTION + 0.5)
+        return self.table[max(0, min(180 * RESOLUTION, index))]
+
+DEFAULT_PROFILE = ServoProfile(None, name="default")
+
+def load_profiles(path=SERVO_CONFIG):
+    with open(path) as f:
+        config = json.load(f)
+    freq = config.get("frequency", 50)
+    profiles = {}
+    for channel, settings in config["channels"].items():
+        settings.setdefault("freq", freq)
+        profiles[int(channel)] = ServoProfile(int(channel), **settings)
+    return profiles
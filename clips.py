@@ -0,0 +1,217 @@
+import os
+import sys
+import json
+import glob
+import hashlib
+import numpy as np
+from calibration import RESOLUTION, DEFAULT_PROFILE
+from motion import easing_table
+
+# --------- CONFIG ---------
+HERE = os.path.dirname(os.path.abspath(__file__))
+CLIPS_DIR = os.path.join(HERE, "clips")
+CLIP_CACHE = os.path.join(HERE, "clip_cache")
+FORMAT_VERSION = 1  # bump when the compiled layout changes
+
+# --------- CLIP FORMAT ---------
+# A clip is JSON:
+#   {"channels": {"lid_left": [[0, 170], [0.05, 100, "cosine"], [0.2, 170]], ...}}
+# Channels are servo names from servos.json or channel numbers. Each keyframe
+# is [time in seconds, angle, easing]; the easing ("cosine" by default, or any
+# motion.EASINGS name) shapes the move into that keyframe. A channel holds its
+# first angle until its first keyframe and its last angle to the end of the clip.
+
+# Compiled clip: one row per tick, one column per channel
+class Clip:
+    def __init__(self, name, channels, angles, counts, tick):
+        self.name = name
+        self.channels = list(channels)
+        self.angles = angles  # float32 (ticks, channels)
+        self.counts = counts  # uint16 (ticks, channels), 12-bit PWM off counts
+        self.tick = tick
+
+    @property
+    def duration(self):
+        return len(self.angles) * self.tick
+
+    def __repr__(self):
+        return f"Clip({self.name!r}, channels={self.channels}, ticks={len(self.angles)})"
+
+def channel_number(key, profiles):
+    if str(key).isdigit():
+        return int(key)
+    for channel, profile in profiles.items():
+        if profile.name == key:
+            return channel
+    raise RuntimeError(f"Unknown servo {key!r} in clip")
+
+# Angles -> counts through the profile's calibration table, for a whole column
+def to_counts(angles, profile):
+    table = np.asarray(profile.table, dtype=np.uint16)
+    angles = np.clip(angles, profile.min_angle, profile.max_angle)
+    return table[np.clip((angles * RESOLUTION + 0.5).astype(int), 0, len(table) - 1)]
+
+def compile_clip(name, source, profiles, tick=0.02):
+    tracks = {}
+    for key, keyframes in source["channels"].items():
+        keyframes = sorted(keyframes, key=lambda k: k[0])
+        tracks[channel_number(key, profiles)] = keyframes
+    ticks = 1 + max(int(round(k[-1][0] / tick)) for k in tracks.values())
+    angles = np.empty((ticks, len(tracks)), dtype=np.float32)
+    counts = np.empty((ticks, len(tracks)), dtype=np.uint16)
+    for column, (channel, keyframes) in enumerate(tracks.items()):
+        track = angles[:, column]
+        first = int(round(keyframes[0][0] / tick))
+        track[:first + 1] = keyframes[0][1]
+        for (t0, a0, *_), (t1, a1, *easing) in zip(keyframes, keyframes[1:]):
+            i0, i1 = int(round(t0 / tick)), int(round(t1 / tick))
+            if i1 > i0:
+                curve = np.asarray(easing_table(easing[0] if easing else "cosine", i1 - i0), dtype=np.float32)
+                track[i0:i1 + 1] = a0 + (a1 - a0) * curve
+            else:
+                track[i1] = a1
+        track[int(round(keyframes[-1][0] / tick)):] = keyframes[-1][1]
+        counts[:, column] = to_counts(track, profiles.get(channel, DEFAULT_PROFILE))
+    return Clip(name, tracks, angles, counts, tick)
+
+# --------- COMBINING ---------
+# Both work on compiled clips of the same tick. Counts are linear in angle
+# inside a servo's limits, so they are combined the same way as the angles.
+# Channels the clip doesn't key come back as NaN angles and zero counts with
+# present False; callers pick from `present` rather than weighting them by 0.
+def _columns(clip, channels, ticks):
+    angles = np.full((ticks, len(channels)), np.nan, dtype=np.float32)
+    counts = np.zeros((ticks, len(channels)), dtype=np.uint16)
+    present = np.zeros(len(channels), dtype=bool)
+    for column, channel in enumerate(channels):
+        if channel not in clip.channels:
+            continue
+        source = clip.channels.index(channel)
+        n = min(ticks, len(clip.angles))
+        angles[:n, column] = clip.angles[:n, source]
+        counts[:n, column] = clip.counts[:n, source]
+        angles[n:, column] = clip.angles[-1, source]  # hold the last pose
+        counts[n:, column] = clip.counts[-1, source]
+        present[column] = True
+    return angles, counts, present
+
+# Weighted mix, e.g. half a glance left and half a glance up
+def blend(a, b, weight=0.5, name=None):
+    channels = a.channels + [c for c in b.channels if c not in a.channels]
+    ticks = max(len(a.angles), len(b.angles))
+    angles_a, counts_a, in_a = _columns(a, channels, ticks)
+    angles_b, counts_b, in_b = _columns(b, channels, ticks)
+    both = in_a & in_b
+    angles = np.where(both, angles_a * (1 - weight) + angles_b * weight, np.where(in_b, angles_b, angles_a))
+    mixed = np.rint(counts_a * (1 - weight) + counts_b * weight).astype(np.uint16)
+    counts = np.where(both, mixed, np.where(in_b, counts_b, counts_a))
+    return Clip(name or f"{a.name}+{b.name}", channels, angles, counts, a.tick)
+
+# top replaces base on its channels from `at` seconds for as long as it runs,
+# e.g. a blink over a gaze shift
+def layer(base, top, at=0.0, name=None):
+    offset = int(round(at / base.tick))
+    channels = base.channels + [c for c in top.channels if c not in base.channels]
+    ticks = max(len(base.angles), offset + len(top.angles))
+    angles, counts, _ = _columns(base, channels, ticks)
+    for source, channel in enumerate(top.channels):
+        column = channels.index(channel)
+        if channel not in base.channels:
+            angles[:offset, column] = top.angles[0, source]
+            counts[:offset, column] = top.counts[0, source]
+            angles[offset + len(top.angles):, column] = top.angles[-1, source]
+            counts[offset + len(top.angles):, column] = top.counts[-1, source]
+        angles[offset:offset + len(top.angles), column] = top.angles[:, source]
+        counts[offset:offset + len(top.angles), column] = top.counts[:, source]
+    return Clip(name or f"{base.name}/{top.name}", channels, angles, counts, base.tick)
+
+# --------- LIBRARY ---------
+# Loads clips/*.json on demand. Compiled arrays are cached in CLIP_CACHE under
+# a hash of the clip source, the servo calibration and the tick, so a restart
+# with nothing changed does no compiling at all.
+class ClipLibrary:
+    def __init__(self, profiles, directory=CLIPS_DIR, cache_dir=CLIP_CACHE, tick=0.02):
+        self.profiles = profiles
+        self.directory = directory
+        self.cache_dir = cache_dir
+        self.tick = tick
+        self.clips = {}
+        self.stats = {"compiled": 0, "cached": 0}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def names(self):
+        return sorted(os.path.splitext(os.path.basename(p))[0]
+                      for p in glob.glob(os.path.join(self.directory, "*.json")))
+
+    def __contains__(self, name):
+        return name in self.clips or os.path.exists(os.path.join(self.directory, name + ".json"))
+
+    def __getitem__(self, name):
+        clip = self.clips.get(name)
+        if clip is None:
+            clip = self.clips[name] = self._load(name)
+        return clip
+
+    def key(self, source):
+        calibration = sorted((c, p.name, p.min_pulse, p.max_pulse, p.min_angle, p.max_angle, p.trim, p.freq)
+                             for c, p in self.profiles.items())
+        text = f"{FORMAT_VERSION}\0{self.tick}\0{calibration}\0".encode() + source
+        return hashlib.sha1(text).hexdigest()
+
+    def _load(self, name):
+        with open(os.path.join(self.directory, name + ".json"), "rb") as f:
+            source = f.read()
+        path = os.path.join(self.cache_dir, self.key(source) + ".npz")
+        if os.path.exists(path):
+            with np.load(path) as data:
+                self.stats["cached"] += 1
+                return Clip(name, data["channels"].tolist(), data["angles"], data["counts"], self.tick)
+        clip = compile_clip(name, json.loads(source), self.profiles, self.tick)
+        self.stats["compiled"] += 1
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, channels=np.asarray(clip.channels), angles=clip.angles, counts=clip.counts)
+        os.replace(tmp, path)
+        return clip
+
+# --------- PLAYER ---------
+# Streams a compiled clip through the servo scheduler, one row per tick; rows
+# go out as merged block writes. Returns a Future that completes at the end.
+class ClipPlayer:
+    def __init__(self, servos):
+        self.servos = servos
+
+    def play(self, clip, start=None):
+        tracks = {channel: clip.angles[:, i] for i, channel in enumerate(clip.channels)}
+        counts = {channel: clip.counts[:, i] for i, channel in enumerate(clip.channels)}
+        start = self.servos.clock.monotonic() if start is None else start
+        return self.servos.play_track(start, clip.tick, tracks, counts)
+
+    def stop(self, clip=None):
+        self.servos.stop_track(clip.channels if clip else None)
+
+# python clips.py compile        compile every clip into the cache
+# python clips.py play <name>... play clips on the servos, Ctrl+C to stop
+if __name__ == "__main__":
+    from calibration import load_profiles
+    profiles = load_profiles()
+    library = ClipLibrary(profiles)
+    if sys.argv[1:2] == ["compile"]:
+        for clip_name in library.names():
+            print(library[clip_name])
+        print(library.stats)
+    elif sys.argv[1:2] == ["play"] and len(sys.argv) > 2:
+        from pca9685 import PCA9685
+        from motion import ServoScheduler
+        pwm = PCA9685(profiles=profiles)
+        pwm.setPWMFreq(50)
+        servos = ServoScheduler(pwm)
+        servos.start()
+        player = ClipPlayer(servos)
+        try:
+            while True:
+                for clip_name in sys.argv[2:]:
+                    player.play(library[clip_name]).result()
+        except KeyboardInterrupt:
+            servos.stop()
+    else:
+        print("usage: python clips.py compile | play <clip> [<clip> ...]")
@@ -0,0 +1,36 @@
+import time
+
+# --------- CLOCKS ---------
+# Everything that schedules motion or measures timeouts takes a clock object:
+#   monotonic()   seconds, like time.monotonic()
+#   sleep(s)      like time.sleep()
+#   real(s)       wall seconds that s clock seconds take, for Event.wait and
+#                 asyncio.sleep timeouts
+class SystemClock:
+    def monotonic(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        time.sleep(max(0.0, seconds))
+
+    def real(self, seconds):
+        return seconds
+
+# Runs `speed` times faster than real time, so a 15 s conversation timeout
+# takes 15 ms at speed=1000. Threads keep working since it is still driven by
+# the real clock, only scaled.
+class WarpClock:
+    def __init__(self, speed=100.0):
+        self.speed = speed
+        self.origin = time.monotonic()
+
+    def monotonic(self):
+        return self.origin + (time.monotonic() - self.origin) * self.speed
+
+    def sleep(self, seconds):
+        time.sleep(max(0.0, seconds) / self.speed)
+
+    def real(self, seconds):
+        return None if seconds is None else seconds / self.speed
+
+SYSTEM_CLOCK = SystemClock()
@@ -0,0 +1,87 @@
+import wave
+from functools import lru_cache
+import numpy as np
+
+# --------- AUDIO FORMAT ---------
+RATE = 16000
+FRAME = 320  # samples per 20 ms frame
+N_FFT = 512
+N_MELS = 26
+N_MFCC = 13
+
+def to_float(frame):
+    if isinstance(frame, np.ndarray) and frame.dtype == np.float32:
+        return frame
+    return np.frombuffer(frame, dtype=np.int16).astype(np.float32) / 32768.0
+
+# Split a long int16 buffer into whole frames, shape (n, FRAME)
+def frames(samples, frame=FRAME):
+    samples = to_float(samples)
+    n = len(samples) // frame
+    return samples[:n * frame].reshape(n, frame)
+
+def rms(samples):
+    samples = to_float(samples)
+    return np.sqrt(np.mean(samples * samples, axis=-1) + 1e-12)
+
+# --------- FEATURES ---------
+@lru_cache(maxsize=None)
+def mel_filters(rate=RATE, n_fft=N_FFT, n_mels=N_MELS):
+    def hz_to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+    mel_points = np.linspace(hz_to_mel(0), hz_to_mel(rate / 2), n_mels + 2)
+    hz_points = 700.0 * (10 ** (mel_points / 2595.0) - 1.0)
+    bins = np.floor((n_fft + 1) * hz_points / rate).astype(int)
+    filters = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+    for m in range(1, n_mels + 1):
+        left, center, right = bins[m - 1], bins[m], bins[m + 1]
+        for k in range(left, center):
+            filters[m - 1, k] = (k - left) / max(1, center - left)
+        for k in range(center, right):
+            filters[m - 1, k] = (right - k) / max(1, right - center)
+    return filters
+
+@lru_cache(maxsize=None)
+def dct_matrix(n_mels=N_MELS, n_mfcc=N_MFCC):
+    n = np.arange(n_mels)
+    k = np.arange(n_mfcc)[:, None]
+    return (np.cos(np.pi * k * (2 * n + 1) / (2 * n_mels)) * np.sqrt(2.0 / n_mels)).astype(np.float32)
+
+@lru_cache(maxsize=None)
+def window(size=FRAME):
+    return np.hanning(size).astype(np.float32)
+
+# Power spectrum of one frame or a (n, FRAME) batch of frames
+def power_spectrum(samples):
+    samples = to_float(samples)
+    spectrum = np.fft.rfft(samples * window(samples.shape[-1]), n=N_FFT)
+    return (spectrum.real ** 2 + spectrum.imag ** 2) / N_FFT
+
+def log_mel(samples):
+    return np.log(power_spectrum(samples) @ mel_filters().T + 1e-10)
+
+def mfcc(samples):
+    return log_mel(samples) @ dct_matrix().T
+
+# --------- WAV FILES ---------
+def read_wav(path):
+    with wave.open(path, "rb") as wf:
+        if wf.getnchannels() != 1 or wf.getsampwidth() != 2 or wf.getframerate() != RATE:
+            raise ValueError(f"{path}: expected 16-bit mono {RATE} Hz")
+        return np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+
+def write_wav(path, samples):
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(RATE)
+        wf.writeframes(np.asarray(samples, dtype=np.int16).tobytes())
+
+# --------- CONVERSION ---------
+# int16 PCM of any rate/channel count -> float32 mono at RATE
+def to_mono(samples, rate, channels=1):
+    samples = np.asarray(samples, dtype=np.float32).reshape(-1, channels).mean(axis=1) / 32768.0
+    if rate == RATE or not len(samples):
+        return samples
+    positions = np.arange(0, len(samples) - 1, rate / RATE)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
@@ -1,303 +1,389 @@
 # --- Your usual imports ---
+import os
 import time
-import math
-import smbus
 import random
+import datetime
+import asyncio
 import threading
-import speech_recognition as sr
 from gtts import gTTS
 import pygame
-import tempfile
-import pyaudio
+from io import BytesIO
 import openai
+from pca9685 import PCA9685
+from servo_sim import SoftPCA9685
+from motion import ServoScheduler
+from calibration import load_profiles
+import dsp
+from wakeword import load_wakeword
+from mic_stream import MicStream, find_input_device
+from noise_floor import NoiseFloor
+from tts import SpeechPipeline
+from phrase_cache import PhraseCache
+from stt import make_stt, listen
+from barge_in import BargeInMonitor
+from runtime import Assistant, Drivers
+from memory import ConversationMemory
+from llm import LLMGateway, OpenAIBackend, CannedBackend
+from response_cache import ResponseCache
+from speculation import Speculator
+from intents import IntentRouter, build_intents
+from animation import SpeechAnimator
+from audio_out import AudioEngine, PyAudioSink, NullSink, earcon, RATE as OUTPUT_RATE
+from clips import ClipLibrary, ClipPlayer
+from tracing import tracer
 
 # --------- CONFIG ---------
 WAKE_WORD = "hey hey"
 CONVERSATION_TIMEOUT = 15
 LISTENING_TIMEOUT = 10
 MAX_PHRASE_LENGTH = 15
+STT_BACKEND = "vosk"  # "vosk" runs offline on the Pi, "google" is the cloud recognizer
+CONFIRM_WAKEWORD = True  # double-check local wake word hits with the speech recognizer
+SYSTEM_PHRASES = ["Yes?", "What's up!",  # wake replies
+                  "Goodbye.", "Okay, I'm listening again.", "Sorry, I couldn't process that.", "Terminating. Goodbye!"]
+MEMORY_TOKEN_BUDGET = 1500  # prompt tokens sent per request, older turns get summarized
+LLM_MODEL = "gpt-3.5-turbo"
+LLM_DEADLINE = 4.0  # seconds to wait for the first token before falling back
+LOCAL_LLM_URL = None  # e.g. "http://localhost:11434/v1" to fall back to a local Ollama model
+LOCAL_LLM_MODEL = "llama3.2:1b"
+SIMULATE_SERVOS = os.environ.get("EYEBOT_SIMULATE_SERVOS") == "1"  # drive a software PCA9685 instead of I2C
+TRACE_FILE = os.environ.get("EYEBOT_TRACE")  # write a Chrome trace of every stage here on exit
+OUTPUT_DEVICE_INDEX = None  # PyAudio output device, None for the default
+WAKE_EARCON = False  # chime when the wake word is heard (the mic hears it too)
+RESPONSE_CACHE_TTL = 3600  # seconds a cached answer to a repeated question stays valid
+SPECULATION = "balanced"  # start the LLM on partial transcripts: "off", "conservative", "balanced", "aggressive"
+BLINK_CHANCE = 0.1  # per idle saccade
+BARGE_IN_PREROLL = 10  # frames kept before the barge-in point for the next listen
 openai.api_key = ""
-# --------- PCA9685 CLASS ---------
-class PCA9685:
-    __MODE1 = 0x00
-    __PRESCALE = 0xFE
-    __LED0_ON_L = 0x06
-    __LED0_ON_H = 0x07
-    __LED0_OFF_L = 0x08
-    __LED0_OFF_H = 0x09
-
-    def __init__(self, address=0x40):
-        self.bus = smbus.SMBus(1)
-        self.address = address
-        self.write(self.__MODE1, 0x00)
-
-    def write(self, reg, value):
-        self.bus.write_byte_data(self.address, reg, value)
-
-    def setPWMFreq(self, freq):
-        prescaleval = 25000000.0 / 4096.0 / float(freq) - 1
-        prescale = math.floor(prescaleval + 0.5)
-        oldmode = self.bus.read_byte_data(self.address, self.__MODE1)
-        self.write(self.__MODE1, oldmode & 0x7F | 0x10)
-        self.write(self.__PRESCALE, int(prescale))
-        self.write(self.__MODE1, oldmode)
-        time.sleep(0.005)
-        self.write(self.__MODE1, oldmode | 0x80)
-
-    def setPWM(self, channel, on, off):
-        self.write(self.__LED0_ON_L + 4 * channel, on & 0xFF)
-        self.write(self.__LED0_ON_H + 4 * channel, on >> 8)
-        self.write(self.__LED0_OFF_L + 4 * channel, off & 0xFF)
-        self.write(self.__LED0_OFF_H + 4 * channel, off >> 8)
-
-    def setServoInstant(self, channel, angle):
-        angle = max(0, min(180, angle))
-        pulse = 500 + (angle / 180.0) * 2000
-        pulse_length = int(pulse * 4096 / 20000)
-        self.setPWM(channel, 0, pulse_length)
-        setattr(self, f'last_angle_{channel}', angle)
-
-    def setServoAngle(self, channel, target_angle, move_time=0.05, step_size=1):
-        target_angle = max(0, min(180, target_angle))
-        current_angle = getattr(self, f'last_angle_{channel}', target_angle)
-        step = step_size if target_angle > current_angle else -step_size
-        steps = abs(target_angle - current_angle) // step_size
-        if steps == 0: return
-        for i in range(steps + 1):
-            progress = i / steps
-            speed_factor = 0.5 - 0.5 * math.cos(progress * math.pi)
-            angle = current_angle + (target_angle - current_angle) * progress
-            pulse = 500 + (angle / 180.0) * 2000
-            pulse_length = int(pulse * 4096 / 20000)
-            self.setPWM(channel, 0, pulse_length)
-            time.sleep((move_time / steps) * speed_factor)
-        setattr(self, f'last_angle_{channel}', target_angle)
-
-# --------- SERVO SETUP ---------
-pwm = PCA9685()
-pwm.setPWMFreq(50)
-center_horizontal = 90
-center_vertical = 85
-servo0_min, servo0_max = 30, 140
-servo1_min, servo1_max = 80, 90
-blink_chance = 0.1
-eye_thread_running = False
-
-def close_eye():
-    pwm.setServoAngle(2, 100, 0.05)
-    pwm.setServoAngle(15, 80, 0.05)
-
-def open_eye():
-    pwm.setServoAngle(2, 170, 0.05)
-    pwm.setServoAngle(15, 0, 0.05)
-
-def center_eye():
-    pwm.setServoAngle(0, center_horizontal, 0.4)
-    pwm.setServoAngle(1, center_vertical, 0.4)
-
-def eye_idle_loop():
-    global eye_thread_running
-    eye_thread_running = True
-    while eye_thread_running:
-        pwm.setServoAngle(0, random.randint(servo0_min, servo0_max), 0.5)
-        pwm.setServoAngle(1, random.randint(servo1_min, servo1_max), 0.5)
-        if random.random() < blink_chance:
-            close_eye()
-            time.sleep(0.05)
-            open_eye()
-            time.sleep(0.05)
-        time.sleep(1)
-
-def start_eye_thread():
-    global eye_thread_running
-    if not eye_thread_running:
-        threading.Thread(target=eye_idle_loop, daemon=True).start()
-
-def stop_eye_thread():
-    global eye_thread_running
-    eye_thread_running = False
-
-# --------- GOODBYE HANDLER ---------
-def handle_goodbye():
-    stop_eye_thread()
-    center_eye()
-    close_eye()
-    pygame.mixer.music.stop()
-    speak("Goodbye.")
-    speak("Okay, I'm listening again.")
-
-# --------- AUDIO + CHAT SETUP ---------
-def get_correct_input_device():
-    p = pyaudio.PyAudio()
-    for i in range(p.get_device_count()):
-        dev = p.get_device_info_by_index(i)
-        if "TKGOU" in dev["name"] or "USB" in dev["name"]:
-            return i
-    return None
-
-MIC_DEVICE_INDEX = get_correct_input_device()
-if MIC_DEVICE_INDEX is None:
-    raise RuntimeError("Mic not found!")
-
-pygame.mixer.init()
-stop_talking = threading.Event()
-audio_lock = threading.Lock()
-interrupt_listening = False
-
-conversation_history = [
-    {"role": "system", "content": "You are a helpful assistant. Keep responses concise and natural for voice interaction."}
-]
-last_interaction_time = time.time()
-conversation_active = False
 
 # --------- TTS ---------
-def speak(text):
-    global interrupt_listening, last_interaction_time
-    print("AI says:", text)
-    if not text.strip():
-        return
-
-    interrupt_listening = True
-    interruption_thread = threading.Thread(target=listen_for_interruption)
-    interruption_thread.daemon = True
-    interruption_thread.start()
-
-    tts = gTTS(text=text, lang='en')
-    with tempfile.NamedTemporaryFile(delete=True, suffix=".mp3") as fp:
-        tts.save(fp.name)
-        pygame.mixer.music.load(fp.name)
-        pygame.mixer.music.play()
-
-        while pygame.mixer.music.get_busy():
-            if stop_talking.is_set():
-                pygame.mixer.music.stop()
-                stop_talking.clear()
-                break
-            time.sleep(0.1)
-
-    interrupt_listening = False
-    interruption_thread.join(timeout=0.1)
-    last_interaction_time = time.time()
-
-# --------- INTERRUPT HANDLER ---------
-def listen_for_interruption():
-    global conversation_active
-    recognizer = sr.Recognizer()
-    mic = sr.Microphone(device_index=MIC_DEVICE_INDEX)
-
-    while interrupt_listening:
-        with audio_lock:
-            try:
-                with mic as source:
-                    recognizer.adjust_for_ambient_noise(source, duration=0.2)
-                    audio = recognizer.listen(source, timeout=1, phrase_time_limit=1)
-                command = recognizer.recognize_google(audio).lower()
-                print("Heard during speech:", command)
-
-                if "goodbye" in command:
-                    stop_talking.set()
-                    conversation_active = False
-                    return
-
-                elif WAKE_WORD in command:
-                    stop_talking.set()
-                    return
-
-            except:
-                continue
-
-# --------- CHAT HANDLER ---------
-def chat_with_gpt(prompt):
-    global conversation_history, last_interaction_time
-    conversation_history.append({"role": "user", "content": prompt})
-    try:
-        client = openai.OpenAI(api_key=openai.api_key)
-        chat = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=conversation_history
+# gTTS writes the MP3 into memory and pygame decodes it to PCM right away,
+# on the synthesis thread. Repeated phrases come straight from the cache.
+def fetch_mp3(text, lang):
+    mp3 = BytesIO()
+    gTTS(text=text, lang=lang).write_to_fp(mp3)
+    return mp3.getvalue()
+
+# Returns float32 PCM at the engine rate plus a 16 kHz mono copy for echo
+# cancellation
+def decode_mp3(data):
+    sound = pygame.mixer.Sound(file=BytesIO(data))
+    freq, _, channels = pygame.mixer.get_init()
+    pcm = pygame.sndarray.array(sound)
+    samples = pcm.reshape(-1, channels).mean(axis=1).astype("float32") / 32768.0
+    return samples, dsp.to_mono(pcm, freq, channels)
+
+# --------- LOCAL COMMANDS ---------
+# What the intent router is allowed to touch: eyes, volume and the clock
+class PiControls:
+    def __init__(self, bot):
+        self.bot = bot
+
+    def eyes(self, action):
+        return self.bot.move_eyes(action)
+
+    def look(self, direction):
+        return self.bot.move_eyes(direction)
+
+    def volume(self):
+        return self.bot.audio.volume
+
+    def set_volume(self, level):
+        self.bot.audio.volume = level
+
+    def now(self):
+        return datetime.datetime.now()
+
+# --------- EYEBOT ---------
+# Everything that touches the servos, the mic, the speaker or the network is
+# set up here rather than at import, so the module can be imported (and its
+# pieces reused) off the Pi. Doubles as the drivers for the asyncio runtime;
+# the context passed around is the mic reader, which carries on from the
+# frame where the wake word fired, so nothing said during the wake-up blink
+# is lost.
+class EyeBot(Drivers):
+    def __init__(self):
+        # Servos
+        self.profiles = load_profiles()
+        self.pwm = PCA9685(bus=SoftPCA9685() if SIMULATE_SERVOS else None, profiles=self.profiles)
+        self.pwm.setPWMFreq(50)
+        self.servos = ServoScheduler(self.pwm)
+        pan, tilt = self.profiles[0], self.profiles[1]
+        self.pan, self.tilt = pan, tilt
+        # Eye poses as (angles, move time); the scheduler moves every channel at once
+        self.poses = {
+            "open": ({2: 170, 15: 0}, 0.05),
+            "close": ({2: 100, 15: 80}, 0.05),
+            "center": ({0: pan.center, 1: tilt.center}, 0.4),
+            # Directions as seen by the bot; swap left/right if the pan servo is mounted the other way
+            "left": ({0: pan.max_angle, 1: tilt.center}, 0.3),
+            "right": ({0: pan.min_angle, 1: tilt.center}, 0.3),
+            "up": ({0: pan.center, 1: tilt.min_angle}, 0.3),
+            "down": ({0: pan.center, 1: tilt.max_angle}, 0.3),
+        }
+        # Keyframe clips from clips/*.json (blink, double_blink, sweep, ...)
+        self.clips = ClipLibrary(self.profiles)
+        self.clip_player = ClipPlayer(self.servos)
+        # Lids and gaze follow the speech while the bot talks
+        self.animator = SpeechAnimator(self.servos, lids={2: (170, 100), 15: (0, 80)},
+                                       gaze={0: (pan.center, 8), 1: (tilt.center, 2)})
+
+        # Audio in: one capture thread owns the mic; every listener reads the
+        # ring at its own cursor
+        device_index = find_input_device()
+        if device_index is None:
+            raise RuntimeError("Mic not found!")
+        self.mic = MicStream(device_index)
+        self.noise_floor = NoiseFloor()
+        self.stt = make_stt(STT_BACKEND)
+        self.wakeword = load_wakeword()
+
+        # Audio out: pygame only decodes MP3s now, its own audio device is
+        # never opened. Everything we play goes through one output stream
+        # that stays open.
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+        pygame.mixer.init(frequency=OUTPUT_RATE, size=-16, channels=1)
+        try:
+            sink = PyAudioSink(OUTPUT_RATE, device_index=OUTPUT_DEVICE_INDEX)
+        except Exception as e:
+            print("Audio output error:", e)
+            sink = NullSink(OUTPUT_RATE)
+        self.audio = AudioEngine(sink)
+        self.stop_talking = threading.Event()
+        self.cancelled = threading.Event()  # runtime is shutting down, blocking stages return
+        self.wake_reader = None
+        # Stops playback as soon as someone talks over the bot, echo of our
+        # own voice is subtracted using the PCM we are playing
+        self.barge_in = BargeInMonitor(self.mic, self.noise_floor, self.interrupt)
+        self.phrase_cache = PhraseCache(fetch_mp3, decode_mp3)
+        self.speech = SpeechPipeline(self.synthesize, self.play_audio)
+
+        # Chat: one gateway for the whole run, pooled connections to OpenAI,
+        # then the local model if configured, then a canned apology
+        self.memory = ConversationMemory(
+            "You are a helpful assistant. Keep responses concise and natural for voice interaction.",
+            budget=MEMORY_TOKEN_BUDGET,
         )
-        response = chat.choices[0].message.content.strip()
-        conversation_history.append({"role": "assistant", "content": response})
-        if len(conversation_history) > 10:
-            conversation_history = [conversation_history[0]] + conversation_history[-9:]
-        last_interaction_time = time.time()
-        return response
-    except Exception as e:
-        print("ChatGPT error:", e)
-        return "Sorry, I couldn't process that."
-
-# --------- LISTEN FOR SPEECH ---------
-def listen_for_audio():
-    recognizer = sr.Recognizer()
-    with audio_lock:
-        with sr.Microphone(device_index=MIC_DEVICE_INDEX) as source:
-            try:
-                recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                audio = recognizer.listen(source, timeout=LISTENING_TIMEOUT, phrase_time_limit=MAX_PHRASE_LENGTH)
-                transcript = recognizer.recognize_google(audio).lower()
-                print("You said:", transcript)
-                return transcript
-            except:
-                print("Could not understand or timeout")
-                return None
-
-# --------- CHAT LOOP ---------
-def handle_chat():
-    global conversation_active
-    while conversation_active:
-        response = listen_for_audio()
-        if not response:
-            continue
-        if "goodbye" in response:
-            conversation_active = False
-            handle_goodbye()
+        backends = [OpenAIBackend("openai", LLM_MODEL, deadline=LLM_DEADLINE)]
+        if LOCAL_LLM_URL:
+            backends.append(OpenAIBackend("local", LOCAL_LLM_MODEL, base_url=LOCAL_LLM_URL, deadline=LLM_DEADLINE))
+        backends.append(CannedBackend(("Sorry, I couldn't process that.",)))
+        self.llm = LLMGateway(backends)
+        self.response_cache = ResponseCache(ttl=RESPONSE_CACHE_TTL, audio=self.phrase_cache)
+        self.speculator = Speculator(self.speculate, SPECULATION)
+        self.router = IntentRouter(build_intents(PiControls(self)))
+
+    def start(self):
+        self.servos.start()
+        self.pwm.setServoInstant(0, self.pan.center)
+        self.pwm.setServoInstant(1, self.tilt.center)
+        self.pwm.setServoInstant(2, 100)  # eyelid closed
+        self.pwm.setServoInstant(15, 80)  # eyelid closed
+        self.mic.start()
+        self.noise_floor.start(self.mic)
+        self.audio.start()
+        self.barge_in.start()
+        self.phrase_cache.warm(SYSTEM_PHRASES)
+        self.llm.warm()
+        for name in self.clips.names():
+            self.clips[name]  # load or compile every clip before the first wake word
+
+    def stop(self):
+        self.cancel()
+        self.barge_in.stop()
+        self.mic.stop()
+        self.noise_floor.stop()
+        self.audio.stop()
+        self.servos.stop()
+
+    def move_eyes(self, action):
+        if action in self.clips:
+            return [self.clip_player.play(self.clips[action])]
+        if action == "saccade":
+            return self.servos.move_many({
+                0: random.randint(self.pan.min_angle, self.pan.max_angle),
+                1: random.randint(self.tilt.min_angle, self.tilt.max_angle),
+            }, 0.5)
+        angles, move_time = self.poses[action]
+        return self.servos.move_many(angles, move_time)
+
+    # --------- SPEECH ---------
+    def interrupt(self):
+        self.stop_talking.set()
+        self.audio.stop_all("speech")
+
+    def synthesize(self, text):
+        print("AI says:", text)
+        return self.phrase_cache.get(text)
+
+    # Barge-in stops the voice from the monitor thread (interrupt), so this
+    # only waits for it to end either way
+    def play_audio(self, sentence):
+        samples, reference = sentence
+        if self.stop_talking.is_set():
+            self.stop_talking.clear()
+            return False
+        voice = self.audio.play(samples, tag="speech", duck=True)
+        if self.stop_talking.is_set():
+            voice.stop()  # interrupted between the check and play()
+        self.barge_in.play_reference(reference)
+        if not voice.started.wait(0.5):
+            print("Audio output error: speech never started playing")
+            voice.stop()
+            self.barge_in.stop_reference()
+            return False
+        self.animator.start(reference, voice.start_time)
+        tracer.since_origin("first_audio")
+        try:
+            voice.wait()
+            if voice.stopped:
+                self.stop_talking.clear()
+                return False
+            return True
+        finally:
+            self.barge_in.stop_reference()
+            self.animator.stop()
+
+    # Plays each sentence as soon as it is synthesized while the rest of the
+    # reply is still streaming in. Returns the mic frame where the user barged
+    # in, or None if the reply played to the end.
+    def speak_stream(self, deltas):
+        self.stop_talking.clear()
+        self.barge_in.arm()
+        self.speech.speak(deltas)
+        self.barge_in.disarm()
+        if self.barge_in.triggered_at is not None:
+            print("Interrupted")
+        return self.barge_in.triggered_at
+
+    # --------- CHAT ---------
+    # Starts the reply from a stable partial transcript while the user is
+    # still talking (needs a backend with partials, i.e. vosk). Local commands
+    # and cached answers never go to the LLM, so they are not guessed at.
+    def speculate(self, text):
+        if self.router.route(text) or self.response_cache.peek(text):
+            return None
+        return self.llm.prefetch(self.memory.messages() + [{"role": "user", "content": text}])
+
+    def chat_with_gpt(self, prompt):
+        return "".join(self.chat_with_gpt_stream(prompt))
+
+    # Yields the reply as it streams in. Whatever got generated is kept in the
+    # history even if playback was cut short; canned fallbacks are not. Closing
+    # the generator early (a barge-in) cancels the LLM request.
+    # Repeated questions are answered from the response cache, whose
+    # sentences are still in the phrase cache, so they play without touching
+    # the network.
+    def chat_with_gpt_stream(self, prompt):
+        self.memory.add("user", prompt)
+        cached = self.response_cache.lookup(prompt)
+        if cached:
+            self.speculator.cancel()
+            self.memory.add("assistant", cached)
+            yield cached
             return
-        reply = chat_with_gpt(response)
-        speak(reply)
-
-# --------- WAKEWORD DETECTION ---------
-def listen_for_wakeword():
-    global conversation_active, last_interaction_time
-    recognizer = sr.Recognizer()
-    mic = sr.Microphone(device_index=MIC_DEVICE_INDEX)
-    print("Listening for wakeword...")
-
-    # ⏸ Reset eye movement + close lids while idle
-    stop_eye_thread()
-    center_eye()
-    close_eye()
-
-    while True:
+        start = time.monotonic()
+        reply = self.speculator.claim(prompt) or self.llm.stream(self.memory.messages())
+        response = ""
+        complete = False
         try:
-            with mic as source:
-                recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                audio = recognizer.listen(source, timeout=1, phrase_time_limit=2)
-            command = recognizer.recognize_google(audio).lower()
-            print("Heard:", command)
-            if WAKE_WORD in command:
-                last_interaction_time = time.time()
-                conversation_active = True
-                open_eye()
-
-                # 👁 Double blink
-                for _ in range(2):
-                    close_eye()
-                    time.sleep(0.05)
-                    open_eye()
-                    time.sleep(0.05)
-
-                start_eye_thread()
-                handle_chat()
-                return
-        except:
-            continue
+            for delta in reply:
+                response += delta
+                yield delta
+            complete = True
+        finally:
+            if not complete:
+                reply.cancel()
+            if response.strip() and reply.source != "canned":
+                self.memory.add("assistant", response.strip())
+                if complete:
+                    self.response_cache.store(prompt, response.strip(), time.monotonic() - start)
+
+    # --------- LISTEN ---------
+    def listen_for_audio(self, reader):
+        try:
+            transcript = listen(reader, self.stt, self.noise_floor, timeout=LISTENING_TIMEOUT,
+                                max_length=MAX_PHRASE_LENGTH, router=self.router,
+                                on_partial=self.speculator.partial)
+        except Exception as e:
+            print("Speech recognition error:", e)
+            transcript = None
+        if not transcript or self.router.route(transcript):
+            self.speculator.cancel()  # nothing for the LLM this turn
+        if not transcript:
+            print("Could not understand or timeout")
+            return None
+        print("You said:", transcript)
+        return transcript
+
+    # Local wake-word stage runs on every 20 ms frame of the shared mic
+    # stream; the speech recognizer only sees the last 2 s of audio after it
+    # fires.
+    def wakeword_heard(self, reader):
+        if not CONFIRM_WAKEWORD:
+            return True
+        clip = reader.last(2 * dsp.RATE // dsp.FRAME)
+        try:
+            with tracer.span("wake_confirm"):
+                command = self.stt.transcribe([clip]).lower()
+        except Exception as e:
+            print("Speech recognition error:", e)
+            return False
+        print("Heard:", command)
+        return WAKE_WORD in command
+
+    # --------- DRIVERS ---------
+    def wait_for_wakeword(self):
+        reader = self.wake_reader = self.mic.reader()
+        self.wakeword.reset()
+        while not self.cancelled.is_set():
+            frame = reader.read(timeout=0.5)
+            if frame is None:  # closed by cancel(), or the mic stalled
+                continue
+            if self.wakeword.process(frame) and self.wakeword_heard(reader):
+                if WAKE_EARCON:
+                    self.audio.play(earcon("wake"), tag="earcon")
+                return reader
+        return None
+
+    def listen(self, reader):
+        return self.listen_for_audio(reader)
+
+    def think(self, transcript):
+        return self.chat_with_gpt_stream(transcript)
+
+    def speak(self, deltas):
+        return self.speak_stream(deltas) is not None
+
+    def after_reply(self, reader, interrupted):
+        if interrupted:
+            reader.seek(self.barge_in.triggered_at - BARGE_IN_PREROLL)  # pick up what they said over us
+        else:
+            reader.skip_to_now()  # don't transcribe our own reply
+
+    def eyes(self, action):
+        return self.move_eyes(action)
+
+    def cancel(self):
+        self.cancelled.set()
+        if self.wake_reader is not None:
+            self.wake_reader.close()
 
 # --------- MAIN LOOP ---------
-if __name__ == "__main__":
-    pwm.setServoInstant(0, center_horizontal)
-    pwm.setServoInstant(1, center_vertical)
-    pwm.setServoInstant(2, 100)  # eyelid closed
-    pwm.setServoInstant(15, 80)  # eyelid closed
+def main():
+    bot = EyeBot()
+    bot.start()
+    assistant = Assistant(bot, conversation_timeout=CONVERSATION_TIMEOUT,
+                          stop_words=(), blink_chance=BLINK_CHANCE, router=bot.router)
+    try:
+        asyncio.run(assistant.run())
+    finally:
+        tracer.print_summary()
+        print("Speculation:", bot.speculator.summary())
+        print("Audio:", bot.audio.summary())
+        bot.stop()
+        if TRACE_FILE:
+            tracer.dump(TRACE_FILE)
 
-    while True:
-        listen_for_wakeword()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+import re
+from collections import deque
+
+# --------- PHRASE MATCHER ---------
+# Aho-Corasick automaton over words, so every phrase is found in one pass over
+# the transcript and "stop" never matches inside "stopwatch".
+def tokenize(text):
+    return re.findall(r"[a-z0-9']+", text.lower())
+
+class PhraseMatcher:
+    def __init__(self, phrases):
+        # phrases: iterable of (phrase, value)
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]  # node -> [(length in words, value)]
+        for phrase, value in phrases:
+            node = 0
+            words = tokenize(phrase)
+            for word in words:
+                if word not in self.goto[node]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                    self.goto[node][word] = len(self.goto) - 1
+                node = self.goto[node][word]
+            self.out[node].append((len(words), value))
+        # Breadth-first failure links
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for word, child in self.goto[node].items():
+                queue.append(child)
+                f = self.fail[node]
+                while f and word not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[child] = self.goto[f].get(word, 0)
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    # -> [(first word index, end word index, value)] in order of end position
+    def find(self, words):
+        node = 0
+        found = []
+        for i, word in enumerate(words):
+            while node and word not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(word, 0)
+            for length, value in self.out[node]:
+                found.append((i + 1 - length, i + 1, value))
+        return found
+
+# --------- NUMBERS ---------
+UNITS = {w: i for i, w in enumerate("zero one two three four five six seven eight nine ten eleven twelve "
+                                    "thirteen fourteen fifteen sixteen seventeen eighteen nineteen".split())}
+TENS = {w: 10 * (i + 2) for i, w in enumerate("twenty thirty forty fifty sixty seventy eighty ninety".split())}
+
+NUMBER = r"(?:\d+|(?:a |one )?hundred|(?:{})(?: (?:{}))?|{})".format(
+    "|".join(TENS), "|".join(list(UNITS)[1:10]), "|".join(UNITS))
+
+# "75", "seventy five" or "a hundred" -> int, None if the words aren't a number
+def parse_number(words):
+    if len(words) == 1 and words[0].isdigit():
+        return int(words[0])
+    total = 0
+    for word in words:
+        if word in UNITS:
+            total += UNITS[word]
+        elif word in TENS:
+            total += TENS[word]
+        elif word == "hundred":
+            total = max(total, 1) * 100
+        elif word not in ("a", "and"):
+            return None
+    return total if words else None
+
+# --------- INTENTS ---------
+# An intent fires when one of its phrases appears in the transcript. Slot
+# patterns are regexes run over the words after the phrase; every named group
+# is passed to the handler. With exact=True the phrase has to be the whole
+# utterance (for words like "stop"). session is None, "end" (back to the wake
+# word) or "exit" (quit). partial=True intents may fire on a partial
+# transcript, as soon as the phrase is the last thing said.
+class Intent:
+    def __init__(self, name, phrases, handler, slots=None, session=None, exact=False, partial=False):
+        self.name = name
+        self.phrases = phrases
+        self.handler = handler
+        self.slots = re.compile(slots + r"(?: please)?$") if slots else None
+        self.session = session
+        self.exact = exact
+        self.partial = partial
+
+class Match:
+    def __init__(self, intent, slots, text):
+        self.intent = intent
+        self.slots = slots
+        self.text = text
+
+    def __repr__(self):
+        return f"Match({self.intent.name!r}, {self.slots})"
+
+    # -> text to say, or None
+    def run(self):
+        return self.intent.handler(**self.slots)
+
+class IntentRouter:
+    def __init__(self, intents):
+        self.intents = list(intents)
+        self.priority = {intent: i for i, intent in enumerate(self.intents)}
+        self.matcher = PhraseMatcher((phrase, intent) for intent in self.intents for phrase in intent.phrases)
+
+    def route(self, text, partial=False):
+        words = tokenize(text)
+        found = self.matcher.find(words)
+        # Earlier intents in the list win, then earlier phrases in the utterance
+        found.sort(key=lambda f: (self.priority[f[2]], f[0]))
+        for start, end, intent in found:
+            if intent.exact and (start, end) != (0, len(words)):
+                continue
+            if partial and not (intent.partial and end == len(words)):
+                continue
+            slots = {}
+            if intent.slots:
+                match = intent.slots.match(" ".join(words[end:]))
+                if not match:
+                    continue
+                slots = {k: v for k, v in match.groupdict().items() if v is not None}
+            return Match(intent, slots, text)
+        return None
+
+# --------- DEFAULT INTENTS ---------
+# controls is whatever owns the hardware:
+#   eyes(action)       "open" / "close" / "center", returns futures
+#   look(direction)    "left" / "right" / "up" / "down", returns futures
+#   volume()           current level 0..1
+#   set_volume(level)
+#   now()              datetime
+def spoken_time(now):
+    hour = now.hour % 12 or 12
+    suffix = "in the morning" if now.hour < 12 else "in the afternoon" if now.hour < 18 else "in the evening"
+    if now.minute == 0:
+        return f"It's {hour} o'clock {suffix}."
+    return f"It's {hour}:{now.minute:02d} {suffix}."
+
+def build_intents(controls):
+    def tell_time():
+        return spoken_time(controls.now())
+
+    def tell_date():
+        now = controls.now()
+        return now.strftime("It's %A, %B ") + f"{now.day}."
+
+    def change_volume(direction=None, level=None):
+        if level is not None:
+            controls.set_volume(min(100, parse_number(level.split())) / 100)
+        elif direction in ("up", "louder"):
+            controls.set_volume(min(1.0, controls.volume() + 0.2))
+        elif direction in ("down", "quieter", "softer"):
+            controls.set_volume(max(0.0, controls.volume() - 0.2))
+        elif direction == "mute":
+            controls.set_volume(0.0)
+        return f"Volume {round(controls.volume() * 100)} percent."
+
+    def look(direction="center"):
+        controls.look({"at me": "center", "straight ahead": "center"}.get(direction, direction))
+
+    def eyes(action):
+        def handler():
+            controls.eyes(action)
+        return handler
+
+    return [
+        # Quits the program, so only ever on its own and on a final transcript:
+        # "how do I kill a process" is a question for the LLM
+        Intent("exit", ["kill", "shut down", "terminate"], lambda: "Terminating. Goodbye!",
+               session="exit", exact=True),
+        Intent("goodbye", ["goodbye", "bye bye", "end chat", "end the chat", "that's all"], lambda: "Goodbye.",
+               session="end", partial=True),
+        Intent("stop", ["stop", "stop it", "be quiet", "never mind"], lambda: None,
+               session="end", exact=True, partial=True),
+        Intent("time", ["what time is it", "what's the time", "tell me the time"], tell_time),
+        Intent("date", ["what day is it", "what's the date", "what is the date"], tell_date),
+        Intent("volume", ["volume", "turn it", "turn the volume", "speak", "be"],
+               change_volume,
+               slots=r"(?:to |at )?(?:(?P<direction>up|down|louder|quieter|softer)|(?P<level>" + NUMBER + r")(?: percent)?)"),
+        Intent("mute", ["mute", "mute yourself"], lambda: change_volume(direction="mute"), exact=True),
+        Intent("look", ["look", "turn", "eyes"], look,
+               slots=r"(?:to (?:the |your )?)?(?P<direction>left|right|up|down|center|straight ahead|at me)",
+               partial=True),
+        Intent("close_eyes", ["close your eyes", "shut your eyes", "go to sleep"], eyes("close"), partial=True),
+        Intent("open_eyes", ["open your eyes", "wake up"], eyes("open"), partial=True),
+    ]
@@ -0,0 +1,293 @@
+import time
+import queue
+import random
+import bisect
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, CancelledError, FIRST_COMPLETED, wait
+from tracing import tracer
+
+# --------- LATENCY HISTOGRAM ---------
+# Fixed log-spaced buckets, cheap enough to record every request
+class LatencyHistogram:
+    BOUNDS = (0.05, 0.1, 0.2, 0.35, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 8.0, 13.0)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds):
+        self.counts[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    # Upper bound of the bucket holding the q-th quantile
+    def percentile(self, q):
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.BOUNDS + (float("inf"),), self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "buckets": dict(zip([str(b) for b in self.BOUNDS] + ["inf"], self.counts)),
+        }
+
+# --------- BACKENDS ---------
+# open() starts one request and returns a generator of non-empty text deltas;
+# closing the generator abandons the request. `deadline` is how long the
+# gateway waits for the first delta, `attempts` how many requests it may have
+# in flight for one reply.
+class OpenAIBackend:
+    def __init__(self, name, model, api_key=None, base_url=None, deadline=4.0, attempts=2,
+                 pool=4, keepalive=120, connect_timeout=3.0):
+        import httpx
+        import openai
+        self.name = name
+        self.model = model
+        self.deadline = deadline
+        self.attempts = attempts
+        # One client for the life of the process, so turns reuse warm TLS
+        # connections. Retries are the gateway's job, not the SDK's. HTTP/2
+        # (needs the h2 package) keeps the connection when a stream is cut
+        # short; on HTTP/1.1 the SDK drops it after every streamed reply.
+        try:
+            import h2  # noqa: F401
+            http2 = True
+        except ImportError:
+            http2 = False
+        http_client = httpx.Client(
+            http2=http2,
+            limits=httpx.Limits(max_connections=pool, max_keepalive_connections=pool, keepalive_expiry=keepalive),
+            timeout=httpx.Timeout(deadline, connect=connect_timeout),
+        )
+        self.client = openai.OpenAI(api_key=api_key or openai.api_key or "none", base_url=base_url,
+                                    max_retries=0, http_client=http_client)
+
+    def open(self, messages, timeout):
+        stream = self.client.chat.completions.create(model=self.model, messages=messages,
+                                                     stream=True, timeout=timeout)
+        try:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            stream.close()
+
+    # Opens a pooled connection ahead of the first turn
+    def warm(self):
+        self.client.models.list()
+
+# Last resort that always answers, so the bot never goes silent
+class CannedBackend:
+    def __init__(self, responses=("Sorry, I couldn't process that.",), name="canned"):
+        self.name = name
+        self.responses = responses
+        self.deadline = 1.0
+        self.attempts = 1
+
+    def open(self, messages, timeout):
+        yield random.choice(self.responses)
+
+    def warm(self):
+        pass
+
+# --------- GATEWAY ---------
+# Tries each backend in order until one produces a first token in time. If a
+# request is still silent after `hedge_after` seconds a second identical one
+# is sent and whichever answers first wins; failed requests are retried
+# straight away while the deadline allows.
+class Reply:
+    def __init__(self, gateway, messages):
+        self.gateway = gateway
+        self.messages = messages
+        self.source = None  # name of the backend that answered
+        self.cancelled = Future()  # done once cancel() is called
+
+    def __iter__(self):
+        return self.gateway._run(self)
+
+    # Stops the reply at the next delta, or straight away while it is still
+    # waiting for the first one; the open requests are closed
+    def cancel(self):
+        if not self.cancelled.done():
+            self.cancelled.set_result(True)
+
+# A reply that starts streaming as soon as it is created, on its own thread,
+# e.g. a guess at the answer while the user is still talking. Iterating it
+# yields what has arrived so far, then the rest as it comes in.
+class Prefetch:
+    def __init__(self, gateway, messages):
+        self.reply = Reply(gateway, messages)
+        self.deltas = queue.Queue()
+        self.text = ""  # everything received so far
+        self.started = time.monotonic()
+        self.first_token = None  # when the first delta arrived
+        self.finished = threading.Event()
+        threading.Thread(target=self._pump, daemon=True).start()
+
+    @property
+    def source(self):
+        return self.reply.source
+
+    def cancel(self):
+        self.reply.cancel()
+
+    def __iter__(self):
+        while True:
+            delta = self.deltas.get()
+            if delta is None:
+                return
+            yield delta
+
+    def _pump(self):
+        deltas = iter(self.reply)
+        try:
+            for delta in deltas:
+                if self.first_token is None:
+                    self.first_token = time.monotonic()
+                self.text += delta
+                self.deltas.put(delta)
+        finally:
+            deltas.close()
+            self.deltas.put(None)
+            self.finished.set()
+
+class LLMGateway:
+    def __init__(self, backends, hedge_after=1.5, workers=6):
+        self.backends = list(backends)
+        self.hedge_after = hedge_after
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm")
+        self.lock = threading.Lock()
+        self.first_token = {b.name: LatencyHistogram() for b in self.backends}
+        self.total = {b.name: LatencyHistogram() for b in self.backends}
+        self.counters = {"requests": 0, "hedges": 0, "retries": 0, "errors": 0, "timeouts": 0, "fallbacks": 0,
+                         "cancelled": 0}
+
+    def count(self, key):
+        with self.lock:
+            self.counters[key] += 1
+
+    def warm(self):
+        for backend in self.backends:
+            try:
+                backend.warm()
+            except Exception as e:
+                print(f"LLM warm-up failed ({backend.name}):", e)
+
+    def stream(self, messages):
+        return Reply(self, messages)
+
+    def prefetch(self, messages):
+        return Prefetch(self, messages)
+
+    def complete(self, messages):
+        return "".join(self.stream(messages))
+
+    def stats(self):
+        with self.lock:
+            counters = dict(self.counters)
+        return {
+            **counters,
+            "first_token": {name: h.snapshot() for name, h in self.first_token.items()},
+            "total": {name: h.snapshot() for name, h in self.total.items()},
+        }
+
+    def _run(self, reply):
+        for i, backend in enumerate(self.backends):
+            if i:
+                self.count("fallbacks")
+            start = time.monotonic()
+            try:
+                deltas, first = self._first(backend, reply.messages, reply.cancelled)
+            except CancelledError:
+                self.count("cancelled")
+                return
+            except TimeoutError:
+                self.count("timeouts")
+                print(f"LLM timeout ({backend.name}) after {backend.deadline:.1f}s")
+                continue
+            except Exception as e:
+                self.count("errors")
+                print(f"LLM error ({backend.name}):", e)
+                continue
+            first_token = time.monotonic()
+            with self.lock:
+                self.first_token[backend.name].record(first_token - start)
+            tracer.record("llm_first_token", start, first_token)
+            reply.source = backend.name
+            try:
+                yield first
+                for delta in deltas:
+                    if reply.cancelled.done():
+                        self.count("cancelled")
+                        break
+                    yield delta
+            except Exception as e:
+                # Mid-reply failure: keep what was said rather than restart
+                self.count("errors")
+                print(f"LLM error ({backend.name}):", e)
+            finally:
+                deltas.close()
+                end = time.monotonic()
+                with self.lock:
+                    self.total[backend.name].record(end - start)
+                tracer.record("llm", start, end)
+            return
+
+    def _attempt(self, backend, messages, timeout):
+        deltas = backend.open(messages, timeout)
+        first = next(deltas, "")
+        return deltas, first
+
+    def _first(self, backend, messages, cancelled):
+        self.count("requests")
+        deadline = time.monotonic() + backend.deadline
+        pending = set()
+        launched = 0
+        next_hedge = 0.0
+        error = None
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            if launched < backend.attempts and (not pending or now >= next_hedge):
+                if launched:
+                    self.count("hedges" if pending else "retries")
+                pending.add(self.pool.submit(self._attempt, backend, messages, deadline - now))
+                launched += 1
+                next_hedge = now + self.hedge_after
+            wake = deadline if launched >= backend.attempts else min(deadline, next_hedge)
+            done, _ = wait(pending | {cancelled}, timeout=max(0.0, wake - time.monotonic()),
+                           return_when=FIRST_COMPLETED)
+            if cancelled.done():
+                self._abandon(pending)
+                raise CancelledError()
+            pending -= done
+            for future in done:
+                if future.exception() is None:
+                    self._abandon(pending)
+                    return future.result()
+                error = future.exception()
+            if not pending and launched >= backend.attempts:
+                raise error
+        self._abandon(pending)
+        raise TimeoutError(f"no response within {backend.deadline}s")
+
+    # Losing or late requests get closed whenever they do come back
+    @staticmethod
+    def _abandon(futures):
+        def close(future):
+            if future.exception() is None:
+                future.result()[0].close()
+        for future in futures:
+            future.add_done_callback(close)
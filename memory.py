@@ -0,0 +1,87 @@
+import re
+from collections import deque
+
+# --------- TOKEN ESTIMATE ---------
+# Close enough to the GPT tokenizers for budgeting: words cost about one token
+# per 4 characters, punctuation one each, plus a few tokens of per-message
+# overhead for the role and separators.
+TOKEN_PIECES = re.compile(r"\w+|[^\w\s]")
+MESSAGE_OVERHEAD = 4
+
+def estimate_tokens(text):
+    return MESSAGE_OVERHEAD + sum((len(p) + 3) // 4 for p in TOKEN_PIECES.findall(text))
+
+# The summary goes out as one system message under this header
+SUMMARY_HEADER = "Earlier in this conversation:\n"
+SUMMARY_OVERHEAD = estimate_tokens(SUMMARY_HEADER)
+
+def first_sentence(text, limit=120):
+    sentence = re.split(r"(?<=[.!?])\s", text.strip(), maxsplit=1)[0]
+    return sentence if len(sentence) <= limit else sentence[:limit].rsplit(" ", 1)[0] + "..."
+
+# Default summarizer: keeps the gist of each evicted turn as one line.
+# Runs in constant time per turn; swap in an LLM call for better summaries.
+def extractive_summary(turns):
+    return [f"{'User' if m['role'] == 'user' else 'You'}: {first_sentence(m['content'])}" for m in turns]
+
+# --------- CONVERSATION MEMORY ---------
+# Keeps the newest turns verbatim within `budget` tokens (system prompt and
+# summary included). Turns that no longer fit are folded into a running
+# summary of at most `summary_budget` tokens, oldest lines dropping off first.
+# Every message's token count is computed once when it is added.
+class ConversationMemory:
+    def __init__(self, system_prompt, budget=1500, summary_budget=300, summarize=extractive_summary, min_turns=2):
+        self.system = {"role": "system", "content": system_prompt}
+        self.system_tokens = estimate_tokens(system_prompt)
+        self.budget = budget
+        self.summary_budget = summary_budget
+        self.summarize = summarize
+        self.min_turns = min_turns
+        self.turns = deque()  # (message, tokens)
+        self.turn_tokens = 0
+        self.summary = deque()  # (line, tokens)
+        self.summary_tokens = 0
+
+    @property
+    def tokens(self):
+        summary = self.summary_tokens + SUMMARY_OVERHEAD if self.summary else 0
+        return self.system_tokens + summary + self.turn_tokens
+
+    def add(self, role, content):
+        tokens = estimate_tokens(content)
+        self.turns.append(({"role": role, "content": content}, tokens))
+        self.turn_tokens += tokens
+        self._fit()
+
+    def clear(self):
+        self.turns.clear()
+        self.turn_tokens = 0
+        self.summary.clear()
+        self.summary_tokens = 0
+
+    def messages(self):
+        messages = [self.system]
+        if self.summary:
+            lines = "\n".join(line for line, _ in self.summary)
+            messages.append({"role": "system", "content": SUMMARY_HEADER + lines})
+        messages.extend(message for message, _ in self.turns)
+        return messages
+
+    def _fit(self):
+        evicted = []
+        while self.tokens > self.budget and len(self.turns) > self.min_turns:
+            message, tokens = self.turns.popleft()
+            self.turn_tokens -= tokens
+            evicted.append(message)
+            # Summary lines will take some of the room back
+            if self.tokens + self.summary_budget - self.summary_tokens <= self.budget:
+                break
+        if not evicted:
+            return
+        for line in self.summarize(evicted):
+            tokens = estimate_tokens(line) - MESSAGE_OVERHEAD
+            self.summary.append((line, tokens))
+            self.summary_tokens += tokens
+        while self.summary and (self.summary_tokens > self.summary_budget or self.tokens > self.budget):
+            _, tokens = self.summary.popleft()
+            self.summary_tokens -= tokens
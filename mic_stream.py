@@ -0,0 +1,156 @@
+import threading
+import dsp
+
+try:
+    import speech_recognition as sr
+    AudioSource = sr.AudioSource
+except ImportError:  # ring and readers still work without it, e.g. replaying WAVs
+    AudioSource = object
+
+# --------- DEVICE LOOKUP ---------
+def find_input_device():
+    import pyaudio
+    p = pyaudio.PyAudio()
+    try:
+        for i in range(p.get_device_count()):
+            dev = p.get_device_info_by_index(i)
+            if "TKGOU" in dev["name"] or "USB" in dev["name"]:
+                return i
+        return None
+    finally:
+        p.terminate()
+
+# --------- RING BUFFER ---------
+# Fixed-size ring of 20 ms frames. Frames are numbered from 0 forever, a
+# frame lives in slot n % capacity until it is overwritten.
+class RingBuffer:
+    def __init__(self, seconds=10, frame_bytes=dsp.FRAME * 2):
+        self.frame_bytes = frame_bytes
+        self.capacity = int(seconds * dsp.RATE / dsp.FRAME)
+        self.buf = bytearray(self.capacity * frame_bytes)
+        self.view = memoryview(self.buf)
+        self.written = 0
+        self.cond = threading.Condition()
+
+    def write(self, data):
+        slot = self.written % self.capacity
+        with self.cond:
+            self.view[slot * self.frame_bytes:(slot + 1) * self.frame_bytes] = data
+            self.written += 1
+            self.cond.notify_all()
+
+    # Zero-copy view of frame n; only valid until the writer laps it
+    def frame(self, n):
+        slot = n % self.capacity
+        return self.view[slot * self.frame_bytes:(slot + 1) * self.frame_bytes]
+
+    def oldest(self):
+        return max(0, self.written - self.capacity + 1)
+
+# --------- READERS ---------
+# Each consumer reads at its own cursor. A reader that falls more than the
+# ring behind skips ahead to the oldest frame still held and counts the drop.
+class MicReader:
+    def __init__(self, ring, preroll=0.0):
+        self.ring = ring
+        self.cursor = max(ring.oldest(), ring.written - int(preroll * dsp.RATE / dsp.FRAME))
+        self.dropped = 0
+        self.closed = False
+
+    def read(self, timeout=None):
+        ring = self.ring
+        with ring.cond:
+            if not ring.cond.wait_for(lambda: self.cursor < ring.written or self.closed, timeout):
+                return None
+        if self.closed:
+            return None
+        oldest = ring.oldest()
+        if self.cursor < oldest:
+            self.dropped += oldest - self.cursor
+            self.cursor = oldest
+        frame = ring.frame(self.cursor)
+        self.cursor += 1
+        return frame
+
+    # Copy of the last n frames before the cursor, e.g. the clip that
+    # triggered the wake word
+    def last(self, n):
+        start = max(self.ring.oldest(), self.cursor - n)
+        return b"".join(self.ring.frame(i) for i in range(start, self.cursor))
+
+    def skip_to_now(self):
+        self.cursor = self.ring.written
+
+    def seek(self, n):
+        self.cursor = max(self.ring.oldest(), min(n, self.ring.written))
+
+    def close(self):
+        with self.ring.cond:
+            self.closed = True
+            self.ring.cond.notify_all()
+
+    def source(self):
+        return ReaderSource(self)
+
+# speech_recognition AudioSource on top of a reader, so Recognizer.listen and
+# adjust_for_ambient_noise work without opening their own device
+class ReaderSource(AudioSource):
+    def __init__(self, reader):
+        import pyaudio
+        self.reader = reader
+        self.stream = self
+        self.SAMPLE_RATE = dsp.RATE
+        self.SAMPLE_WIDTH = 2
+        self.CHUNK = dsp.FRAME
+        self.format = pyaudio.paInt16
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def read(self, size):
+        frame = self.reader.read(timeout=1)
+        return bytes(frame) if frame is not None else b"\x00" * (size * 2)
+
+# --------- CAPTURE THREAD ---------
+# Opens the mic once and keeps writing into the ring until stopped
+class MicStream:
+    def __init__(self, device_index, seconds=10):
+        self.device_index = device_index
+        self.ring = RingBuffer(seconds)
+        self.running = False
+        self.thread = None
+        self.overflows = 0
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._capture, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join()
+
+    def reader(self, preroll=0.0):
+        return MicReader(self.ring, preroll)
+
+    def _capture(self):
+        import pyaudio
+        p = pyaudio.PyAudio()
+        stream = p.open(format=pyaudio.paInt16, channels=1, rate=dsp.RATE, input=True,
+                        input_device_index=self.device_index, frames_per_buffer=dsp.FRAME)
+        try:
+            while self.running:
+                data = stream.read(dsp.FRAME, exception_on_overflow=False)
+                if len(data) < self.ring.frame_bytes:
+                    self.overflows += 1
+                    continue
+                self.ring.write(data)
+        finally:
+            stream.close()
+            p.terminate()
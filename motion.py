@@ -0,0 +1,185 @@
+import math
+import threading
+from functools import lru_cache
+from concurrent.futures import Future
+from clock import SYSTEM_CLOCK
+from tracing import tracer
+
+# --------- EASING CURVES ---------
+EASINGS = {
+    "linear": lambda p: p,
+    "cosine": lambda p: 0.5 - 0.5 * math.cos(p * math.pi),
+    "step": lambda p: float(p >= 1.0),  # hold, then jump on the last step
+}
+
+# Eased progress for every step of an n-step move, computed once per (curve, n)
+@lru_cache(maxsize=256)
+def easing_table(easing, steps):
+    ease = EASINGS[easing]
+    return tuple(ease(i / steps) for i in range(steps + 1))
+
+# --------- SERVO SCHEDULER ---------
+# One thread owns the PCA9685. Callers submit moves and get a Future back;
+# every active channel is interpolated on the same tick and written in one batch.
+# Tracks are precomputed angles, one per `period` from a start time (e.g. an
+# animation tied to audio or a compiled clip); they override moves on their
+# channels and the tick is lined up with them so each angle goes out on its
+# own timestamp. Precomputed PWM counts can ride along to skip the lookup.
+# Only every `trace_every`-th batch write is traced: at 50 ticks a second
+# they would push the per-turn spans out of the shared tracer's ring.
+class ServoScheduler:
+    def __init__(self, pwm, tick=0.02, clock=SYSTEM_CLOCK, trace_every=10):
+        self.pwm = pwm
+        self.tick = tick
+        self.clock = clock
+        self.trace_every = trace_every
+        self.writes = 0
+        self.moves = {}  # channel -> (start, target, t0, duration, table, future)
+        self.tracks = {}  # channel -> (start, period, angles, counts, future)
+        self.phase = None  # start time to line the next tick up with
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.wake.set()
+        if self.thread:
+            self.thread.join()
+        with self.lock:
+            for move in self.moves.values():
+                move[5].cancel()
+            self.moves.clear()
+            for track in self.tracks.values():
+                track[4].cancel()
+            self.tracks.clear()
+
+    def move(self, channel, angle, move_time=0.05, easing="cosine"):
+        target = self.pwm.servoProfile(channel).clamp(angle)
+        steps = max(1, int(move_time / self.tick + 0.5))
+        future = Future()
+        with self.lock:
+            start = getattr(self.pwm, f'last_angle_{channel}', target)
+            old = self.moves.pop(channel, None)
+            if old:
+                old[5].cancel()  # superseded by the new target
+            # Start one tick in: step 0 is where the servo already is, so the
+            # first tick after a move is submitted already moves it
+            t0 = self.clock.monotonic() - move_time / steps
+            self.moves[channel] = (start, target, t0, move_time, easing_table(easing, steps), future)
+        self.wake.set()
+        return future
+
+    def move_many(self, angles, move_time=0.05, easing="cosine"):
+        return [self.move(channel, angle, move_time, easing) for channel, angle in angles.items()]
+
+    # tracks: {channel: sequence of angles}, angle i is due at start + i * period.
+    # counts: optional {channel: sequence of PWM counts} matching the angles.
+    # The Future completes when every channel has played out, and is
+    # cancelled if all of them were stopped or taken over by another track.
+    def play_track(self, start, period, tracks, counts=None):
+        future = Future()
+        with self.lock:
+            for channel, angles in tracks.items():
+                self._end_track(channel, finished=False)
+                self.tracks[channel] = (start, period, angles, counts[channel] if counts else None, future)
+            self.phase = start
+        self.wake.set()
+        return future
+
+    def stop_track(self, channels=None):
+        with self.lock:
+            for channel in list(self.tracks if channels is None else channels):
+                self._end_track(channel, finished=False)
+
+    def wait(self, futures, timeout=None):
+        for future in futures:
+            try:
+                future.result(timeout)
+            except Exception:
+                pass
+
+    # Drop a channel's track; returns its Future once no other channel shares it
+    def _end_track(self, channel, finished):
+        track = self.tracks.pop(channel, None)
+        if track is None or any(other[4] is track[4] for other in self.tracks.values()):
+            return None
+        if not finished:
+            track[4].cancel()
+        return track[4]
+
+    def busy(self):
+        with self.lock:
+            return bool(self.moves or self.tracks)
+
+    # Last angle sent on a channel, None before the first
+    def angle(self, channel):
+        return getattr(self.pwm, f'last_angle_{channel}', None)
+
+    def _step(self, now):
+        pulses = {}
+        done = []
+        with self.lock:
+            for channel, (start, target, t0, duration, table, future) in self.moves.items():
+                steps = len(table) - 1
+                i = steps if duration <= 0 else min(steps, int((now - t0) / duration * steps))
+                angle = start + (target - start) * table[i]
+                pulses[channel] = (0, self.pwm.servoProfile(channel).pulse(angle))
+                setattr(self.pwm, f'last_angle_{channel}', angle)
+                if i == steps:
+                    done.append(channel)
+            finished = [self.moves.pop(channel)[5] for channel in done]
+            for channel, (start, period, angles, counts, future) in list(self.tracks.items()):
+                i = math.floor((now - start) / period + 0.5)  # int() would play frame 0 a tick early
+                if i >= len(angles):
+                    ended = self._end_track(channel, finished=True)
+                    if ended:
+                        finished.append(ended)
+                elif i >= 0:
+                    angle = self.pwm.servoProfile(channel).clamp(angles[i])
+                    count = int(counts[i]) if counts is not None else self.pwm.servoProfile(channel).pulse(angle)
+                    pulses[channel] = (0, count)
+                    setattr(self.pwm, f'last_angle_{channel}', angle)
+        if pulses:
+            self.writes += 1
+            if self.writes % self.trace_every:
+                self.pwm.setPWMChannels(pulses)
+            else:
+                with tracer.span("servo"):
+                    self.pwm.setPWMChannels(pulses)
+        for future in finished:
+            if future.set_running_or_notify_cancel():
+                future.set_result(True)
+
+    def _loop(self):
+        next_tick = self.clock.monotonic()
+        while self.running:
+            if not self.busy():
+                self.wake.wait()
+                self.wake.clear()
+                next_tick = self.clock.monotonic()
+                continue
+            if self.phase is not None:
+                phase, self.phase = self.phase, None
+                next_tick = phase + math.ceil((self.clock.monotonic() - phase) / self.tick) * self.tick
+                delay = next_tick - self.clock.monotonic()
+                if delay > 0:
+                    self.clock.sleep(delay)
+            now = self.clock.monotonic()
+            self._step(now)
+            if not self.busy():
+                continue  # back to waiting, so the next move starts without a tick of delay
+            next_tick += self.tick
+            delay = next_tick - self.clock.monotonic()
+            if delay > 0:
+                self.clock.sleep(delay)
+            else:
+                next_tick = self.clock.monotonic()
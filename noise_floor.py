@@ -0,0 +1,58 @@
+import threading
+import dsp
+
+# --------- NOISE FLOOR ESTIMATOR ---------
+# Tracks the background level continuously from frames that are not speech,
+# so recognizers can use the current threshold instead of spending time on
+# adjust_for_ambient_noise before every listen. Levels are int16 RMS, the
+# same units as Recognizer.energy_threshold.
+class NoiseFloor:
+    def __init__(self, alpha=0.05, ratio=1.5, initial=300, minimum=50, hold=5.0):
+        self.alpha = alpha
+        self.ratio = ratio  # threshold = noise level * ratio
+        self.minimum = minimum
+        self.level = initial / ratio
+        self.hold_frames = int(hold * dsp.RATE / dsp.FRAME)
+        self.loud_frames = 0
+        self.running = False
+        self.thread = None
+
+    @property
+    def threshold(self):
+        return max(self.minimum, self.level * self.ratio)
+
+    def is_speech(self, energy):
+        return energy > self.threshold
+
+    def update(self, frame):
+        energy = float(dsp.rms(frame)) * 32768
+        if not self.is_speech(energy):
+            self.loud_frames = 0
+            self.level += self.alpha * (energy - self.level)
+            return False
+        # Nothing but "speech" for several seconds means the room got louder
+        self.loud_frames += 1
+        if self.loud_frames > self.hold_frames:
+            self.level += self.alpha * 0.1 * (energy - self.level)
+        return True
+
+    def apply(self, recognizer):
+        recognizer.energy_threshold = self.threshold
+        recognizer.dynamic_energy_threshold = False
+        return recognizer
+
+    def start(self, mic):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._loop, args=(mic.reader(),), daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+
+    def _loop(self, reader):
+        while self.running:
+            frame = reader.read(timeout=1)
+            if frame is not None:
+                self.update(frame)
@@ -0,0 +1,131 @@
+import math
+from calibration import DEFAULT_PROFILE
+from motion import easing_table
+from clock import SYSTEM_CLOCK
+
+# --------- PCA9685 CLASS ---------
+class PCA9685:
+    __MODE1 = 0x00
+    __PRESCALE = 0xFE
+    __LED0_ON_L = 0x06
+    __LED0_ON_H = 0x07
+    __LED0_OFF_L = 0x08
+    __LED0_OFF_H = 0x09
+    __ALL_LED_ON_L = 0xFA
+    __AI = 0x20  # MODE1 register auto-increment bit
+    __BLOCK_CHANNELS = 8  # SMBus block writes max out at 32 bytes = 8 channels
+
+    # bus is anything with the smbus calls, e.g. servo_sim.SoftPCA9685 off the Pi
+    def __init__(self, address=0x40, bus=None, auto_increment=True, profiles=None, clock=SYSTEM_CLOCK):
+        if bus is None:
+            import smbus  # only on the Pi
+            bus = smbus.SMBus(1)
+        self.bus = bus
+        self.address = address
+        self.clock = clock
+        self.profiles = profiles or {}
+        self.auto_increment = auto_increment
+        self.shadow = [None] * 64  # last value sent to each LED register, None = unknown
+        self.transactions = 0
+        self.writes_sent = 0
+        self.writes_skipped = 0
+        self.write(self.__MODE1, self.__AI if auto_increment else 0x00)
+
+    def write(self, reg, value):
+        self.bus.write_byte_data(self.address, reg, value)
+        self.transactions += 1
+
+    def writeBlock(self, reg, values):
+        self.bus.write_i2c_block_data(self.address, reg, values)
+        self.transactions += 1
+
+    # Write LED registers starting at reg, sending only the bytes that differ
+    # from the shadow copy. With auto-increment the changed span is one block.
+    def writeLED(self, reg, data):
+        base = reg - self.__LED0_ON_L
+        changed = [i for i, value in enumerate(data) if self.shadow[base + i] != value]
+        if not changed:
+            self.writes_skipped += len(data)
+            return
+        if self.auto_increment:
+            first, last = changed[0], changed[-1]
+            self.writeBlock(reg + first, data[first:last + 1])
+            sent = last + 1 - first
+        else:
+            for i in changed:
+                self.write(reg + i, data[i])
+            sent = len(changed)
+        self.writes_sent += sent
+        self.writes_skipped += len(data) - sent
+        self.shadow[base:base + len(data)] = data
+
+    # Forget the shadow copy, e.g. after the chip was reset by someone else
+    def invalidateShadow(self):
+        self.shadow = [None] * 64
+
+    def setPWMFreq(self, freq):
+        prescaleval = 25000000.0 / 4096.0 / float(freq) - 1
+        prescale = math.floor(prescaleval + 0.5)
+        oldmode = self.bus.read_byte_data(self.address, self.__MODE1)
+        self.write(self.__MODE1, oldmode & 0x7F | 0x10)
+        self.write(self.__PRESCALE, int(prescale))
+        self.write(self.__MODE1, oldmode)
+        self.clock.sleep(0.005)
+        self.write(self.__MODE1, oldmode | 0x80)
+
+    def setPWM(self, channel, on, off):
+        self.writeLED(self.__LED0_ON_L + 4 * channel, [on & 0xFF, on >> 8, off & 0xFF, off >> 8])
+
+    # Update a run of adjacent channels starting at first_channel.
+    # pulses is a list of (on, off) pairs, one per channel.
+    def setPWMBlock(self, first_channel, pulses):
+        for start in range(0, len(pulses), self.__BLOCK_CHANNELS):
+            data = []
+            for on, off in pulses[start:start + self.__BLOCK_CHANNELS]:
+                data += [on & 0xFF, on >> 8, off & 0xFF, off >> 8]
+            self.writeLED(self.__LED0_ON_L + 4 * (first_channel + start), data)
+
+    # Same pulse on every channel through the ALL_LED registers
+    def setAllPWM(self, on, off):
+        data = [on & 0xFF, on >> 8, off & 0xFF, off >> 8]
+        if self.auto_increment:
+            self.writeBlock(self.__ALL_LED_ON_L, data)
+        else:
+            for i, value in enumerate(data):
+                self.write(self.__ALL_LED_ON_L + i, value)
+        self.writes_sent += len(data)
+        self.shadow = data * 16
+
+    # Update any set of channels, {channel: (on, off)}, merging adjacent
+    # channels into shared block writes
+    def setPWMChannels(self, pulses):
+        run = []
+        for channel in sorted(pulses):
+            if run and channel != run[0] + len(run):
+                self.setPWMBlock(run[0], [pulses[c] for c in run])
+                run = []
+            run.append(channel)
+        if run:
+            self.setPWMBlock(run[0], [pulses[c] for c in run])
+
+    def servoProfile(self, channel):
+        return self.profiles.get(channel, DEFAULT_PROFILE)
+
+    def setServoInstant(self, channel, angle):
+        profile = self.servoProfile(channel)
+        angle = profile.clamp(angle)
+        self.setPWM(channel, 0, profile.pulse(angle))
+        setattr(self, f'last_angle_{channel}', angle)
+
+    def setServoAngle(self, channel, target_angle, move_time=0.05, step_size=1):
+        profile = self.servoProfile(channel)
+        target_angle = profile.clamp(target_angle)
+        current_angle = getattr(self, f'last_angle_{channel}', target_angle)
+        steps = int(abs(target_angle - current_angle) // step_size)
+        if steps == 0: return
+        speed = easing_table("cosine", steps)
+        for i in range(steps + 1):
+            angle = current_angle + (target_angle - current_angle) * i / steps
+            self.setPWM(channel, 0, profile.pulse(angle))
+            self.clock.sleep((move_time / steps) * speed[i])
+        setattr(self, f'last_angle_{channel}', target_angle)
@@ -0,0 +1,135 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict, Counter
+from tracing import tracer
+
+# --------- CONFIG ---------
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "phrase_cache")
+
+# --------- PHRASE CACHE ---------
+# Content-addressed cache of synthesized speech keyed on (text, voice, lang).
+#   memory: LRU of decoded audio, bounded by max_items, pinned phrases included
+#   held:   encoded audio of pinned phrases evicted from memory, decoded again
+#           on their next use instead of going back to TTS
+#   disk:   encoded audio in CACHE_DIR, survives restarts
+# fetch(text, lang) returns encoded bytes (the network call), decode(bytes)
+# turns them into something playable. A phrase only goes to disk once it has
+# been asked for twice or was warmed, so one-off LLM sentences never do.
+# Disk reads and writes happen outside the lock, so a slow SD card only holds
+# up the speaker that needs that file.
+class PhraseCache:
+    def __init__(self, fetch, decode, voice="gtts", lang="en", max_items=64,
+                 directory=CACHE_DIR, max_files=500, persist_after=2):
+        self.fetch = fetch
+        self.decode = decode
+        self.voice = voice
+        self.lang = lang
+        self.max_items = max_items
+        self.directory = directory
+        self.max_files = max_files
+        self.persist_after = persist_after
+        self.memory = OrderedDict()  # key -> [audio, data, uses]
+        self.pinned = Counter()  # key -> number of holders
+        self.held = {}  # key -> encoded audio
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "held_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, text):
+        return hashlib.sha1(f"{self.voice}\0{self.lang}\0{text}".encode()).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".mp3")
+
+    def get(self, text):
+        key = self.key(text)
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry:
+                self.memory.move_to_end(key)
+                self.stats["hits"] += 1
+                entry[2] += 1
+                audio, data, save = entry[0], entry[1], entry[2] == self.persist_after
+            else:
+                data = self.held.get(key)
+        if entry:
+            if save:
+                self._save(key, data)
+            return audio
+        path = self.path(key)
+        if data is not None:
+            source, uses = "held_hits", self.persist_after
+        elif os.path.exists(path):
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # disk tier is pruned by last use
+            source, uses = "disk_hits", self.persist_after
+        else:
+            with tracer.span("tts"):
+                data = self.fetch(text, self.lang)
+            source, uses = "misses", 1
+        with tracer.span("decode"):
+            audio = self.decode(data)
+        with self.lock:
+            self.stats[source] += 1
+            self.memory[key] = [audio, data, uses]
+            self.held.pop(key, None)
+            self._evict()
+        return audio
+
+    # Synthesize known system phrases up front and pin them for good. A phrase
+    # that can't be fetched now (offline, TTS down) is skipped: it is only
+    # slower the first time it is said.
+    def warm(self, phrases):
+        for text in phrases:
+            key = self.key(text)
+            try:
+                self.get(text)
+            except Exception as e:
+                print("Phrase cache error:", text, e)
+                continue
+            with self.lock:
+                self.pinned[key] += 1
+                entry = self.memory.get(key)
+                data = entry[1] if entry else self.held.get(key)
+            if data is not None and not os.path.exists(self.path(key)):
+                self._save(key, data)
+
+    # Keep a phrase from going back to TTS while someone (e.g. a cached reply) holds it
+    def pin(self, text):
+        with self.lock:
+            self.pinned[self.key(text)] += 1
+
+    def unpin(self, text):
+        key = self.key(text)
+        with self.lock:
+            self.pinned[key] -= 1
+            if self.pinned[key] <= 0:
+                del self.pinned[key]
+                self.held.pop(key, None)
+            self._evict()
+
+    # Least recently used first, pinned or not; pinned phrases keep their
+    # encoded audio so they never need TTS again
+    def _evict(self):
+        while len(self.memory) > self.max_items:
+            key, (_, data, _) = self.memory.popitem(last=False)
+            if key in self.pinned:
+                self.held[key] = data
+            self.stats["evictions"] += 1
+
+    # Called without the lock; two threads may save or prune at once
+    def _save(self, key, data):
+        tmp = f"{self.path(key)}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self.path(key))
+            files = [os.path.join(self.directory, n) for n in os.listdir(self.directory) if n.endswith(".mp3")]
+            if len(files) > self.max_files:
+                files.sort(key=lambda path: os.path.getmtime(path) if os.path.exists(path) else 0)
+                for old in files[:len(files) - self.max_files]:
+                    os.remove(old)
+        except OSError as e:
+            print("Phrase cache error:", e)
@@ -0,0 +1,148 @@
+import re
+import time
+import zlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from tts import split_sentences
+
+# --------- NORMALIZATION ---------
+FILLER = {"um", "uh", "er", "hey", "hi", "please", "so", "well", "okay", "ok", "like", "just", "the", "a", "an"}
+# Answers to these go stale, never serve them from the cache
+VOLATILE = {"time", "today", "tonight", "tomorrow", "yesterday", "date", "day", "now", "weather", "news", "latest"}
+
+def normalize(text):
+    words = re.findall(r"[a-z0-9']+", text.lower())
+    return " ".join(w for w in words if w not in FILLER) or " ".join(words)
+
+# --------- EMBEDDING ---------
+# Hashed bag of words plus character trigrams, L2-normalized. Close enough to
+# catch "who are you" vs "who are you exactly" without a model on the Pi.
+DIM = 512
+
+def embed(text, dim=DIM):
+    vector = np.zeros(dim, dtype=np.float32)
+    for word in text.split():
+        vector[zlib.crc32(word.encode()) % dim] += 2.0
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            vector[zlib.crc32(padded[i:i + 3].encode()) % dim] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+# Whether two close questions still ask different things: one swaps a word of
+# the other for another (a name, a number), or adds or drops a number.
+# "set a timer for 5 minutes" and "... 15 minutes" embed close together but
+# want different answers; "who are you exactly" can share "who are you"'s.
+def changes_meaning(a, b):
+    a, b = set(a.split()), set(b.split())
+    added, dropped = b - a, a - b
+    return bool(added and dropped) or any(c.isdigit() for word in added | dropped for c in word)
+
+# --------- RESPONSE CACHE ---------
+# Maps normalized transcripts to earlier replies. Lookup tries the exact key
+# first, then the nearest stored question by cosine similarity that does not
+# change its meaning (see changes_meaning). Entries expire after `ttl` seconds
+# and the least recently used go once there are more than max_items. With an
+# `audio` PhraseCache the reply's sentences stay pinned in it for as long as
+# the entry lives, so a hit skips both the LLM and TTS.
+class ResponseCache:
+    def __init__(self, threshold=0.85, ttl=3600, max_items=128, audio=None, clock=time.monotonic):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_items = max_items
+        self.audio = audio
+        self.clock = clock
+        self.entries = OrderedDict()  # key -> [reply, vector, created, latency, sentences]
+        self.matrix = None  # stacked vectors, rebuilt after changes
+        self.keys = []
+        self.lock = threading.Lock()
+        self.stats = {"lookups": 0, "hits": 0, "near_hits": 0, "misses": 0,
+                      "stores": 0, "expired": 0, "evictions": 0, "saved_seconds": 0.0}
+
+    @property
+    def hit_rate(self):
+        return self.stats["hits"] / self.stats["lookups"] if self.stats["lookups"] else 0.0
+
+    @staticmethod
+    def cacheable(key):
+        return bool(key) and not VOLATILE.intersection(key.split())
+
+    def lookup(self, transcript):
+        key = normalize(transcript)
+        with self.lock:
+            self.stats["lookups"] += 1
+            self._expire()
+            if not self.cacheable(key):
+                self.stats["misses"] += 1
+                return None
+            if key not in self.entries:
+                key = self._nearest(key)
+            if key is None:
+                self.stats["misses"] += 1
+                return None
+            entry = self.entries[key]
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            self.stats["saved_seconds"] += entry[3]
+            return entry[0]
+
+    # Whether lookup() would hit, without counting it or touching the LRU order
+    def peek(self, transcript):
+        key = normalize(transcript)
+        with self.lock:
+            if not self.cacheable(key):
+                return False
+            return key in self.entries or self._nearest(key, count=False) is not None
+
+    # latency: how long the reply took to generate, credited on every hit
+    def store(self, transcript, reply, latency=0.0):
+        key = normalize(transcript)
+        if not self.cacheable(key) or not reply.strip():
+            return
+        sentences = list(split_sentences([reply]))
+        with self.lock:
+            if key in self.entries:
+                self._drop(key)
+            self.entries[key] = [reply, embed(key), self.clock(), latency, sentences]
+            if self.audio:
+                for sentence in sentences:
+                    self.audio.pin(sentence)
+            self.stats["stores"] += 1
+            while len(self.entries) > self.max_items:
+                self._drop(next(iter(self.entries)))
+                self.stats["evictions"] += 1
+            self.matrix = None
+
+    def _nearest(self, key, count=True):
+        if not self.entries:
+            return None
+        if self.matrix is None:
+            self.keys = list(self.entries)
+            self.matrix = np.stack([self.entries[k][1] for k in self.keys])
+        scores = self.matrix @ embed(key)
+        for i in np.argsort(-scores):
+            if scores[i] < self.threshold:
+                break
+            if not changes_meaning(key, self.keys[i]):
+                if count:
+                    self.stats["near_hits"] += 1
+                return self.keys[i]
+        return None
+
+    def _expire(self):
+        now = self.clock()
+        # Insertion order is not creation order once entries are touched, so check them all
+        stale = [k for k, entry in self.entries.items() if now - entry[2] > self.ttl]
+        for key in stale:
+            self._drop(key)
+            self.stats["expired"] += 1
+        if stale:
+            self.matrix = None
+
+    def _drop(self, key):
+        entry = self.entries.pop(key)
+        if self.audio:
+            for sentence in entry[4]:
+                self.audio.unpin(sentence)
+        self.matrix = None
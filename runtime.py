@@ -0,0 +1,256 @@
+import enum
+import random
+import asyncio
+from clock import SYSTEM_CLOCK
+
+# --------- STATES ---------
+class State(enum.Enum):
+    IDLE = "idle"            # lids closed, waiting for the wake word
+    AWAKE = "awake"          # wake word heard, eyes opening
+    LISTENING = "listening"  # capturing what the user says
+    THINKING = "thinking"    # waiting for the first words of the reply
+    SPEAKING = "speaking"    # reply playing
+
+# --------- DRIVERS ---------
+# Everything that touches hardware or the network goes through a driver object.
+# Blocking calls run in the executor; eye calls must not block and return a
+# list of concurrent.futures.Future (e.g. from ServoScheduler.move_many) that
+# the runtime awaits. Tests pass in fakes.
+class Drivers:
+    def wait_for_wakeword(self):
+        # -> context that is handed back to listen()/after_reply()
+        raise NotImplementedError
+
+    def listen(self, context):
+        # -> transcript, or None on silence/failure
+        raise NotImplementedError
+
+    def think(self, transcript):
+        # -> iterator of reply text deltas
+        raise NotImplementedError
+
+    def speak(self, deltas):
+        # -> True if the user talked over the reply
+        raise NotImplementedError
+
+    def after_reply(self, context, interrupted):
+        pass
+
+    def eyes(self, action):
+        # action is "open", "close", "center", "saccade", or a clip such as
+        # "blink" / "double_blink"
+        return []
+
+    def cancel(self):
+        # Called when the runtime stops; must make any blocking call still in
+        # the executor (above all wait_for_wakeword) return soon
+        pass
+
+# --------- RUNTIME ---------
+# One asyncio loop owns the conversation. Blocking driver calls are started as
+# tasks that put their result on the event queue; the loop only ever awaits
+# that queue, so nothing is polled and idle costs nothing but the wake-word
+# stage itself.
+class Assistant:
+    def __init__(self, drivers, conversation_timeout=15, stop_words=("goodbye",),
+                 goodbye_phrases=("Goodbye.", "Okay, I'm listening again."),
+                 blink_chance=0.1, router=None, wake_retry=1.0, max_wake_failures=5, clock=SYSTEM_CLOCK):
+        self.drivers = drivers
+        self.router = router
+        self.conversation_timeout = conversation_timeout
+        self.stop_words = stop_words
+        self.goodbye_phrases = goodbye_phrases
+        self.blink_chance = blink_chance
+        self.wake_retry = wake_retry  # seconds before retrying a failed wake-word stage, doubled each time
+        self.max_wake_failures = max_wake_failures
+        self.wake_failures = 0
+        self.wake_retry_handle = None
+        self.clock = clock
+        self.state = State.IDLE
+        self.events = None  # made in run(), on the loop that reads it
+        self.context = None
+        self.last_interaction = clock.monotonic()
+        self.eye_task = None
+        self.tasks = set()  # driver calls started by submit() and not finished yet
+        self.history = []  # (time, state) for every transition
+
+    def set_state(self, state):
+        self.state = state
+        self.history.append((self.clock.monotonic(), state))
+
+    async def blocking(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    # Start a blocking driver call whose result arrives as an event
+    def submit(self, kind, func, *args):
+        async def run():
+            try:
+                result = await self.blocking(func, *args)
+            except Exception as e:
+                print(f"{kind} failed:", e)
+                result = None
+            await self.events.put((kind, result))
+        task = asyncio.ensure_future(run())
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def eyes(self, action):
+        futures = self.drivers.eyes(action)
+        if futures:
+            await asyncio.gather(*(asyncio.wrap_future(f) for f in futures), return_exceptions=True)
+
+    async def blink(self):
+        await self.eyes("blink")
+
+    async def look_around(self):
+        while True:
+            await self.eyes("saccade")
+            if random.random() < self.blink_chance:
+                await self.blink()
+            await asyncio.sleep(self.clock.real(1))
+
+    def start_eyes(self):
+        if self.eye_task is None:
+            self.eye_task = asyncio.ensure_future(self.look_around())
+
+    async def stop_eyes(self):
+        if self.eye_task is not None:
+            self.eye_task.cancel()
+            await asyncio.gather(self.eye_task, return_exceptions=True)
+            self.eye_task = None
+
+    # --------- TRANSITIONS ---------
+    async def go_idle(self):
+        await self.stop_eyes()
+        await self.eyes("center")
+        await self.eyes("close")
+        self.set_state(State.IDLE)
+        print("Listening for wakeword...")
+        self.submit("wake", self.drivers.wait_for_wakeword)
+
+    async def go_listening(self):
+        self.set_state(State.LISTENING)
+        self.submit("heard", self.drivers.listen, self.context)
+
+    async def on_wake(self, context):
+        if context is None:  # wake-word stage failed or the mic closed
+            self.wake_failures += 1
+            if self.wake_failures >= self.max_wake_failures:
+                print("Wake-word stage keeps failing, stopping")
+                self.stop()
+                return
+            delay = self.wake_retry * 2 ** (self.wake_failures - 1)
+            self.wake_retry_handle = asyncio.get_running_loop().call_later(
+                self.clock.real(delay), self.submit, "wake", self.drivers.wait_for_wakeword)
+            return
+        self.wake_failures = 0
+        self.set_state(State.AWAKE)
+        self.context = context
+        self.last_interaction = self.clock.monotonic()
+        await self.eyes("open")
+        await self.eyes("double_blink")
+        self.start_eyes()
+        await self.go_listening()
+
+    async def on_heard(self, transcript):
+        if not transcript:
+            if self.clock.monotonic() - self.last_interaction > self.conversation_timeout:
+                await self.go_idle()
+            else:
+                await self.go_listening()
+            return
+        self.last_interaction = self.clock.monotonic()
+        match = self.router.route(transcript) if self.router else None
+        if match:
+            await self.on_intent(match)
+            return
+        if any(word in transcript for word in self.stop_words):
+            await self.stop_eyes()
+            await self.eyes("center")
+            await self.eyes("close")
+            self.set_state(State.SPEAKING)
+            for phrase in self.goodbye_phrases:
+                await self.blocking(self.drivers.speak, [phrase])
+            await self.go_idle()
+            return
+        self.set_state(State.THINKING)
+        self.submit("reply", self.first_delta, transcript)
+
+    # Local command: act and answer without going to the LLM
+    async def on_intent(self, match):
+        print("Intent:", match.intent.name, match.slots)
+        session = match.intent.session
+        if session:
+            await self.stop_eyes()
+            await self.eyes("center")
+            await self.eyes("close")
+        try:
+            reply = await self.blocking(match.run)
+        except Exception as e:
+            print("intent failed:", e)
+            reply = None
+        if reply:
+            self.set_state(State.SPEAKING)
+            await self.blocking(self.drivers.speak, [reply])
+        if session == "exit":
+            self.stop()
+        elif session == "end":
+            await self.go_idle()
+        else:
+            self.last_interaction = self.clock.monotonic()
+            await self.blocking(self.drivers.after_reply, self.context, False)
+            await self.go_listening()
+
+    # Runs in the executor: wait for the first piece of the reply so THINKING
+    # lasts exactly as long as the LLM's time to first token
+    def first_delta(self, transcript):
+        deltas = iter(self.drivers.think(transcript))
+        first = next(deltas, "")
+        return first, deltas
+
+    async def on_reply(self, reply):
+        if reply is None:
+            await self.go_listening()
+            return
+        first, deltas = reply
+        self.set_state(State.SPEAKING)
+        self.submit("spoken", self.drivers.speak, self._chain(first, deltas))
+
+    @staticmethod
+    def _chain(first, deltas):
+        yield first
+        yield from deltas
+
+    async def on_spoken(self, interrupted):
+        self.last_interaction = self.clock.monotonic()
+        await self.blocking(self.drivers.after_reply, self.context, bool(interrupted))
+        await self.go_listening()
+
+    HANDLERS = {"wake": on_wake, "heard": on_heard, "reply": on_reply, "spoken": on_spoken}
+
+    # Whether it ends on a stop event or is cancelled (Ctrl-C in asyncio.run),
+    # no driver call outlives it: the executor is only shut down once they
+    # have all returned
+    async def run(self, max_events=None):
+        self.events = asyncio.Queue()
+        try:
+            await self.go_idle()
+            handled = 0
+            while max_events is None or handled < max_events:
+                kind, payload = await self.events.get()
+                if kind == "stop":
+                    break
+                await self.HANDLERS[kind](self, payload)
+                handled += 1
+        finally:
+            if self.wake_retry_handle is not None:
+                self.wake_retry_handle.cancel()
+            self.drivers.cancel()
+            for task in list(self.tasks):
+                task.cancel()
+            await self.stop_eyes()
+
+    def stop(self):
+        if self.events is not None:
+            self.events.put_nowait(("stop", None))
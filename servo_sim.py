@@ -0,0 +1,114 @@
+from clock import SYSTEM_CLOCK
+
+# --------- SOFTWARE PCA9685 ---------
+# Stands in for smbus.SMBus with a PCA9685 on the other end, so PCA9685 and
+# everything above it run without the board:
+#   - 256-byte register file with the chip's power-on values
+#   - MODE1 auto-increment: block writes walk the registers, or all land on
+#     the first one when AI is off
+#   - PRESCALE only takes a write while the oscillator sleeps
+#   - ALL_LED registers fan out to every channel
+# Every transaction goes to `log` as (time, register, [bytes]) and every pulse
+# change to `timeline` as (time, channel, pulse in microseconds).
+class SoftPCA9685:
+    MODE1 = 0x00
+    MODE2 = 0x01
+    LED0_ON_L = 0x06
+    ALL_LED_ON_L = 0xFA
+    PRESCALE = 0xFE
+    RESTART = 0x80
+    AI = 0x20
+    SLEEP = 0x10
+    OSCILLATOR = 25000000
+
+    def __init__(self, address=0x40, clock=SYSTEM_CLOCK):
+        self.address = address
+        self.clock = clock
+        self.regs = [0] * 256
+        self.regs[self.MODE1] = self.SLEEP | 0x01  # asleep, ALLCALL
+        self.regs[self.MODE2] = 0x04
+        self.regs[self.PRESCALE] = 0x1E  # 200 Hz
+        for channel in range(16):
+            self.regs[self.LED0_ON_L + 4 * channel + 3] = 0x10  # full off
+        self.log = []
+        self.timeline = []
+        self.ignored = 0  # writes the chip would drop, e.g. PRESCALE while awake
+
+    # --------- SMBUS INTERFACE ---------
+    def write_byte_data(self, address, reg, value):
+        self._write(address, reg, [value])
+
+    def write_i2c_block_data(self, address, reg, values):
+        self._write(address, reg, list(values))
+
+    def read_byte_data(self, address, reg):
+        self._check(address)
+        return self.regs[reg]
+
+    def read_i2c_block_data(self, address, reg, length):
+        self._check(address)
+        if self.auto_increment:
+            return [self.regs[(reg + i) & 0xFF] for i in range(length)]
+        return [self.regs[reg]] * length
+
+    # --------- STATE ---------
+    @property
+    def auto_increment(self):
+        return bool(self.regs[self.MODE1] & self.AI)
+
+    @property
+    def sleeping(self):
+        return bool(self.regs[self.MODE1] & self.SLEEP)
+
+    @property
+    def freq(self):
+        return self.OSCILLATOR / (4096.0 * (self.regs[self.PRESCALE] + 1))
+
+    def counts(self, channel):
+        reg = self.LED0_ON_L + 4 * channel
+        on = self.regs[reg] | (self.regs[reg + 1] & 0x1F) << 8
+        off = self.regs[reg + 2] | (self.regs[reg + 3] & 0x1F) << 8
+        return on, off
+
+    # High time of one output in microseconds, with the full-on/full-off bits
+    def pulse(self, channel):
+        on, off = self.counts(channel)
+        period = 1000000.0 / self.freq
+        if off & 0x1000:
+            return 0.0
+        if on & 0x1000:
+            return period
+        return ((off - on) % 4096) * period / 4096
+
+    # Timeline of one channel as (time, pulse in microseconds)
+    def channel(self, channel):
+        return [(t, pulse) for t, c, pulse in self.timeline if c == channel]
+
+    # --------- WRITES ---------
+    def _check(self, address):
+        if address != self.address:
+            raise OSError(f"No PCA9685 at 0x{address:02x}")
+
+    def _write(self, address, reg, values):
+        self._check(address)
+        now = self.clock.monotonic()
+        self.log.append((now, reg, values))
+        before = [self.pulse(c) for c in range(16)]
+        step = 1 if self.auto_increment else 0
+        for i, value in enumerate(values):
+            self._store((reg + i * step) & 0xFF, value)
+        for channel in range(16):
+            pulse = self.pulse(channel)
+            if pulse != before[channel]:
+                self.timeline.append((now, channel, pulse))
+
+    def _store(self, reg, value):
+        if reg == self.PRESCALE and not self.sleeping:
+            self.ignored += 1
+            return
+        if reg == self.MODE1:
+            value &= ~self.RESTART  # writing 1 to RESTART clears it
+        if self.ALL_LED_ON_L <= reg < self.ALL_LED_ON_L + 4:
+            for channel in range(16):
+                self.regs[self.LED0_ON_L + 4 * channel + reg - self.ALL_LED_ON_L] = value
+        self.regs[reg] = value
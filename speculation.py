@@ -0,0 +1,134 @@
+import time
+import threading
+from collections import deque
+from clock import SYSTEM_CLOCK
+from memory import estimate_tokens
+from response_cache import normalize
+from tracing import tracer
+
+# --------- POLICIES ---------
+# How eagerly to guess at the reply before the user has finished:
+#   stable     seconds of pause with the partial transcript unchanged
+#   min_words  shortest partial worth sending
+#   match      word similarity the final transcript needs to keep the guess
+#   attempts   guesses per turn, a new one starts when the partial drifts
+POLICIES = {
+    "off": None,
+    "conservative": {"stable": 0.3, "min_words": 4, "match": 1.0, "attempts": 1},
+    "balanced": {"stable": 0.2, "min_words": 3, "match": 0.85, "attempts": 2},
+    "aggressive": {"stable": 0.1, "min_words": 2, "match": 0.7, "attempts": 3},
+}
+
+# 1 - word edit distance / length, on transcripts normalized the way the
+# response cache does it, so "um what is" and "what is" are the same
+def similarity(a, b):
+    a, b = normalize(a).split(), normalize(b).split()
+    if not a and not b:
+        return 1.0
+    row = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        prev, row[0] = row[0], i
+        for j, y in enumerate(b, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (x != y))
+    return 1.0 - row[-1] / max(len(a), len(b))
+
+def prompt_tokens(messages):
+    return sum(estimate_tokens(m["content"]) for m in messages)
+
+# --------- SPECULATOR ---------
+# Fed the live partial transcript on every frame (stt.listen's on_partial).
+# Once the speaker has paused long enough with it unchanged, start(text) is
+# called and should return an llm.Prefetch (or None to skip, e.g. for a local
+# command). When the final transcript arrives claim() hands back the running
+# reply if it answered close enough to the same question, and cancels it
+# otherwise.
+#   wasted_tokens  prompt + streamed tokens of cancelled guesses
+#   saved_tokens   tokens already streamed when a kept guess was claimed
+#   gained         seconds the kept guess was ahead of a request started at
+#                  the final transcript, per turn
+class Speculator:
+    def __init__(self, start, policy="balanced", clock=SYSTEM_CLOCK):
+        self.start = start
+        self.policy = POLICIES[policy]
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.stats = {"turns": 0, "started": 0, "kept": 0, "cancelled": 0, "skipped": 0,
+                      "wasted_tokens": 0, "saved_tokens": 0, "gained_seconds": 0.0}
+        self.gained = deque(maxlen=100)
+        self._reset()
+
+    def _reset(self):
+        self.text = ""
+        self.since = self.clock.monotonic()
+        self.guess = None  # (text, prefetch)
+        self.tried = set()
+        self.attempts = 0
+
+    def partial(self, text, speaking=False):
+        if not self.policy or not text:
+            return
+        now = self.clock.monotonic()
+        with self.lock:
+            if speaking:
+                self.since = now
+            if text != self.text:
+                self.text, self.since = text, now
+                # They kept talking and it is no longer the same question
+                if self.guess and similarity(self.guess[0], text) < self.policy["match"]:
+                    self._cancel()
+                return
+            if (self.guess or self.attempts >= self.policy["attempts"] or text in self.tried
+                    or now - self.since < self.policy["stable"] or len(text.split()) < self.policy["min_words"]):
+                return
+            self.tried.add(text)
+        prefetch = self.start(text)
+        with self.lock:
+            if prefetch is None:
+                self.stats["skipped"] += 1
+                return
+            self.guess = (text, prefetch)
+            self.attempts += 1
+            self.stats["started"] += 1
+
+    # Final transcript -> the running Prefetch to play, or None
+    def claim(self, text):
+        with self.lock:
+            self.stats["turns"] += 1
+            if self.guess and similarity(self.guess[0], text) < self.policy["match"]:
+                self._cancel()
+            guess = self.guess
+            self._reset()
+            if guess is None:
+                return None
+            prefetch = guess[1]
+            now = time.monotonic()  # the gateway's clock
+            ready = min(now, prefetch.first_token) if prefetch.first_token else now
+            self.stats["kept"] += 1
+            self.stats["saved_tokens"] += estimate_tokens(prefetch.text) if prefetch.text else 0
+            self.stats["gained_seconds"] += ready - prefetch.started
+            self.gained.append(ready - prefetch.started)
+        tracer.record("speculation", prefetch.started, ready)
+        return prefetch
+
+    # Drop whatever is running, e.g. the turn turned out to be a local command
+    def cancel(self):
+        with self.lock:
+            self._cancel()
+            self._reset()
+
+    def _cancel(self):
+        if self.guess is None:
+            return
+        prefetch = self.guess[1]
+        self.guess = None
+        prefetch.cancel()
+        self.stats["cancelled"] += 1
+        self.stats["wasted_tokens"] += prompt_tokens(prefetch.reply.messages)
+        if prefetch.text:
+            self.stats["wasted_tokens"] += estimate_tokens(prefetch.text)
+
+    def summary(self):
+        with self.lock:
+            stats = dict(self.stats)
+        stats["mean_gain"] = stats["gained_seconds"] / stats["kept"] if stats["kept"] else 0.0
+        return stats
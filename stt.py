@@ -0,0 +1,167 @@
+import os
+import json
+import dsp
+from vad import Endpointer
+from tracing import tracer
+
+# --------- CONFIG ---------
+VOSK_MODEL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "vosk-model-small-en-us")
+
+# --------- BACKEND INTERFACE ---------
+# A backend hands out one session per utterance. Frames are fed as they
+# arrive; feed() may return a partial Hypothesis, finish() returns the final
+# transcript ("" when nothing was recognized). Backends raise on hard errors
+# such as no network, instead of pretending nothing was said.
+class Hypothesis:
+    def __init__(self, text, final=False):
+        self.text = text
+        self.final = final
+
+    def __repr__(self):
+        return f"Hypothesis({self.text!r}, final={self.final})"
+
+class STTSession:
+    def feed(self, frame):
+        return None
+
+    def finish(self):
+        return ""
+
+class STTBackend:
+    name = "none"
+
+    def session(self):
+        return STTSession()
+
+    def transcribe(self, frames):
+        session = self.session()
+        for frame in frames:
+            session.feed(frame)
+        return session.finish()
+
+# --------- VOSK (OFFLINE) ---------
+class VoskSession(STTSession):
+    def __init__(self, model):
+        from vosk import KaldiRecognizer
+        self.recognizer = KaldiRecognizer(model, dsp.RATE)
+        self.partial = ""
+        self.text = []
+
+    def feed(self, frame):
+        if self.recognizer.AcceptWaveform(bytes(frame)):
+            text = json.loads(self.recognizer.Result()).get("text", "")
+            if text:
+                self.text.append(text)
+            return Hypothesis(" ".join(self.text), final=True)
+        partial = json.loads(self.recognizer.PartialResult()).get("partial", "")
+        if partial == self.partial:
+            return None
+        self.partial = partial
+        return Hypothesis(" ".join(self.text + [partial]).strip())
+
+    def finish(self):
+        text = json.loads(self.recognizer.FinalResult()).get("text", "")
+        if text:
+            self.text.append(text)
+        return " ".join(self.text)
+
+class VoskSTT(STTBackend):
+    name = "vosk"
+
+    def __init__(self, model_path=VOSK_MODEL):
+        from vosk import Model, SetLogLevel
+        SetLogLevel(-1)
+        self.model = Model(model_path)
+
+    def session(self):
+        return VoskSession(self.model)
+
+# --------- GOOGLE (CLOUD) ---------
+# No partials: the audio is buffered and sent once when the utterance ends
+class GoogleSession(STTSession):
+    def __init__(self, recognizer):
+        self.recognizer = recognizer
+        self.frames = []
+
+    def feed(self, frame):
+        self.frames.append(bytes(frame))
+        return None
+
+    def finish(self):
+        import speech_recognition as sr
+        audio = sr.AudioData(b"".join(self.frames), dsp.RATE, 2)
+        try:
+            return self.recognizer.recognize_google(audio).lower()
+        except sr.UnknownValueError:
+            return ""
+
+class GoogleSTT(STTBackend):
+    name = "google"
+
+    def __init__(self):
+        import speech_recognition as sr
+        self.recognizer = sr.Recognizer()
+
+    def session(self):
+        return GoogleSession(self.recognizer)
+
+BACKENDS = {"vosk": VoskSTT, "google": GoogleSTT}
+
+def make_stt(name):
+    return BACKENDS[name]()
+
+# --------- UTTERANCE CAPTURE ---------
+# Reads frames from a mic reader until the speaker is done and returns the
+# transcript, or None if nobody started talking within timeout. The utterance
+# ends when the VAD endpointer hears the end of speech (at most `pause`
+# seconds of silence, less for a fast speaker), after max_length seconds, or
+# as soon as a partial hypothesis contains one of stop_words or ends in a
+# command the intent router can act on straight away. on_partial(text,
+# speaking) gets the latest partial transcript on every frame once there is
+# one, and whether that frame was speech, e.g. for speculation.Speculator.
+def listen(reader, backend, noise_floor, timeout=10, max_length=15, pause=0.8, stop_words=(), router=None,
+           on_partial=None):
+    frame_time = dsp.FRAME / dsp.RATE
+    session = backend.session()
+    endpointer = Endpointer(noise_floor, max_hangover=pause)
+    preroll = []
+    partial = ""
+    started = False
+    waited = spoken = 0.0
+    while True:
+        frame = reader.read(timeout=1)
+        if frame is None:
+            return None
+        speech = endpointer.process(frame)
+        if not started:
+            waited += frame_time
+            preroll = (preroll + [bytes(frame)])[-10:]
+            if not speech:
+                if waited >= timeout:
+                    return None
+                continue
+            started = True
+            speech_start = last_speech = tracer.clock.monotonic()
+            tracer.new_turn(speech_start)
+            for old in preroll[:-1]:
+                session.feed(old)
+        hypothesis = session.feed(frame)
+        spoken += frame_time
+        if hypothesis:
+            partial = hypothesis.text
+        if on_partial and partial:
+            on_partial(partial, speech)
+        if speech:
+            last_speech = tracer.clock.monotonic()
+        early = hypothesis and (any(word in hypothesis.text for word in stop_words)
+                                or router and router.route(hypothesis.text, partial=True))
+        if early or endpointer.ended or spoken >= max_length:
+            # Response time counts from the last voiced frame
+            now = tracer.clock.monotonic()
+            tracer.record("capture", speech_start, last_speech)
+            tracer.record("endpointing", last_speech, now)
+            tracer.set_origin(last_speech)
+            if early:
+                return hypothesis.text.lower()
+            with tracer.span("stt"):
+                return session.finish().lower()
@@ -0,0 +1,125 @@
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# --------- STUB LLM SERVER ---------
+# Minimal OpenAI-compatible chat endpoint for exercising llm.LLMGateway
+# without the network. Each request waits `delay` (+ up to `jitter`) seconds
+# before the first token, fails with HTTP 500 with probability `fail_rate`,
+# and streams the reply word by word `token_delay` seconds apart. Passing
+# `latency` (a function returning seconds) replaces delay and jitter with any
+# distribution, e.g. the ones bench_session.py builds.
+#   python stub_llm.py --port 8808 --delay 2 --jitter 1 --fail-rate 0.2
+# then point an OpenAIBackend at base_url="http://127.0.0.1:8808/v1".
+class StubLLM:
+    def __init__(self, reply="This is a stub reply.", delay=0.0, jitter=0.0, fail_rate=0.0,
+                 token_delay=0.01, port=0, latency=None):
+        self.reply = reply
+        self.delay = delay
+        self.jitter = jitter
+        self.fail_rate = fail_rate
+        self.token_delay = token_delay
+        self.latency = latency or (lambda: delay + random.random() * jitter)
+        self.requests = 0
+        self.connections = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_port}/v1"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse shows up
+
+            def setup(self):
+                super().setup()
+                stub.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def send_json(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self.send_json(200, {"object": "list", "data": [{"id": "stub", "object": "model"}]})
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                stub.requests += 1
+                time.sleep(stub.latency())
+                if random.random() < stub.fail_rate:
+                    self.send_json(500, {"error": {"message": "stub failure", "type": "server_error"}})
+                    return
+                words = stub.reply.split(" ")
+                if not request.get("stream"):
+                    self.send_json(200, {
+                        "id": "stub", "object": "chat.completion", "created": int(time.time()), "model": "stub",
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": stub.reply}}],
+                    })
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    for i, word in enumerate(words):
+                        delta = {"content": word if i == 0 else " " + word}
+                        self.send_chunk(delta, None)
+                        time.sleep(stub.token_delay)
+                    self.send_chunk({}, "stop")
+                    self.write_chunk(b"data: [DONE]\n\n")
+                    self.write_chunk(b"")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client gave up on us, e.g. the losing side of a hedge
+
+            def send_chunk(self, delta, finish_reason):
+                chunk = {"id": "stub", "object": "chat.completion.chunk", "created": int(time.time()),
+                         "model": "stub", "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+                self.write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+
+            def write_chunk(self, data):
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a fake OpenAI chat endpoint")
+    parser.add_argument("--port", type=int, default=8808)
+    parser.add_argument("--reply", default="This is a stub reply.")
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds before the first token")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random delay, seconds")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with HTTP 500")
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    args = parser.parse_args()
+    stub = StubLLM(args.reply, args.delay, args.jitter, args.fail_rate, args.token_delay, args.port)
+    print(f"Stub LLM on {stub.base_url}", file=sys.stderr)
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,108 @@
+import json
+import itertools
+import threading
+from collections import deque
+import numpy as np
+from clock import SYSTEM_CLOCK
+
+# --------- TRACER ---------
+# Spans are (name, turn, start, end, thread) tuples in a fixed-size ring, so
+# tracing costs one tuple and a deque append per span and never grows.
+# A turn is one user utterance and everything done in answer to it; its id is
+# stamped on every span recorded until the next turn starts, whichever thread
+# records it. The turn's origin is where response time is counted from (the
+# end of the user's speech once it is known). Times come from the tracer's
+# clock (monotonic seconds).
+class Span:
+    __slots__ = ("tracer", "name", "turn", "start")
+
+    def __init__(self, tracer, name, turn):
+        self.tracer = tracer
+        self.name = name
+        self.turn = turn
+
+    def __enter__(self):
+        self.start = self.tracer.clock.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.tracer.record(self.name, self.start, self.tracer.clock.monotonic(), self.turn)
+
+class Tracer:
+    def __init__(self, capacity=8192, clock=SYSTEM_CLOCK):
+        self.clock = clock
+        self.spans = deque(maxlen=capacity)
+        self.ids = itertools.count(1)
+        self.turn = 0
+        self.origin = clock.monotonic()
+        self.firsts = set()
+        self.enabled = True
+        self.lock = threading.Lock()
+
+    def new_turn(self, start=None):
+        with self.lock:
+            self.turn = next(self.ids)
+            self.origin = self.clock.monotonic() if start is None else start
+            self.firsts = set()
+        return self.turn
+
+    def set_origin(self, t):
+        self.origin = t
+
+    def span(self, name):
+        return Span(self, name, self.turn)
+
+    def record(self, name, start, end, turn=None):
+        if self.enabled:
+            self.spans.append((name, self.turn if turn is None else turn, start, end, threading.get_ident()))
+
+    def mark(self, name):
+        now = self.clock.monotonic()
+        self.record(name, now, now)
+
+    # Span from the turn's origin to now, recorded once per turn, e.g.
+    # "first_audio" when the first sentence of the answer starts playing
+    def since_origin(self, name):
+        with self.lock:
+            if name in self.firsts:
+                return
+            self.firsts.add(name)
+            turn, start = self.turn, self.origin
+        self.record(name, start, self.clock.monotonic(), turn)
+
+    # --------- EXPORT ---------
+    def summary(self):
+        durations = {}
+        for name, turn, start, end, thread in list(self.spans):
+            durations.setdefault(name, []).append(end - start)
+        summary = {}
+        for name, values in sorted(durations.items()):
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            summary[name] = {"count": len(values), "p50": float(p50), "p95": float(p95), "p99": float(p99)}
+        return summary
+
+    def print_summary(self):
+        for name, s in self.summary().items():
+            print(f"{name:14} n={s['count']:<5} p50 {1000 * s['p50']:8.1f} ms  "
+                  f"p95 {1000 * s['p95']:8.1f} ms  p99 {1000 * s['p99']:8.1f} ms")
+
+    # Chrome trace-event format, open in chrome://tracing or ui.perfetto.dev.
+    # Each turn is its own process row so a whole exchange lines up.
+    def chrome_trace(self):
+        events = []
+        for name, turn, start, end, thread in list(self.spans):
+            event = {"name": name, "cat": "eyebot", "pid": turn, "tid": thread,
+                     "ts": start * 1e6, "args": {"turn": turn}}
+            if end > start:
+                event.update(ph="X", dur=(end - start) * 1e6)
+            else:
+                event.update(ph="i", s="t")
+            events.append(event)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+
+# Shared tracer for the whole process
+tracer = Tracer()
@@ -0,0 +1,100 @@
+import re
+import queue
+import threading
+
+# --------- SENTENCE SPLITTER ---------
+# A sentence ends at . ! or ? (plus any closing quotes/brackets) followed by
+# whitespace, so "3.5" or "e.g.x" are not split mid-token.
+SENTENCE_END = re.compile(r'[.!?]+["\')\]]*\s+')
+
+def split_sentences(deltas):
+    buf = ""
+    for delta in deltas:
+        buf += delta
+        while True:
+            match = SENTENCE_END.search(buf)
+            if not match:
+                break
+            sentence = buf[:match.end()].strip()
+            buf = buf[match.end():]
+            if sentence:
+                yield sentence
+    if buf.strip():
+        yield buf.strip()
+
+# --------- SPEECH PIPELINE ---------
+# Text deltas go in, each finished sentence is synthesized on a worker thread
+# into a bounded queue while the calling thread plays the previous one.
+# play(audio) returns False when playback was interrupted, which cancels the
+# rest of the reply; discard(audio) cleans up anything synthesized but unplayed.
+# An interrupted reply's deltas are closed before speak() returns, so whatever
+# produces them (the LLM stream, the history update) stops there and then.
+class SpeechPipeline:
+    def __init__(self, synthesize, play, discard=None, depth=2):
+        self.synthesize = synthesize
+        self.play = play
+        self.discard = discard
+        self.depth = depth
+
+    def speak(self, deltas):
+        audio_queue = queue.Queue(maxsize=self.depth)
+        cancelled = threading.Event()
+        source = iter(deltas)
+        reading = threading.Lock()  # held while the worker is inside next(source)
+
+        def pull():
+            while True:
+                with reading:
+                    if cancelled.is_set():
+                        return
+                    try:
+                        delta = next(source)
+                    except StopIteration:
+                        return
+                yield delta
+
+        def close():
+            with reading:
+                if hasattr(source, "close"):
+                    source.close()
+
+        def produce():
+            try:
+                for sentence in split_sentences(pull()):
+                    if cancelled.is_set():
+                        break
+                    audio = self.synthesize(sentence)
+                    while not cancelled.is_set():
+                        try:
+                            audio_queue.put(audio, timeout=0.1)
+                            break
+                        except queue.Full:
+                            continue
+                    else:
+                        if self.discard:
+                            self.discard(audio)
+            except Exception as e:
+                print("Speech pipeline error:", e)
+            finally:
+                close()
+                audio_queue.put(None)
+
+        threading.Thread(target=produce, daemon=True).start()
+        while True:
+            audio = audio_queue.get()
+            if audio is None:
+                return True
+            if self.play(audio) is False:
+                break
+        # Interrupted: close the reply (waits for at most the delta being read)
+        # and drop what is already queued; a sentence still being synthesized
+        # is discarded by the worker when it finishes
+        cancelled.set()
+        close()
+        while True:
+            try:
+                audio = audio_queue.get_nowait()
+            except queue.Empty:
+                return False
+            if audio is not None and self.discard:
+                self.discard(audio)
@@ -0,0 +1,91 @@
+import numpy as np
+import dsp
+
+# --------- FEATURES ---------
+# Per 20 ms frame, for one frame or a (n, FRAME) batch at once:
+#   snr       frame energy over the noise floor, dB
+#   flatness  spectral flatness over 100-4000 Hz: ~0 for voiced speech, which
+#             is all harmonics, towards 1 for fans, hiss and other steady noise
+BAND = slice(int(100 * dsp.N_FFT / dsp.RATE), int(4000 * dsp.N_FFT / dsp.RATE))
+
+def features(frames, noise_level):
+    frames = dsp.to_float(frames)
+    energy = dsp.rms(frames) * 32768
+    power = dsp.power_spectrum(frames) + 1e-10
+    band = power[..., BAND]
+    flatness = np.exp(np.mean(np.log(band), axis=-1)) / np.mean(band, axis=-1)
+    snr = 20 * np.log10(energy / max(noise_level, 1.0))
+    return snr, flatness
+
+# Logistic model on those features -> probability of speech, fitted on the
+# bench_vad.py fixtures. A loud frame is speech whatever its shape; one only
+# a few dB over the floor also has to be harmonic to count.
+WEIGHTS = {"snr": 0.5, "flatness": -6.0}
+BIAS = -3.0
+
+def speech_probability(frames, noise_level):
+    snr, flatness = features(frames, noise_level)
+    z = BIAS + WEIGHTS["snr"] * snr + WEIGHTS["flatness"] * flatness
+    return 1.0 / (1.0 + np.exp(-z))
+
+# --------- ENDPOINTER ---------
+# Decides frame by frame whether someone is talking and when they are done.
+# Instead of a fixed pause it waits `hangover` seconds of silence, learned
+# from the speaker's own pauses between words in this utterance: pause_margin
+# times the longest recent one, pulled towards initial_hangover until `prior`
+# pauses have been heard, and kept between min_hangover and max_hangover.
+# Frames that are clearly silent count in full towards it, doubtful ones (a
+# trailing "s", breath) only half, so a confident end closes the utterance
+# sooner. Either way the utterance ends once max_hangover seconds of wall
+# time have gone without speech.
+class Endpointer:
+    def __init__(self, noise_floor, min_hangover=0.25, max_hangover=0.8, initial_hangover=0.6,
+                 enter=0.6, leave=0.4, certain=0.15, pause_margin=2.0, prior=5, history=8):
+        self.noise_floor = noise_floor
+        self.min_hangover = min_hangover
+        self.max_hangover = max_hangover
+        self.initial_hangover = initial_hangover
+        self.enter = enter  # probability that starts speech
+        self.leave = leave  # ... and that ends it again
+        self.certain = certain  # below this a frame is surely silence
+        self.pause_margin = pause_margin
+        self.prior = prior
+        self.history = history
+        self.frame_time = dsp.FRAME / dsp.RATE
+        self.reset()
+
+    def reset(self):
+        self.speaking = False
+        self.started = False
+        self.ended = False
+        self.pauses = []
+        self.silence = 0.0  # wall time of the current pause
+        self.quiet = 0.0  # the same, doubtful frames counted half
+        self.probability = 0.0
+
+    @property
+    def hangover(self):
+        if not self.pauses:
+            return self.initial_hangover
+        recent = self.pauses[-self.history:]
+        learned = max(recent) * self.pause_margin
+        hangover = self.initial_hangover + (learned - self.initial_hangover) * len(recent) / (len(recent) + self.prior)
+        return min(self.max_hangover, max(self.min_hangover, hangover))
+
+    # -> True while the frame is speech; sets `ended` once the utterance is over
+    def process(self, frame):
+        p = float(speech_probability(frame, self.noise_floor.level))
+        self.probability = p
+        self.speaking = p >= (self.leave if self.speaking else self.enter)
+        if self.speaking:
+            if self.started and self.silence > 0:
+                self.pauses.append(self.silence)
+            self.started = True
+            self.silence = self.quiet = 0.0
+            return True
+        if self.started:
+            self.silence += self.frame_time
+            self.quiet += self.frame_time if p < self.certain else self.frame_time / 2
+            if self.quiet >= self.hangover or self.silence >= self.max_hangover:
+                self.ended = True
+        return False
@@ -0,0 +1,123 @@
+import os
+import sys
+import glob
+from collections import deque
+import numpy as np
+import dsp
+
+# --------- CONFIG ---------
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "wakeword_templates")
+DEFAULT_THRESHOLD = 4.0
+SPEECH_RMS = 0.01  # frames quieter than this never count as speech
+
+# --------- DETECTOR INTERFACE ---------
+# A wake-word stage is fed 20 ms int16 frames one at a time and returns True
+# on the frame where it fires.
+class WakeWordDetector:
+    def process(self, frame):
+        return False
+
+    def reset(self):
+        pass
+
+# --------- TEMPLATE MATCHING ---------
+# Subsequence DTW between the enrolled templates and the tail of a sliding
+# window of MFCC frames. The match may start anywhere in the window but has
+# to end in the last few frames, so it fires right after the phrase ends.
+def dtw_tail(window, template, tail=5):
+    cost = np.sqrt(((template[:, None, :] - window[None, :, :]) ** 2).sum(axis=-1))
+    rows = len(cost)
+    prev = cost[0]
+    for row in cost[1:]:
+        # cur[j] = row[j] + min(prev[j], prev[j - 1], cur[j - 1]); the cur[j - 1]
+        # chain is a running minimum once shifted by the row's cumulative sum
+        step = row.copy()
+        step[0] += prev[0]
+        step[1:] += np.minimum(prev[1:], prev[:-1])
+        total = np.cumsum(row)
+        prev = total + np.minimum.accumulate(step - total)
+    return prev[-tail:].min() / rows
+
+# Cepstral mean normalization over the voiced frames only, so leading
+# silence in the window does not shift the mean
+def normalize(features, voiced=None):
+    if voiced is not None and voiced.any():
+        return features - features[voiced].mean(axis=0)
+    return features - features.mean(axis=0)
+
+def template_features(samples):
+    frames = dsp.frames(samples)
+    voiced = dsp.rms(frames) > SPEECH_RMS
+    edges = np.nonzero(voiced)[0]
+    if len(edges):
+        frames = frames[edges[0]:edges[-1] + 1]
+        voiced = voiced[edges[0]:edges[-1] + 1]
+    return normalize(dsp.mfcc(frames), voiced)
+
+class TemplateWakeWord(WakeWordDetector):
+    def __init__(self, templates, threshold=None, hop=5):
+        self.templates = [template_features(t) for t in templates]
+        self.threshold = threshold or self._auto_threshold()
+        self.hop = hop
+        longest = max(len(t) for t in self.templates)
+        self.min_frames = min(len(t) for t in self.templates) // 2
+        self.features = deque(maxlen=int(longest * 1.5))
+        self.voiced = deque(maxlen=int(longest * 1.5))
+        self.count = 0
+        self.last_score = None
+
+    # Templates should match each other far better than anything else does,
+    # so the loosest template-to-template distance sets the bar
+    def _auto_threshold(self):
+        if len(self.templates) < 2:
+            return DEFAULT_THRESHOLD
+        scores = [dtw_tail(a, b, tail=1) for a in self.templates for b in self.templates if a is not b]
+        return max(scores) * 1.2
+
+    def reset(self):
+        self.features.clear()
+        self.voiced.clear()
+        self.count = 0
+
+    def process(self, frame):
+        samples = dsp.to_float(frame)
+        self.features.append(dsp.mfcc(samples))
+        self.voiced.append(dsp.rms(samples) > SPEECH_RMS)
+        self.count += 1
+        if self.count % self.hop or sum(self.voiced) < self.min_frames:
+            return False
+        window = normalize(np.array(self.features), np.array(self.voiced))
+        self.last_score = min(dtw_tail(window, t) for t in self.templates)
+        if self.last_score < self.threshold:
+            self.reset()
+            return True
+        return False
+
+def load_wakeword(template_dir=TEMPLATE_DIR, threshold=None):
+    paths = sorted(glob.glob(os.path.join(template_dir, "*.wav")))
+    if not paths:
+        raise RuntimeError(f"No wake word templates in {template_dir}, run: python wakeword.py enroll")
+    return TemplateWakeWord([dsp.read_wav(p) for p in paths], threshold)
+
+# --------- ENROLLMENT ---------
+# python wakeword.py enroll [count] records templates from the USB mic
+def enroll(count=3, seconds=2):
+    import pyaudio
+    from mic_stream import find_input_device
+    device = find_input_device()
+    pa = pyaudio.PyAudio()
+    os.makedirs(TEMPLATE_DIR, exist_ok=True)
+    stream = pa.open(format=pyaudio.paInt16, channels=1, rate=dsp.RATE, input=True,
+                     input_device_index=device, frames_per_buffer=dsp.FRAME)
+    for n in range(count):
+        input(f"Press enter and say the wake word ({n + 1}/{count})...")
+        data = stream.read(dsp.RATE * seconds, exception_on_overflow=False)
+        path = os.path.join(TEMPLATE_DIR, f"template_{n}.wav")
+        dsp.write_wav(path, np.frombuffer(data, dtype=np.int16))
+        print("Saved", path)
+    stream.close()
+    pa.terminate()
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "enroll":
+        enroll(int(sys.argv[2]) if len(sys.argv) > 2 else 3)